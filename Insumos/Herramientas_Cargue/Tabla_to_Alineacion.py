@@ -9,8 +9,12 @@
 # Importar modulos
 import arcpy
 import os
+import sys
 from alineacion import alineacion
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.alineacion import reporte_alineacion
+
 
 # Espacio de trabajo
 
@@ -76,10 +80,10 @@ elif inputGeom == 'Linea':
 alineacion(cobertura, route, tolerancia)
 
 
-# Exportar reporte
+# Reporte de calidad de la alineación (Parquet/CSV + XLSX write-only)
 
 arcpy.AddMessage('Ruta salida ' + outPath)
-arcpy.TableToExcel_conversion(cobertura, outPath + ' Alineado.xls', "NAME", "CODE")
+reporte_alineacion(cobertura, route, tolerancia, outPath + ' Alineado', formato="parquet", xlsx=True)
 arcpy.AddMessage('Reporte de alineación generado correctamente')
 
 arcpy.ClearWorkspaceCache_management()
@@ -0,0 +1,246 @@
+# benchmarks/benchmark_alineacion.py
+"""
+Benchmark de los motores de alineación con datos sintéticos.
+
+Genera un P_centerline sintético (N rutas M-aware) y un levantamiento DCVG de
+puntos o líneas con ruido configurable, y mide para cada tamaño:
+    por_ruta     bucle ruta por ruta como el motor "geoprocesos"; Select y
+                 LocateFeaturesAlongRoutes se reemplazan por un equivalente
+                 local (recorrido de todas las rutas + proyección completa),
+                 sin el costo fijo de cada geoproceso: es una cota optimista.
+    vectorizado  motor NumPy con el índice de segmentos del centerline.
+    paralelo     motor NumPy repartido por ENGROUTEID en un pool de procesos,
+                 con el índice compartido por mmap.
+
+Cada caso corre en un proceso nuevo para que el pico de RSS sea el del caso.
+No requiere arcpy.
+
+Uso:
+    python -m benchmarks.benchmark_alineacion
+    python -m benchmarks.benchmark_alineacion --tamanos 1000 100000 --geometria linea --procesos 4
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.indice_centerline import abrir_indice, construir_indice, guardar_indice, segmentos_de_vertices
+from utils.motor_alineacion import (
+    alinear_lineas, alinear_puntos, proyectar_en_segmentos, repartir_por_ruta
+)
+
+MOTORES = ("por_ruta", "vectorizado", "paralelo")
+
+
+# -------------------------------------------------------------------
+# 🧪 Datos sintéticos
+# -------------------------------------------------------------------
+def generar_rutas(n_rutas, n_vertices, largo_tramo=100.0, semilla=0):
+    """
+    Rutas sintéticas como caminatas aleatorias suaves con M = longitud acumulada.
+
+    Retorna:
+        dict: {ENGROUTEID: (vx, vy, vm)}.
+    """
+    rng = np.random.default_rng(semilla)
+    rutas = {}
+    lado = np.sqrt(n_rutas) * n_vertices * largo_tramo
+    for i in range(n_rutas):
+        rumbo = rng.uniform(0, 2 * np.pi) + np.cumsum(rng.normal(0, 0.15, n_vertices - 1))
+        dx = largo_tramo * np.cos(rumbo)
+        dy = largo_tramo * np.sin(rumbo)
+        x0, y0 = rng.uniform(0, lado, 2)
+        vx = np.concatenate([[x0], x0 + np.cumsum(dx)])
+        vy = np.concatenate([[y0], y0 + np.cumsum(dy)])
+        vm = np.concatenate([[0.0], np.cumsum(np.hypot(dx, dy))])
+        rutas[f"{{{i:08d}-0000-0000-0000-000000000000}}"] = (vx, vy, vm)
+    return rutas
+
+
+def generar_levantamiento(rutas, n_lecturas, ruido=5.0, atipicos=0.02, semilla=1):
+    """
+    Lecturas DCVG sintéticas en orden de levantamiento (M creciente por ruta).
+
+    Parámetros:
+        rutas (dict): Rutas de generar_rutas.
+        n_lecturas (int): Número de lecturas (puntos).
+        ruido (float): Desviación estándar del desplazamiento lateral.
+        atipicos (float): Fracción de lecturas desplazadas muy lejos de la ruta.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray, np.ndarray, np.ndarray): ENGROUTEID, x, y y M real.
+    """
+    rng = np.random.default_rng(semilla)
+    ids = np.asarray(list(rutas), dtype=object)
+    por_ruta = np.bincount(rng.integers(0, ids.size, n_lecturas), minlength=ids.size)
+
+    rguid, xs, ys, ms = [], [], [], []
+    for rid, n in zip(ids, por_ruta):
+        if n == 0:
+            continue
+        vx, vy, vm = rutas[rid]
+        m = np.sort(rng.uniform(0, vm[-1], n))
+        rguid.append(np.full(n, rid, dtype=object))
+        xs.append(np.interp(m, vm, vx) + rng.normal(0, ruido, n))
+        ys.append(np.interp(m, vm, vy) + rng.normal(0, ruido, n))
+        ms.append(m)
+
+    x, y = np.concatenate(xs), np.concatenate(ys)
+    lejos = rng.random(x.size) < atipicos
+    x[lejos] += rng.choice([-1, 1], lejos.sum()) * rng.uniform(500, 2000, lejos.sum())
+    return np.concatenate(rguid), x, y, np.concatenate(ms)
+
+
+def a_lineas(ids, x, y):
+    """Líneas entre lecturas consecutivas de la misma ruta (inicio = lectura i, fin = i + 1)."""
+    misma = ids[:-1] == ids[1:]
+    return ids[:-1][misma], x[:-1][misma], y[:-1][misma], x[1:][misma], y[1:][misma]
+
+
+# -------------------------------------------------------------------
+# ⚙️ Motores
+# -------------------------------------------------------------------
+def _locate_local(centerline, rguid, px, py, tolerancia):
+    """
+    Equivalente local de Select + LocateFeaturesAlongRoutes para una ruta:
+    recorre todas las entidades del centerline y proyecta sobre todos los
+    segmentos de la ruta seleccionada.
+    """
+    seleccion = [seg for rid, seg in centerline if rid == rguid]
+    if not seleccion:
+        return np.full(px.size, np.nan)
+    return proyectar_en_segmentos(px, py, np.concatenate(seleccion), tolerancia)[0]
+
+
+def motor_por_ruta(rutas, lecturas, tolerancia, geometria):
+    centerline = [(rid, segmentos_de_vertices(*v)) for rid, v in rutas.items()]
+    ids = lecturas[0]
+    if geometria == "linea":
+        px = np.concatenate([lecturas[1], lecturas[3]])
+        py = np.concatenate([lecturas[2], lecturas[4]])
+        ids = np.concatenate([ids, ids])
+    else:
+        px, py = lecturas[1], lecturas[2]
+
+    medidas = np.full(px.size, np.nan)
+    for rguid in np.unique(ids.astype(str)):
+        posiciones = np.flatnonzero(ids == rguid)
+        medidas[posiciones] = _locate_local(centerline, rguid, px[posiciones], py[posiciones], tolerancia)
+    return medidas
+
+
+def _alinear(lecturas, tolerancia, indice, geometria):
+    if geometria == "linea":
+        return alinear_lineas(*lecturas, None, tolerancia, indice)[0]
+    return alinear_puntos(*lecturas, None, tolerancia, indice)[0]
+
+
+def _bloque_paralelo(tarea):
+    directorio, lecturas, tolerancia, geometria = tarea
+    return _alinear(lecturas, tolerancia, abrir_indice(directorio), geometria)
+
+
+def motor_vectorizado(rutas, lecturas, tolerancia, geometria):
+    return _alinear(lecturas, tolerancia, construir_indice(rutas), geometria)
+
+
+def motor_paralelo(rutas, lecturas, tolerancia, geometria, procesos):
+    directorio = tempfile.mkdtemp(prefix="bench_indice_")
+    try:
+        guardar_indice(construir_indice(rutas), os.path.join(directorio, "indice"))
+        ids = lecturas[0].astype(str)
+        tareas = []
+        for bloque in repartir_por_ruta(ids, procesos):
+            posiciones = np.flatnonzero(np.isin(ids, bloque))
+            tareas.append((os.path.join(directorio, "indice"), [a[posiciones] for a in lecturas], tolerancia, geometria))
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            return list(pool.map(_bloque_paralelo, tareas))
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+# -------------------------------------------------------------------
+# ⏱️ Ejecución
+# -------------------------------------------------------------------
+def _rss_pico_mb():
+    """Pico de RSS del proceso y de sus hijos (Linux: ru_maxrss en KB)."""
+    propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(propio, hijos) / 1024.0
+
+
+def ejecutar_caso(caso):
+    """Genera los datos del caso y mide un motor. Corre en un proceso aislado."""
+    rutas = generar_rutas(caso["rutas"], caso["vertices"])
+    lecturas = generar_levantamiento(rutas, caso["tamano"], caso["ruido"], caso["atipicos"])[:3]
+    if caso["geometria"] == "linea":
+        lecturas = a_lineas(*lecturas)
+    filas = lecturas[0].size
+
+    inicio = time.perf_counter()
+    if caso["motor"] == "por_ruta":
+        motor_por_ruta(rutas, lecturas, caso["tolerancia"], caso["geometria"])
+    elif caso["motor"] == "vectorizado":
+        motor_vectorizado(rutas, lecturas, caso["tolerancia"], caso["geometria"])
+    else:
+        motor_paralelo(rutas, lecturas, caso["tolerancia"], caso["geometria"], caso["procesos"])
+    segundos = time.perf_counter() - inicio
+
+    return {
+        "motor": caso["motor"],
+        "geometria": caso["geometria"],
+        "filas": filas,
+        "segundos": round(segundos, 3),
+        "filas_s": round(filas / segundos) if segundos > 0 else None,
+        "rss_pico_mb": round(_rss_pico_mb(), 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de los motores de alineación.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--motores", nargs="+", choices=MOTORES, default=list(MOTORES))
+    parser.add_argument("--geometria", choices=("punto", "linea"), default="punto")
+    parser.add_argument("--rutas", type=int, default=200)
+    parser.add_argument("--vertices", type=int, default=500)
+    parser.add_argument("--ruido", type=float, default=5.0)
+    parser.add_argument("--atipicos", type=float, default=0.02)
+    parser.add_argument("--tolerancia", type=float, default=50.0)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--csv", help="Guarda los resultados en un CSV.")
+    args = parser.parse_args(argv)
+
+    print(f"🧪 {args.rutas} rutas × {args.vertices} vértices, ruido {args.ruido} m, "
+          f"{args.atipicos:.0%} atípicos, tolerancia {args.tolerancia} m, {args.procesos} procesos")
+    print(f"{'motor':<12} {'geometría':<9} {'filas':>10} {'segundos':>10} {'filas/s':>12} {'RSS pico MB':>12}")
+
+    resultados = []
+    contexto = multiprocessing.get_context("spawn")
+    for tamano in args.tamanos:
+        for motor in args.motores:
+            caso = dict(vars(args), tamano=tamano, motor=motor)
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as aislado:
+                r = aislado.submit(ejecutar_caso, caso).result()
+            resultados.append(r)
+            print(f"{r['motor']:<12} {r['geometria']:<9} {r['filas']:>10} {r['segundos']:>10.3f} "
+                  f"{r['filas_s'] or 0:>12} {r['rss_pico_mb']:>12.1f}")
+            sys.stdout.flush()
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as archivo:
+            escritor = csv.DictWriter(archivo, fieldnames=list(resultados[0]))
+            escritor.writeheader()
+            escritor.writerows(resultados)
+        print(f"📄 Resultados en {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/benchmark_escritura.py
+"""
+Benchmark de la escritura de DataFrames: bucle fila a fila con iterrows
+(aproximación del cargar_df_a_tabla original) frente a utils.escritura_tablas
+(lotes de tuplas).
+
+Ambos escriben en SQLite, de modo que corre sin ArcGIS. La línea base no es
+el código original: este entregaba cada Series a InsertCursor.insertRow, que
+convierte los valores internamente; aquí cada fila se convierte con pd.isna /
+isoformat y se escribe con un execute, porque SQLite no acepta NaN ni
+Timestamp. Las cifras sirven para comparar órdenes de magnitud, no para
+estimar los tiempos en ArcGIS.
+
+Uso:
+    python -m benchmarks.benchmark_escritura --filas 500000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.escritura_tablas import campos_insertables, escribir_df
+
+
+def generar_lecturas(n, semilla=0):
+    """DataFrame sintético con la forma de P_DASurveyReadings (con nulos en cada tipo)."""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({
+        "ENGROUTEID": rng.choice([f"{{{i:08d}-0000-0000-0000-000000000000}}" for i in range(50)], n).astype(object),
+        "ENGM": rng.uniform(0, 50_000, n),
+        "LONGITUDE": rng.uniform(-75, -72, n),
+        "LATITUDE": rng.uniform(4, 7, n),
+        "ALTITUDE": rng.uniform(100, 2500, n),
+        "DCVGREADING": rng.normal(20, 10, n),
+        "INDICATIONSEVERITY": rng.integers(1, 4, n),
+        "COMMENTS": rng.choice(["", "Cruce vial", "Zona húmeda", None], n).astype(object),
+        "INSPECTIONDATE": pd.Timestamp("2024-10-01") + pd.to_timedelta(rng.integers(0, 86_400 * 30, n), unit="s"),
+    })
+    df.loc[rng.random(n) < 0.05, "DCVGREADING"] = np.nan
+    df.loc[rng.random(n) < 0.01, "INSPECTIONDATE"] = pd.NaT
+    return df
+
+
+def _escritura_iterrows(df, tabla_destino):
+    """Aproximación del bucle original: una Series por fila, convertida y escrita con un execute."""
+    import sqlite3
+
+    archivo, nombre_tabla = os.path.split(tabla_destino)
+    campos = campos_insertables(df)
+    columnas = ", ".join(f'"{c}"' for c in campos)
+    marcadores = ", ".join("?" * len(campos))
+    conexion = sqlite3.connect(archivo)
+    with conexion:
+        cursor = conexion.cursor()
+        for _, row in df[campos].iterrows():
+            valores = [None if pd.isna(v) else (v.isoformat(" ") if isinstance(v, pd.Timestamp) else v) for v in row]
+            cursor.execute(f'INSERT INTO "{nombre_tabla}" ({columnas}) VALUES ({marcadores})', valores)
+    conexion.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de escritura de tablas.")
+    parser.add_argument("--filas", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    df = generar_lecturas(args.filas)
+    with tempfile.TemporaryDirectory() as carpeta:
+        tabla = os.path.join(carpeta, "bench.sqlite", "P_DASurveyReadings")
+
+        escribir_df(df.head(0), tabla, backend="sqlite")
+        inicio = time.perf_counter()
+        _escritura_iterrows(df, tabla)
+        t_iterrows = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        escribir_df(df, tabla, backend="sqlite")
+        t_lotes = time.perf_counter() - inicio
+
+    print(f"iterrows (aprox.): {t_iterrows:8.2f} s ({args.filas / t_iterrows:,.0f} filas/s)")
+    print(f"lotes:             {t_lotes:8.2f} s ({args.filas / t_lotes:,.0f} filas/s)")
+    print(f"🚀 Aceleración: {t_iterrows / t_lotes:.1f}×")
+
+
+if __name__ == "__main__":
+    main()
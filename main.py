@@ -5,8 +5,12 @@ import pprint
 from utils.validacion import cargar_mapeo_tematica, generar_informe_validacion
 from utils.cargue_excel import cargar_excel_a_gdb
 from utils.alineacion import alineacion
-from utils.cargue_bd import cargue_bd
-from utils.reglas.dcvg_reglas import aplicar_reglas_dcvg
+from utils.cargue_bd import cargue_bd, campos_lectura
+
+# pandas 2.x: Copy-on-Write opcional; las tablas de salida seleccionadas de la
+# lectura base no copian sus columnas (en pandas >= 3 siempre está activo)
+if pd.__version__.startswith("2."):
+    pd.set_option("mode.copy_on_write", True)
 
 
 def main():
@@ -19,7 +23,9 @@ def main():
     nombre_hoja = "DCVG"
     inputGeom = "Punto"  # "Punto" | "Linea"
     route = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\Centerline.gdb\P_centerline"
-    tolerancia = 50
+    tolerancia = 50  # metros
+    procesos = 1  # > 1: alineación en paralelo repartida por ENGROUTEID
+    tamano_bloque = None  # filas por bloque en el cargue a BD (None: todo en memoria)
     gdb_destino = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\Centerline.gdb"
 
     arcpy.env.overwriteOutput = True
@@ -33,7 +39,9 @@ def main():
 
     # --- 2️⃣ VALIDACIÓN DEL EXCEL ---
     print("📊 [2/6] Validando estructura del archivo Excel...")
-    df = pd.read_excel(ruta_excel, sheet_name=nombre_hoja)
+    # Solo las columnas del mapeo y las de las validaciones adicionales
+    columnas_validacion = set(campos_lectura(mapeo_tematica, ["No Contrato", "Fecha de Inspección"]))
+    df = pd.read_excel(ruta_excel, sheet_name=nombre_hoja, usecols=lambda c: c in columnas_validacion)
     informe = generar_informe_validacion(df, mapeo_tematica)
     print("✅ Validación completada.\n")
 
@@ -57,14 +65,14 @@ def main():
     if not arcpy.Exists(route):
         raise FileNotFoundError(f"❌ No se encontró la ruta del Centerline: {route}")
 
-    alineacion(cobertura_fc, route, tolerancia)
+    alineacion(cobertura_fc, route, tolerancia, procesos=procesos)
     print("✅ Alineación completada correctamente.\n")
 
     # --- 5️⃣ CARGUE A BASE DE DATOS ---
     print("💾 [5/6] Iniciando cargue a base de datos destino...")
     cobertura_fc = r"C:\Users\TICE21\AppData\Local\Temp\scratch.gdb\COBERTURA_FC"#Borrar
 
-    cargue_bd(cobertura_fc, tematica, mapeo_tematica, gdb_destino)
+    cargue_bd(cobertura_fc, tematica, mapeo_tematica, gdb_destino, tamano_bloque=tamano_bloque)
     print("✅ Cargue a base de datos completado.\n")
 
     # --- 6️⃣ FINALIZACIÓN ---
@@ -0,0 +1,69 @@
+# tests/test_cache_alineacion.py
+"""
+Pruebas de la caché de medidas de alineación entre ejecuciones.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from utils import cache_alineacion
+from utils.cache_alineacion import abrir_cache, actualizar_cache, claves_alineacion, consultar_cache, ruta_cache
+
+
+@pytest.fixture(autouse=True)
+def directorio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_alineacion, "DIRECTORIO_CACHE", str(tmp_path))
+    return tmp_path
+
+
+def _puntos(x):
+    x = np.asarray(x, dtype="float64")
+    return {"ruta": np.array(["A"] * x.size, dtype=object), "x": x, "y": np.zeros(x.size), "z": np.zeros(x.size)}
+
+
+def test_claves_cambian_con_coordenadas_tolerancia_y_version():
+    datos = _puntos([1, 2])
+    base = claves_alineacion(datos, "Point", 50, True, "v1")
+    assert base[0] != base[1]
+    np.testing.assert_array_equal(base, claves_alineacion(datos, "Point", 50, True, "v1"))
+    assert not np.isin(claves_alineacion(datos, "Point", 25, True, "v1"), base).any()
+    assert not np.isin(claves_alineacion(datos, "Point", 50, True, "v2"), base).any()
+
+
+def test_ida_y_vuelta_solo_acierta_filas_sin_cambios():
+    claves = claves_alineacion(_puntos([1, 2, 3]), "Point", 50, False, "v1")
+    actualizar_cache("Point", "v1", None, claves, np.array([[10.0], [20.0], [30.0]]), ["", "", "alerta"])
+
+    # Segunda ejecución: la fila del medio se corrigió
+    claves = claves_alineacion(_puntos([1, 2.5, 3]), "Point", 50, False, "v1")
+    aciertos, valores, alertas = consultar_cache(abrir_cache("Point", "v1"), claves, 1)
+    assert aciertos.tolist() == [True, False, True]
+    np.testing.assert_allclose(valores[:, 0], [10, np.nan, 30])
+    assert alertas.tolist() == ["", "", "alerta"]
+
+
+def test_otra_version_del_centerline_no_acierta():
+    claves = claves_alineacion(_puntos([1]), "Point", 50, False, "v1")
+    actualizar_cache("Point", "v1", None, claves, np.array([[10.0]]), [""])
+    assert abrir_cache("Point", "v2") is None
+
+    claves = claves_alineacion(_puntos([1]), "Point", 50, False, "v2")
+    aciertos, _, _ = consultar_cache(abrir_cache("Point", "v1"), claves, 1)
+    assert not aciertos.any()
+
+
+def test_conserva_las_versiones_usadas_mas_recientemente():
+    assert cache_alineacion.VERSIONES_CONSERVADAS == 3
+    for i, version in enumerate(["pruebas", "produccion", "pruebas", "nueva", "otra"]):
+        claves = claves_alineacion(_puntos([1]), "Point", 50, False, version)
+        actualizar_cache("Point", version, abrir_cache("Point", version), claves, np.array([[1.0]]), [""])
+        # Fechas de modificación crecientes aunque el sistema de archivos tenga poca resolución
+        os.utime(ruta_cache("Point", version), (i, i))
+        if version == "pruebas" and i:
+            # Alternar entre centerlines no borra la caché de la otra versión
+            assert os.path.exists(ruta_cache("Point", "produccion"))
+
+    assert [os.path.exists(ruta_cache("Point", v)) for v in ["otra", "nueva", "pruebas", "produccion"]] == [
+        True, True, True, False
+    ]
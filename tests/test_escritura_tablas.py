@@ -0,0 +1,68 @@
+# tests/test_escritura_tablas.py
+"""
+Pruebas de la escritura por lotes de tuplas con el backend SQLite.
+"""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.escritura_tablas import escribir_df, lotes_de_tuplas
+
+
+def _lecturas():
+    return pd.DataFrame({
+        "ENGROUTEID": ["{A}", None, "{C}"],
+        "ENGM": [1.5, np.nan, 3.0],
+        "LECTURA": pd.array([10, pd.NA, 30], dtype="Int64"),
+        "FECHA": pd.to_datetime(["2026-10-17 08:30", None, "2026-10-18 00:00"]),
+        "OBJECTID": [7, 8, 9],
+    })
+
+
+def _leer(archivo, tabla):
+    with closing(sqlite3.connect(archivo)) as conexion:
+        cursor = conexion.execute(f'SELECT * FROM "{tabla}" ORDER BY OBJECTID')
+        return [d[0] for d in cursor.description], cursor.fetchall()
+
+
+def test_nulos_a_null_y_fechas_iso(tmp_path):
+    archivo = str(tmp_path / "staging.sqlite")
+    assert escribir_df(_lecturas(), f"{archivo}/LECTURAS", backend="sqlite", tamano_lote=2) == 3
+
+    columnas, filas = _leer(archivo, "LECTURAS")
+    # OBJECTID es reservado: lo asigna la tabla, no el DataFrame
+    assert columnas == ["OBJECTID", "ENGROUTEID", "ENGM", "LECTURA", "FECHA"]
+    assert filas == [
+        (1, "{A}", 1.5, 10, "2026-10-17 08:30:00"),
+        (2, None, None, None, None),
+        (3, "{C}", 3.0, 30, "2026-10-18 00:00:00"),
+    ]
+
+
+def test_constantes_y_cargue_por_bloques(tmp_path):
+    archivo = str(tmp_path / "staging.sqlite")
+    tabla = f"{archivo}/LECTURAS"
+    constantes = {"CREATOR": "usuario", "OBJECTID": 99}
+    df = _lecturas().drop(columns=["FECHA"])
+    escribir_df(df.iloc[:2], tabla, backend="sqlite", constantes=constantes, tipos_campo={"ENGROUTEID": "GUID"})
+    escribir_df(df.iloc[2:], tabla, backend="sqlite", crear=False, constantes=constantes)
+
+    columnas, filas = _leer(archivo, "LECTURAS")
+    assert columnas == ["OBJECTID", "ENGROUTEID", "ENGM", "LECTURA", "CREATOR"]
+    assert [f[-1] for f in filas] == ["usuario"] * 3
+    assert [f[1] for f in filas] == ["{A}", None, "{C}"]
+
+
+def test_lotes_solo_con_constantes_terminan():
+    df = pd.DataFrame(index=range(5))
+    lotes = list(lotes_de_tuplas(df, [], tamano_lote=2, constantes={"CREATOR": "u"}))
+    assert [len(l) for l in lotes] == [2, 2, 1]
+    assert lotes[0][0] == ("u",)
+
+
+def test_backend_no_soportado():
+    with pytest.raises(ValueError):
+        escribir_df(_lecturas(), "x/y", backend="csv")
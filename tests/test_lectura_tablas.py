@@ -0,0 +1,33 @@
+# tests/test_lectura_tablas.py
+"""
+Pruebas de la selección de tablas de salida a partir de la lectura única.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import lectura_tablas
+from utils.lectura_tablas import seleccionar_tabla
+
+
+def _lectura_base():
+    return pd.DataFrame({"RUTA": ["A", "B"], "VALOR": [1.0, 2.0], "OTRO": [3, 4]})
+
+
+@pytest.mark.parametrize("copy_on_write", [True, False])
+def test_seleccionar_tabla_renombra_sin_modificar_la_base(monkeypatch, copy_on_write):
+    monkeypatch.setattr(lectura_tablas, "copy_on_write_activo", lambda: copy_on_write)
+    base = _lectura_base()
+    tabla = seleccionar_tabla(base, {"RUTA": "ENGROUTEID", "NO_EXISTE": "X"}, extra=["VALOR"])
+    assert list(tabla.columns) == ["ENGROUTEID", "VALOR"]
+
+    tabla["VALOR"] *= 10
+    tabla.loc[0, "ENGROUTEID"] = "Z"
+    pd.testing.assert_frame_equal(base, _lectura_base())
+
+
+def test_seleccionar_tabla_sin_copy_on_write_no_comparte_memoria(monkeypatch):
+    monkeypatch.setattr(lectura_tablas, "copy_on_write_activo", lambda: False)
+    base = _lectura_base()
+    tabla = seleccionar_tabla(base, {"VALOR": "VALOR"})
+    assert not np.shares_memory(tabla["VALOR"].to_numpy(), base["VALOR"].to_numpy())
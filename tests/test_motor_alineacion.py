@@ -0,0 +1,152 @@
+# tests/test_motor_alineacion.py
+"""
+Pruebas del motor de alineación con rutas sintéticas (sin arcpy).
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from utils.indice_centerline import construir_indice, guardar_indice
+from utils.motor_alineacion import (
+    a_plano_local, alinear_bloque, alinear_puntos, medidas_cobertura, proyectar_en_segmentos, radio_en_grados,
+    repartir_por_ruta, unir_bloques
+)
+
+NAN = np.nan
+
+
+def _rutas_sinteticas(n_rutas=20, n_vertices=50, semilla=0):
+    """Rutas en zigzag con M = longitud acumulada."""
+    rng = np.random.default_rng(semilla)
+    rutas = {}
+    for r in range(n_rutas):
+        vx = np.cumsum(rng.uniform(5, 15, n_vertices)) + r * 2_000
+        vy = np.cumsum(rng.uniform(-10, 10, n_vertices)) + r * 1_000
+        vm = np.concatenate([[0], np.cumsum(np.hypot(np.diff(vx), np.diff(vy)))])
+        rutas[f"R{r:03d}"] = (vx, vy, vm)
+    return rutas
+
+
+# -------------------------------------------------------------------
+# 📏 Proyección
+# -------------------------------------------------------------------
+def test_proyectar_en_segmentos_medida_interpolada():
+    seg = np.array([[0, 0, 10, 0, 100, 110], [10, 0, 10, 10, 110, 120]], dtype="float64")
+    medidas, distancias = proyectar_en_segmentos([3, 12, 9], [1, 5, -2], seg, tolerancia=3)
+    np.testing.assert_allclose(medidas, [103, 115, 109])
+    np.testing.assert_allclose(distancias, [1, 2, 2])
+
+
+def test_proyectar_en_segmentos_fuera_de_tolerancia_y_sin_coordenadas():
+    seg = np.array([[0, 0, 10, 0, 0, 10]], dtype="float64")
+    medidas, distancias = proyectar_en_segmentos([5, 5, NAN], [1, 4, 0], seg, tolerancia=2)
+    assert medidas[0] == pytest.approx(5)
+    assert np.isnan(medidas[1]) and distancias[1] == pytest.approx(4)
+    assert np.isnan(medidas[2]) and np.isnan(distancias[2])
+
+
+def test_alinear_puntos_ruta_multiparte_y_ruta_inexistente():
+    rutas = {"A": ([0, 10, NAN, 20, 30], [0, 0, NAN, 0, 0], [0, 10, NAN, 20, 30])}
+    medidas, _ = alinear_puntos(["A", "A", "A", "B"], [5, 25, 15, 5], [0.5, -0.5, 0, 0], rutas, tolerancia=1)
+    np.testing.assert_allclose(medidas[:2], [5, 25])
+    # Entre partes (a 5 m de ambos extremos) y ruta sin vértices: sin medida
+    assert np.isnan(medidas[2]) and np.isnan(medidas[3])
+
+
+@pytest.mark.parametrize("tolerancia", [2.0, 25.0])
+def test_alinear_puntos_indice_igual_a_fuerza_bruta(tolerancia):
+    rutas = _rutas_sinteticas()
+    rng = np.random.default_rng(1)
+    ids = np.array(sorted(rutas))[rng.integers(0, len(rutas), 2_000)]
+    px = np.empty(ids.size)
+    py = np.empty(ids.size)
+    for i, rguid in enumerate(ids):
+        vx, vy, _ = rutas[rguid]
+        k = rng.integers(0, vx.size - 1)
+        t = rng.random()
+        px[i] = vx[k] + t * (vx[k + 1] - vx[k]) + rng.normal(0, 3)
+        py[i] = vy[k] + t * (vy[k + 1] - vy[k]) + rng.normal(0, 3)
+
+    m_fuerza, d_fuerza = alinear_puntos(ids, px, py, rutas, tolerancia)
+    m_indice, d_indice = alinear_puntos(ids, px, py, rutas, tolerancia, indice=construir_indice(rutas))
+
+    np.testing.assert_allclose(m_indice, m_fuerza, equal_nan=True)
+    dentro = ~np.isnan(m_fuerza)
+    np.testing.assert_allclose(d_indice[dentro], d_fuerza[dentro])
+    assert dentro.any() and (tolerancia > 10 or not dentro.all())
+
+
+# -------------------------------------------------------------------
+# 🌐 Coordenadas geográficas (tolerancia en metros)
+# -------------------------------------------------------------------
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_alinear_puntos_geograficas_tolerancia_en_metros(con_indice):
+    # Ruta este-oeste de ~1.1 km a la latitud de Bogotá, M en metros
+    lon0, lat0 = -74.10, 4.60
+    este_fin, _ = a_plano_local(-74.09, lat0, lon0, lat0)
+    rutas = {"A": ([lon0, -74.09], [lat0, lat0], [0.0, float(este_fin)])}
+    grados_por_metro = 1 / 110_574.0
+
+    # Puntos a 40 m y 60 m al norte de la mitad de la ruta
+    px = [-74.095, -74.095]
+    py = [lat0 + 40 * grados_por_metro, lat0 + 60 * grados_por_metro]
+    indice = construir_indice(rutas) if con_indice else None
+    medidas, distancias = alinear_puntos(["A", "A"], px, py, rutas, 50, indice, geograficas=True)
+
+    assert medidas[0] == pytest.approx(este_fin / 2, abs=1.0)
+    assert distancias[0] == pytest.approx(40, abs=0.5)
+    assert np.isnan(medidas[1]) and distancias[1] == pytest.approx(60, abs=0.5)
+
+
+@pytest.mark.parametrize("lat", [0.0, 4.6, 60.0])
+def test_radio_en_grados_cubre_la_tolerancia_en_ambos_ejes(lat):
+    radio = radio_en_grados(50, [lat])
+    este, _ = a_plano_local(-74 + radio, lat, -74, lat)
+    _, norte = a_plano_local(-74, lat + radio, -74, lat)
+    assert min(abs(este), abs(norte)) >= 50 - 1e-6
+
+
+# -------------------------------------------------------------------
+# ⚙️ Alineación en paralelo
+# -------------------------------------------------------------------
+def test_repartir_por_ruta_balancea_sin_dividir_rutas():
+    ids = ["A"] * 6 + ["B"] * 5 + ["C"] * 4 + ["D"] * 3 + ["E"]
+    bloques = repartir_por_ruta(ids, 2)
+    assert sorted(r for b in bloques for r in b) == ["A", "B", "C", "D", "E"]
+    cargas = sorted(sum(ids.count(r) for r in b) for b in bloques)
+    assert cargas == [9, 10]
+    # Más partes que rutas: se omiten los bloques vacíos
+    assert len(repartir_por_ruta(["A", "A", "B"], 8)) == 2
+    assert repartir_por_ruta([], 4) == []
+
+
+def test_alineacion_en_procesos_igual_a_serie(tmp_path):
+    rutas = _rutas_sinteticas(n_rutas=12)
+    rng = np.random.default_rng(2)
+    ids = np.array(sorted(rutas))[rng.integers(0, len(rutas), 1_500)].astype(object)
+    px = np.empty(ids.size)
+    py = np.empty(ids.size)
+    for i, rguid in enumerate(ids):
+        vx, vy, _ = rutas[rguid]
+        k = rng.integers(0, vx.size)
+        px[i], py[i] = vx[k] + rng.normal(0, 2), vy[k] + rng.normal(0, 2)
+    datos = {"ruta": ids, "x": px, "y": py}
+
+    indice = construir_indice(rutas)
+    guardar_indice(indice, str(tmp_path / "indice"))
+    serie = medidas_cobertura(datos, "Point", 10, indice)
+    assert np.isfinite(serie[0]).all()
+
+    # Los procesos solo importan utils.motor_alineacion (sin arcpy)
+    base = {"tipo": "Point", "tolerancia": 10, "geograficas": False, "indice": str(tmp_path / "indice")}
+    tareas = []
+    for rutas_bloque in repartir_por_ruta(ids, 3):
+        posiciones = np.flatnonzero(np.isin(ids.astype(str), rutas_bloque))
+        tareas.append(dict(base, posiciones=posiciones, datos={k: v[posiciones] for k, v in datos.items()}))
+    with ProcessPoolExecutor(max_workers=3) as pool:
+        resultados = list(pool.map(alinear_bloque, tareas))
+
+    posiciones, paralelo = unir_bloques(resultados[::-1], 1)
+    assert posiciones.tolist() == list(range(ids.size))
+    np.testing.assert_array_equal(paralelo[0], serie[0])
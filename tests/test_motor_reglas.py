@@ -0,0 +1,69 @@
+# tests/test_motor_reglas.py
+"""
+Pruebas del motor de reglas de agregación: el resultado por bloques debe ser
+el mismo que el de la tabla completa.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.reglas.motor_reglas import aplicar_plan, aplicar_plan_por_bloques, compilar_reglas, contexto_reglas
+
+REGLAS = {
+    "agrupacion": ["ENGROUTEID", "CONTRACTNUMBER"],
+    "conversiones": {
+        "ENGM": {"min": "ENGFROMM", "max": ["ENGTOM", "ENGTOM_COPIA"], "count": "LECTURAS"},
+        "VALOR": {"sum": "TOTAL", "first": "PRIMERO", "last": "ULTIMO"},
+    },
+    "constantes": {"INSPECTIONTYPE": "{inspection_type}", "CREATIONDATE": "{fecha_cargue}"},
+}
+CONTEXTO = contexto_reglas({"inspection_type": "DCVG"}, "usuario", "2026-10-17 08:00")
+
+
+def _lecturas(n=500, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "ENGROUTEID": pd.Categorical(rng.choice(["R1", "R2", "R3", "R4"], n)),
+        "CONTRACTNUMBER": rng.choice(["C1", "C2"], n),
+        "ENGM": rng.uniform(0, 1_000, n),
+        "VALOR": rng.integers(0, 100, n).astype("float64"),
+    })
+
+
+def _ordenado(df):
+    return df.sort_values(["ENGROUTEID", "CONTRACTNUMBER"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("tamano", [7, 37, 500])
+def test_por_bloques_igual_a_tabla_completa(tamano):
+    plan = compilar_reglas(REGLAS)
+    df = _lecturas()
+    completo = aplicar_plan(df, plan, CONTEXTO)
+    bloques = [df.iloc[i:i + tamano] for i in range(0, len(df), tamano)] + [df.iloc[:0]]
+    por_bloques = aplicar_plan_por_bloques(bloques, plan, CONTEXTO)
+
+    assert len(completo) == 8
+    pd.testing.assert_frame_equal(_ordenado(por_bloques), _ordenado(completo), check_dtype=False)
+
+
+def test_copias_y_constantes():
+    plan = compilar_reglas(REGLAS)
+    df = aplicar_plan(_lecturas(), plan, CONTEXTO)
+    assert (df["ENGTOM_COPIA"] == df["ENGTOM"]).all()
+    assert df["LECTURAS"].sum() == 500
+    assert set(df["INSPECTIONTYPE"]) == {"DCVG"} and set(df["CREATIONDATE"]) == {"2026-10-17 08:00"}
+
+
+def test_sin_agregaciones_validas_ni_lecturas_mismo_resultado_vacio():
+    plan = compilar_reglas(REGLAS)
+    sin_entradas = _lecturas().drop(columns=["ENGM", "VALOR"])
+    resultados = [
+        aplicar_plan(sin_entradas, plan, CONTEXTO),
+        aplicar_plan_por_bloques([sin_entradas.iloc[:10], sin_entradas.iloc[10:]], plan, CONTEXTO),
+        aplicar_plan(_lecturas().iloc[:0], plan, CONTEXTO),
+        aplicar_plan_por_bloques([], plan, CONTEXTO),
+    ]
+    for df in resultados:
+        assert df.empty
+        assert list(df.columns) == list(resultados[0].columns)
+    assert {"ENGROUTEID", "ENGFROMM", "ENGTOM_COPIA", "INSPECTIONTYPE"} <= set(resultados[0].columns)
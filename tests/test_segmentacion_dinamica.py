@@ -0,0 +1,83 @@
+# tests/test_segmentacion_dinamica.py
+"""
+Pruebas de la segmentación dinámica sobre snapshots sintéticos (sin arcpy).
+"""
+import numpy as np
+
+from utils.segmentacion_dinamica import (
+    EN_HUECO, EN_RUTA, FUERA_DE_DOMINIO, FUERA_DE_RANGO, MOTIVOS, RUTA_INEXISTENTE, SIN_COORDENADAS,
+    extraer_tramos, resumen_estados, validar_coordenadas
+)
+
+NAN = np.nan
+
+
+def _snapshot(rutas):
+    """Snapshot mínimo (ver utils.snapshot_centerline) a partir de {id: (vx, vy, vm)}."""
+    ids = sorted(rutas)
+    offsets = np.concatenate([[0], np.cumsum([len(rutas[r][0]) for r in ids])])
+    eje = lambda i: np.concatenate([np.asarray(rutas[r][i], dtype="float64") for r in ids])
+    return {
+        "rutas": np.asarray(ids), "offsets": offsets,
+        "x": eje(0), "y": eje(1), "z": np.zeros(offsets[-1]), "m": eje(2),
+    }
+
+
+# -------------------------------------------------------------------
+# 〰️ Tramos (extraer_tramos)
+# -------------------------------------------------------------------
+def test_extraer_tramos_interpola_extremos_y_vertices_interiores():
+    snapshot = _snapshot({"A": ([0, 10, 20], [0, 0, 10], [0, 10, 20])})
+    tramos = extraer_tramos(snapshot, ["A"], [15], [5])
+    assert tramos["estado"].tolist() == [EN_RUTA]
+    np.testing.assert_allclose(tramos["x"], [5, 10, 15])
+    np.testing.assert_allclose(tramos["y"], [0, 0, 5])
+    np.testing.assert_allclose(tramos["m"], [5, 10, 15])
+    assert tramos["parte"].tolist() == [0, 0, 0]
+
+
+def test_extraer_tramos_estados_y_partes():
+    snapshot = _snapshot({"A": ([0, 10, NAN, 20, 30], [0, 0, NAN, 0, 0], [0, 10, NAN, 20, 30])})
+    tramos = extraer_tramos(snapshot, ["A", "A", "A", "Z", "A"], [5, 0, 12, 1, 10], [25, 35, 18, 2, 20])
+    assert tramos["estado"].tolist() == [EN_RUTA, FUERA_DE_RANGO, EN_HUECO, RUTA_INEXISTENTE, EN_HUECO]
+
+    # Solo el primer evento tiene vértices: dos partes separadas por el hueco
+    assert tramos["offsets"].tolist() == [0, 4, 4, 4, 4, 4]
+    np.testing.assert_allclose(tramos["x"], [5, 10, 20, 25])
+    assert tramos["parte"].tolist() == [0, 0, 1, 1]
+
+
+def test_extraer_tramos_descarta_partes_de_un_vertice():
+    # [10, 25]: el inicio cae justo en el fin de la primera parte
+    snapshot = _snapshot({"A": ([0, 10, NAN, 20, 30], [0, 0, NAN, 0, 0], [0, 10, NAN, 20, 30])})
+    tramos = extraer_tramos(snapshot, ["A"], [10], [25])
+    assert tramos["estado"].tolist() == [EN_RUTA]
+    np.testing.assert_allclose(tramos["x"], [20, 25])
+    assert tramos["parte"].tolist() == [0, 0]
+
+
+# -------------------------------------------------------------------
+# 📍 Coordenadas XYZ (validar_coordenadas)
+# -------------------------------------------------------------------
+def test_validar_coordenadas_nulos_y_dominio():
+    buf = validar_coordenadas(
+        [-74.1, NAN, -74.2, 200.0, -74.3],
+        [4.6, 4.6, NAN, 4.6, 95.0],
+        [2600, 2600, 2600, 2600, NAN],
+        dominio=(-180, -90, 180, 90),
+    )
+    assert buf["estado"].tolist() == [EN_RUTA, SIN_COORDENADAS, SIN_COORDENADAS, FUERA_DE_DOMINIO, FUERA_DE_DOMINIO]
+    np.testing.assert_allclose(buf["x"], [-74.1, NAN, NAN, NAN, NAN])
+    np.testing.assert_allclose(buf["z"], [2600, NAN, NAN, NAN, NAN])
+    assert np.isnan(buf["m"]).all()
+    assert resumen_estados(buf["estado"]) == {MOTIVOS[SIN_COORDENADAS]: 2, MOTIVOS[FUERA_DE_DOMINIO]: 2}
+
+
+def test_validar_coordenadas_z_nulo_y_sin_dominio():
+    buf = validar_coordenadas([1e6, 5.0], [2e6, 6.0], [NAN, 1.0])
+    # Sin dominio solo se exigen X e Y finitos; un Z nulo no invalida el punto
+    assert buf["estado"].tolist() == [EN_RUTA, EN_RUTA]
+    np.testing.assert_allclose(buf["z"], [NAN, 1.0])
+
+    buf = validar_coordenadas([5.0], [6.0])
+    assert buf["estado"].tolist() == [EN_RUTA] and np.isnan(buf["z"]).all()
@@ -2,94 +2,539 @@
 import arcpy
 import os
 import datetime
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import numpy as np
 
+from utils.motor_alineacion import (
+    alinear_bloque, alinear_puntos, banderas_lineas, medidas_cobertura, repartir_por_ruta, unir_bloques
+)
+from utils.cache_alineacion import abrir_cache, actualizar_cache, claves_alineacion, consultar_cache
+from utils.snapshot_centerline import obtener_snapshot, rutas_desde_snapshot
+from utils.indice_centerline import (
+    abrir_indice, clave_centerline, construir_indice, directorio_indice, guardar_indice, posicion_rutas
+)
+from utils import reporte_alineacion as reporte
+from utils.metadatos import describir, invalidar, nombres_campos
 
-def alineacion(cobertura, route, tolerancia):
+
+# Campos de medida por tipo de geometría
+CAMPOS_MEDIDA = {
+    "Polyline": ["ENGFROMM", "ENGTOM", "ALERTA_ALINEACION"],
+    "Point": ["ENGM"],
+    "Multipoint": ["ENGM"],
+}
+
+
+# Factor a metros de las unidades lineales de ArcGIS (parámetros "Linear Unit")
+METROS_POR_UNIDAD = {
+    "meters": 1.0,
+    "kilometers": 1000.0,
+    "decimeters": 0.1,
+    "centimeters": 0.01,
+    "millimeters": 0.001,
+    "feet": 0.3048,
+    "feetint": 0.3048,
+    "ussurveyfeet": 1200.0 / 3937.0,
+    "inches": 0.0254,
+    "inchesint": 0.0254,
+    "yards": 0.9144,
+    "yardsint": 0.9144,
+    "miles": 1609.344,
+    "milesint": 1609.344,
+    "nauticalmiles": 1852.0,
+    "nauticalmilesint": 1852.0,
+}
+
+
+def _tolerancia_numerica(tolerancia):
+    """
+    Convierte la tolerancia ("50", 50, "50 Meters" o "164 Feet") a metros.
+
+    Los valores sin unidad se toman en metros. Las unidades angulares
+    (DecimalDegrees) o desconocidas no tienen equivalente fijo en metros y
+    generan ValueError.
+    """
+    partes = str(tolerancia).split()
+    valor = float(partes[0])
+    if len(partes) == 1:
+        return valor
+    unidad = partes[1]
+    if unidad.lower() not in METROS_POR_UNIDAD:
+        raise ValueError(f"Unidad de tolerancia no soportada: '{unidad}'. Use una unidad lineal (p. ej. Meters).")
+    return valor * METROS_POR_UNIDAD[unidad.lower()]
+
+
+def _tolerancia_lineal(tolerancia):
+    """Tolerancia para LocateFeaturesAlongRoutes: los valores sin unidad se toman en metros."""
+    texto = str(tolerancia).strip()
+    return texto if len(texto.split()) > 1 else f"{texto} Meters"
+
+
+def _columna_extra(valores):
+    """Arreglo de un campo leído: float64 (None → NaN) si es numérico, object en otro caso."""
+    if all(v is None or isinstance(v, (int, float)) for v in valores):
+        return np.asarray([np.nan if v is None else v for v in valores], dtype="float64")
+    return np.asarray(valores, dtype=object)
+
+
+def leer_cobertura(cobertura, tipo, campos_extra=()):
+    """
+    Lee en una sola pasada los OID, ENGROUTEID y coordenadas de la cobertura.
+
+    Parámetros:
+        campos_extra (iterable): Campos adicionales a leer en la misma pasada
+            (por ejemplo, las medidas ya escritas para el reporte).
+
+    Retorna:
+        dict: Arreglos "oid", "ruta" y "x"/"y"/"z" (puntos) o "x_ini"/"y_ini"/"x_fin"/"y_fin" (líneas),
+        más un arreglo por cada campo extra.
+    """
+    campos_extra = list(campos_extra)
+    if tipo == "Polyline":
+        campos = ["OID@", "ENGROUTEID", "SHAPE@"] + campos_extra
+        oids, rutas, coords, extras = [], [], [], []
+        with arcpy.da.SearchCursor(cobertura, campos) as cursor:
+            for oid, rguid, shape, *extra in cursor:
+                oids.append(oid)
+                rutas.append(rguid)
+                extras.append(extra)
+                if shape is None:
+                    coords.append((np.nan, np.nan, np.nan, np.nan))
+                else:
+                    ini, fin = shape.firstPoint, shape.lastPoint
+                    coords.append((ini.X, ini.Y, fin.X, fin.Y))
+        coords = np.asarray(coords, dtype="float64").reshape(-1, 4)
+        datos = {
+            "oid": np.asarray(oids, dtype="int64"),
+            "ruta": np.asarray(rutas, dtype=object),
+            "x_ini": coords[:, 0], "y_ini": coords[:, 1],
+            "x_fin": coords[:, 2], "y_fin": coords[:, 3],
+        }
+        columnas_extra = list(zip(*extras)) if extras else [()] * len(campos_extra)
+    else:
+        campos = ["OID@", "ENGROUTEID", "SHAPE@X", "SHAPE@Y"]
+        if describir(cobertura).hasZ:
+            campos.append("SHAPE@Z")
+        base = len(campos)
+        with arcpy.da.SearchCursor(cobertura, campos + campos_extra) as cursor:
+            filas = list(cursor)
+        columnas = list(zip(*filas)) if filas else [()] * (base + len(campos_extra))
+        datos = {
+            "oid": np.asarray(columnas[0], dtype="int64"),
+            "ruta": np.asarray(columnas[1], dtype=object),
+            "x": np.asarray(columnas[2], dtype="float64"),
+            "y": np.asarray(columnas[3], dtype="float64"),
+        }
+        if base > 4:
+            datos["z"] = np.asarray(columnas[4], dtype="float64")
+        columnas_extra = columnas[base:]
+
+    for campo, valores in zip(campos_extra, columnas_extra):
+        datos[campo] = _columna_extra(valores)
+    return datos
+
+
+def _valores_escritura(arreglo):
+    """Medidas redondeadas a 3 decimales (NaN → None); otros tipos se escriben tal cual."""
+    arreglo = np.asarray(arreglo)
+    if arreglo.dtype.kind != "f":
+        return arreglo.astype(object)
+    redondeadas = np.round(arreglo, 3)
+    valores = redondeadas.astype(object)
+    valores[np.isnan(redondeadas)] = None
+    return valores
+
+
+def escribir_medidas(cobertura, campos, oids, medidas, where_clause=None):
+    """
+    Escribe las medidas calculadas en una sola pasada de UpdateCursor.
+
+    Parámetros:
+        cobertura (str): Feature class de cobertura.
+        campos (list): Campos de medida (ENGM o ENGFROMM/ENGTOM/ALERTA_ALINEACION).
+        oids (array): OID de cada fila calculada (ID_ALINEAR en la cobertura de Excel).
+        medidas (list[array]): Un arreglo por campo, alineado con `oids`.
+        where_clause (str): Restringe la pasada a un subconjunto de filas.
+    """
+    valores = np.column_stack([_valores_escritura(m) for m in medidas])
+    por_oid = dict(zip(np.asarray(oids).tolist(), valores.tolist()))
+
+    with arcpy.da.UpdateCursor(cobertura, ["OID@"] + list(campos), where_clause) as cursor:
+        for fila in cursor:
+            nuevos = por_oid.get(fila[0])
+            if nuevos is not None:
+                cursor.updateRow([fila[0]] + nuevos)
+
+
+def _construir_indice(route, campo_routeid, directorio=None):
+    """Construye el índice desde el snapshot; lo guarda en `directorio` si se indica."""
+    arcpy.AddMessage(f"🏗️ Construyendo índice del centerline... ({datetime.datetime.now()})")
+    indice = construir_indice(rutas_desde_snapshot(obtener_snapshot(route, campo_routeid)))
+    if directorio is not None:
+        guardar_indice(indice, directorio)
+    return indice
+
+
+@contextmanager
+def preparar_indice(route, campo_routeid="ENGROUTEID"):
+    """
+    Garantiza que el índice de segmentos del centerline exista en disco
+    mientras dure el bloque with, reutilizando el guardado mientras el
+    centerline no cambie (clave: ruta + sello de modificación). Las fuentes
+    sin sello (.sde) se indexan en un directorio temporal que se borra al salir.
+
+    Retorna (with):
+        str: Directorio del índice.
+    """
+    clave = clave_centerline(route, campo_routeid)
+    if clave is not None:
+        directorio = directorio_indice(clave)
+        if abrir_indice(directorio) is not None:
+            arcpy.AddMessage(f"♻️ Índice del centerline reutilizado ({clave[:8]})")
+        else:
+            _construir_indice(route, campo_routeid, directorio)
+        yield directorio
+        return
+
+    directorio = tempfile.mkdtemp(prefix="indice_")
+    try:
+        _construir_indice(route, campo_routeid, directorio)
+        yield directorio
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def obtener_indice(route, campo_routeid="ENGROUTEID"):
+    """
+    Devuelve el índice de segmentos del centerline abierto con memoria
+    mapeada. Las fuentes sin sello (.sde) se indexan solo en memoria.
+
+    Retorna:
+        dict: Índice de segmentos (ver utils.indice_centerline).
+    """
+    if clave_centerline(route, campo_routeid) is None:
+        return _construir_indice(route, campo_routeid)
+    with preparar_indice(route, campo_routeid) as directorio:
+        return abrir_indice(directorio)
+
+
+def _reportar_alertas(oids, alertas):
+    """Resume en mensajes de advertencia las líneas marcadas por banderas_lineas."""
+    for alerta in ("MEDIDAS_INVERTIDAS", "RUTAS_DISTINTAS"):
+        marcadas = [oid for oid, a in zip(np.asarray(oids).tolist(), alertas) if a and alerta in a]
+        if marcadas:
+            arcpy.AddWarning(f"⚠️ {len(marcadas)} líneas con {alerta} (OID: {marcadas[:20]}...)")
+
+
+def _marcar_extremos(vertices):
+    """Agrega EXTREMO (0 = inicio, 1 = fin) a la salida BOTH_ENDS de FeatureVerticesToPoints."""
+    arcpy.AddField_management(vertices, "EXTREMO", "SHORT")
+    vistos = set()
+    with arcpy.da.UpdateCursor(vertices, ["ID_ALINEAR", "EXTREMO"], sql_clause=(None, "ORDER BY OBJECTID")) as cursor:
+        for id_alinear, _ in cursor:
+            cursor.updateRow([id_alinear, 1 if id_alinear in vistos else 0])
+            vistos.add(id_alinear)
+
+
+def _medidas_geoprocesos(cobertura, route, tolerancia, tipo, ids_ruta, gdb):
+    """
+    Ejecuta LocateFeaturesAlongRoutes ruta por ruta usando `gdb` como espacio
+    de trabajo propio y devuelve las medidas leídas de TABLE_LOCATE_MEASURE.
+
+    Retorna:
+        dict: {ID_ALINEAR: [medidas]} (ENGM o ENGFROMM/ENGTOM).
+    """
+    coberturasel = os.path.join(gdb, "COBERTURA")
+    coberturavertices = os.path.join(gdb, "VERTICES")
+    routesel = os.path.join(gdb, "ROUTE_SEL")
+    tablelocatemeasure = os.path.join(gdb, "TABLE_LOCATE_MEASURE")
+
+    medidas = {}
+    for rguid in ids_ruta:
+        arcpy.AddMessage(f"🔄 Alineando {rguid} ({datetime.datetime.now()})")
+        where_clause = f"ENGROUTEID = '{rguid}'"
+        arcpy.Select_analysis(route, routesel, where_clause)
+        arcpy.Select_analysis(cobertura, coberturasel, where_clause)
+
+        if tipo == "Polyline":
+            # Ambos extremos en una sola extracción y una sola localización
+            arcpy.FeatureVerticesToPoints_management(coberturasel, coberturavertices, "BOTH_ENDS")
+            _marcar_extremos(coberturavertices)
+            arcpy.LocateFeaturesAlongRoutes_lr(
+                coberturavertices, routesel, "ENGROUTEID", tolerancia,
+                tablelocatemeasure, "ENGROUTEID POINT BEGIN_M"
+            )
+            with arcpy.da.SearchCursor(tablelocatemeasure, ["ID_ALINEAR", "EXTREMO", "BEGIN_M"]) as cursor:
+                for id_alinear, extremo, m in cursor:
+                    medidas.setdefault(id_alinear, [None, None])[extremo] = m
+        else:
+            arcpy.LocateFeaturesAlongRoutes_lr(
+                coberturasel, routesel, "ENGROUTEID", tolerancia,
+                tablelocatemeasure, "ENGROUTEID POINT BEGIN_M"
+            )
+            with arcpy.da.SearchCursor(tablelocatemeasure, ["ID_ALINEAR", "BEGIN_M"]) as cursor:
+                for id_alinear, m in cursor:
+                    medidas[id_alinear] = [m]
+    return medidas
+
+
+def _arreglos_geoprocesos(medidas, tipo):
+    """
+    Convierte {ID_ALINEAR: [medidas]} en arreglos; para líneas agrega las alertas.
+
+    Retorna:
+        tuple(np.ndarray, list[np.ndarray]): OID y un arreglo por campo de CAMPOS_MEDIDA.
+    """
+    oids = np.fromiter(medidas.keys(), dtype="int64", count=len(medidas))
+    valores = np.asarray([[np.nan if v is None else v for v in fila] for fila in medidas.values()], dtype="float64")
+    valores = valores.reshape(len(medidas), -1)
+    columnas = [valores[:, i] for i in range(valores.shape[1])]
+    if tipo == "Polyline":
+        columnas.append(banderas_lineas(columnas[0], columnas[1]))
+    return oids, columnas
+
+
+def _alinear_bloque_geoprocesos(tarea):
+    """
+    Alinea un bloque de rutas con geoprocesos en un proceso de trabajo.
+
+    Cada proceso crea su propia file geodatabase temporal, de modo que los
+    nombres COBERTURA / ROUTE_SEL / TABLE_LOCATE_MEASURE no chocan entre
+    procesos. El motor vectorizado usa utils.motor_alineacion.alinear_bloque,
+    que no importa arcpy.
+
+    Retorna:
+        tuple(np.ndarray, list[np.ndarray]): OID y medidas del bloque.
+    """
+    carpeta = tempfile.mkdtemp(prefix="alineacion_")
+    try:
+        arcpy.env.overwriteOutput = True
+        arcpy.CreateFileGDB_management(carpeta, "trabajo.gdb")
+        medidas = _medidas_geoprocesos(
+            tarea["cobertura"], tarea["route"], tarea["tolerancia"], tarea["tipo"], tarea["rutas"],
+            os.path.join(carpeta, "trabajo.gdb")
+        )
+    finally:
+        arcpy.ClearWorkspaceCache_management()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return _arreglos_geoprocesos(medidas, tarea["tipo"])
+
+
+def _ejecutar_bloques(trabajador, tareas, procesos, tipo):
+    """
+    Ejecuta `trabajador` sobre las tareas en un pool de procesos y une los
+    resultados ordenados por identificador (la unión es determinista).
+    """
+    with ProcessPoolExecutor(max_workers=min(procesos, len(tareas))) as pool:
+        resultados = list(pool.map(trabajador, tareas))
+    return unir_bloques(resultados, len(CAMPOS_MEDIDA[tipo]))
+
+
+def _alineacion_vectorizada(cobertura, route, tolerancia, tipo, geograficas, procesos=1, usar_cache=True):
+    """
+    Alinea la cobertura con el motor NumPy y escribe las medidas.
+
+    Las filas cuya clave (ENGROUTEID, coordenadas, tolerancia, versión del
+    centerline) ya está en la caché reutilizan sus medidas; solo las filas
+    nuevas o modificadas se alinean, en serie o repartidas en `procesos`.
+    """
+    datos = leer_cobertura(cobertura, tipo)
+    n = len(datos["oid"])
+    campos = CAMPOS_MEDIDA[tipo]
+    n_valores = 2 if tipo == "Polyline" else 1
+
+    version = clave_centerline(route) if usar_cache else None
+    cache = None
+    if version is not None:
+        claves = claves_alineacion(datos, tipo, tolerancia, geograficas, version)
+        cache = abrir_cache(tipo, version)
+        aciertos, valores, alertas = consultar_cache(cache, claves, n_valores)
+        tasa = aciertos.sum() / n if n else 0.0
+        arcpy.AddMessage(f"♻️ Caché de alineación: {int(aciertos.sum())}/{n} filas reutilizadas ({tasa:.1%})")
+    else:
+        aciertos = np.zeros(n, dtype=bool)
+        valores = np.full((n, n_valores), np.nan)
+        alertas = np.full(n, "", dtype=object)
+
+    pendientes = np.flatnonzero(~aciertos)
+    if pendientes.size:
+        sub = {k: v[pendientes] for k, v in datos.items()}
+        arcpy.AddMessage(f"🔄 Alineando {pendientes.size} registros ({datetime.datetime.now()})")
+
+        if procesos and procesos > 1:
+            # Los procesos abren el índice con mmap desde disco
+            with preparar_indice(route) as directorio:
+                base = {"tipo": tipo, "tolerancia": tolerancia, "geograficas": geograficas, "indice": directorio}
+                claves_ruta = sub["ruta"].astype(str)
+                tareas = []
+                for rutas_bloque in repartir_por_ruta(sub["ruta"], procesos):
+                    posiciones = np.flatnonzero(np.isin(claves_ruta, rutas_bloque))
+                    tareas.append(dict(base, posiciones=posiciones, datos={k: v[posiciones] for k, v in sub.items()}))
+                _, calculadas = _ejecutar_bloques(alinear_bloque, tareas, procesos, tipo)
+        else:
+            calculadas = medidas_cobertura(sub, tipo, tolerancia, obtener_indice(route), geograficas)
+
+        for i in range(n_valores):
+            valores[pendientes, i] = calculadas[i]
+        if tipo == "Polyline":
+            alertas[pendientes] = calculadas[-1]
+
+        if version is not None:
+            actualizar_cache(tipo, version, cache, claves[pendientes], valores[pendientes], alertas[pendientes])
+
+    medidas = [valores[:, i] for i in range(n_valores)]
+    if tipo == "Polyline":
+        alertas = np.asarray([a if a else None for a in alertas], dtype=object)
+        _reportar_alertas(datos["oid"], alertas)
+        medidas.append(alertas)
+    escribir_medidas(cobertura, campos, datos["oid"], medidas)
+
+
+def _alineacion_geoprocesos_paralela(cobertura, route, tolerancia, tipo, procesos):
+    """
+    Reparte la cobertura por ENGROUTEID en bloques balanceados, los alinea con
+    geoprocesos en un pool de procesos y escribe todas las medidas en una sola pasada.
+    """
+    datos = leer_cobertura(cobertura, tipo)
+    bloques = repartir_por_ruta(datos["ruta"], procesos)
+    arcpy.AddMessage(f"🔄 Alineando {len(datos['oid'])} registros en {len(bloques)} bloques ({datetime.datetime.now()})")
+
+    base = {"tipo": tipo, "tolerancia": tolerancia, "cobertura": cobertura, "route": route}
+    tareas = [dict(base, rutas=rutas_bloque) for rutas_bloque in bloques]
+    oids, medidas = _ejecutar_bloques(_alinear_bloque_geoprocesos, tareas, procesos, tipo)
+    if tipo == "Polyline":
+        _reportar_alertas(oids, medidas[-1])
+    escribir_medidas(cobertura, CAMPOS_MEDIDA[tipo], oids, medidas)
+
+
+def alineacion(cobertura, route, tolerancia, motor="vectorizado", procesos=1, usar_cache=True):
     """
     Alinea coberturas contra rutas y calcula medidas (ENGFROMM, ENGTOM, ENGM).
 
     Parámetros:
         cobertura (str): Ruta al feature class de cobertura.
         route (str): Ruta al feature class de rutas.
-        tolerancia (str): Tolerancia espacial para la alineación (ejemplo: "1 Meters").
+        tolerancia (str): Tolerancia espacial para la alineación en metros (ejemplo: 50 o "50 Meters").
+            Con coberturas geográficas (MAGNA-SIRGAS, EPSG:4686) el motor
+            vectorizado mide en el plano tangente local de cada ruta.
+        motor (str): "vectorizado" (motor NumPy en memoria) o "geoprocesos"
+            (LocateFeaturesAlongRoutes por ruta).
+        procesos (int): Número de procesos; con más de 1 las rutas se reparten
+            en bloques balanceados y se alinean en paralelo.
+        usar_cache (bool): Reutiliza las medidas de filas sin cambios desde la
+            ejecución anterior (solo motor vectorizado).
     """
     arcpy.env.overwriteOutput = True
-    desc = arcpy.Describe(cobertura)
-    nombre = desc.name
+    desc = describir(cobertura)
     tipo = desc.shapeType
-
-    # Obtener el OID de la cobertura
-    oid_field = arcpy.Describe(cobertura).OIDFieldName
-
-    # Paths temporales en scratch GDB
-    GDB = arcpy.env.scratchGDB
-    coberturasel = os.path.join(GDB, "COBERTURA")
-    coberturavertices = os.path.join(GDB, "VERTICES")
-    routesel = os.path.join(GDB, "ROUTE_SEL")
-    tablelocatemeasure = os.path.join(GDB, "TABLE_LOCATE_MEASURE")
+    geograficas = desc.spatialReference.type == "Geographic"
 
     # Campos de alineación
     campos_por_tipo = {
-        "Polyline": [("ENGFROMM", "DOUBLE"), ("ENGTOM", "DOUBLE")],
+        "Polyline": [("ENGFROMM", "DOUBLE"), ("ENGTOM", "DOUBLE"), ("ALERTA_ALINEACION", "TEXT")],
         "Point": [("ENGM", "DOUBLE")],
         "Multipoint": [("ENGM", "DOUBLE")]
     }
 
     # Crear campos si no existen
+    existentes = nombres_campos(cobertura)
     for campo, tipo_campo in campos_por_tipo.get(tipo, []):
-        if campo not in [f.name for f in arcpy.ListFields(cobertura)]:
+        if campo not in existentes:
             arcpy.AddField_management(cobertura, campo, tipo_campo)
             arcpy.CalculateField_management(cobertura, campo, "None", "PYTHON3")
+            invalidar(cobertura)
+
+    if motor == "vectorizado":
+        _alineacion_vectorizada(
+            cobertura, route, _tolerancia_numerica(tolerancia), tipo, geograficas, procesos, usar_cache
+        )
+        arcpy.AddMessage("✅ Alineación finalizada.")
+        return
 
-    # Copia inicial de cobertura
-    arcpy.Select_analysis(cobertura, coberturasel)
+    if procesos and procesos > 1:
+        _alineacion_geoprocesos_paralela(cobertura, route, _tolerancia_lineal(tolerancia), tipo, procesos)
+        arcpy.AddMessage("✅ Alineación finalizada.")
+        return
 
-    # Procesar por ENGROUTEID
+    # Rutas presentes en la cobertura
     with arcpy.da.SearchCursor(cobertura, ["ENGROUTEID"], sql_clause=(None, "GROUP BY ENGROUTEID")) as cursor:
-        for (rguid,) in cursor:
-            ahora = datetime.datetime.now()
-            arcpy.AddMessage(f"🔄 Alineando {rguid} ({ahora})")
-
-            where_clause = f"ENGROUTEID = '{rguid}'"
-
-            arcpy.Select_analysis(route, routesel, where_clause)
-            arcpy.Select_analysis(cobertura, coberturasel, where_clause)
-
-            arcpy.MakeFeatureLayer_management(cobertura, "COBERTURA_LAYER")
-
-            if tipo == "Polyline":
-                # Inicio
-                arcpy.FeatureVerticesToPoints_management(coberturasel, coberturavertices, "START")
-                arcpy.LocateFeaturesAlongRoutes_lr(
-                    coberturavertices, routesel, "ENGROUTEID", tolerancia,
-                    tablelocatemeasure, "ENGROUTEID POINT BEGIN_M"
-                )
-                arcpy.AddJoin_management("COBERTURA_LAYER", oid_field, tablelocatemeasure, "ID_ALINEAR", "KEEP_COMMON")
-                arcpy.CalculateField_management("COBERTURA_LAYER", f"{nombre}.ENGFROMM", "round(!TABLE_LOCATE_MEASURE.BEGIN_M!,3)", "PYTHON3")
-                arcpy.RemoveJoin_management("COBERTURA_LAYER", "TABLE_LOCATE_MEASURE")
-
-                # Fin
-                arcpy.FeatureVerticesToPoints_management(coberturasel, coberturavertices, "END")
-                arcpy.LocateFeaturesAlongRoutes_lr(
-                    coberturavertices, routesel, "ENGROUTEID", tolerancia,
-                    tablelocatemeasure, "ENGROUTEID POINT BEGIN_M"
-                )
-                arcpy.AddJoin_management("COBERTURA_LAYER", oid_field, tablelocatemeasure, "ID_ALINEAR", "KEEP_COMMON")
-                arcpy.CalculateField_management("COBERTURA_LAYER", f"{nombre}.ENGTOM", "round(!TABLE_LOCATE_MEASURE.BEGIN_M!,3)", "PYTHON3")
-                arcpy.RemoveJoin_management("COBERTURA_LAYER", "TABLE_LOCATE_MEASURE")
-
-            elif tipo in ("Point", "Multipoint"):
-                arcpy.LocateFeaturesAlongRoutes_lr(
-                    coberturasel, routesel, "ENGROUTEID", tolerancia,
-                    tablelocatemeasure, "ENGROUTEID POINT BEGIN_M"
-                )
-                arcpy.AddJoin_management("COBERTURA_LAYER", oid_field, tablelocatemeasure, "ID_ALINEAR", "KEEP_COMMON")
-                arcpy.CalculateField_management("COBERTURA_LAYER", f"{nombre}.ENGM", "round(!TABLE_LOCATE_MEASURE.BEGIN_M!,3)", "PYTHON3")
-                arcpy.RemoveJoin_management("COBERTURA_LAYER", "TABLE_LOCATE_MEASURE")
+        rutas = [rguid for (rguid,) in cursor]
+
+    # Localizar ruta por ruta acumulando las medidas por ID_ALINEAR (= OID de la cobertura)
+    medidas = _medidas_geoprocesos(cobertura, route, _tolerancia_lineal(tolerancia), tipo, rutas, arcpy.env.scratchGDB)
+    oids, columnas = _arreglos_geoprocesos(medidas, tipo)
+    if tipo == "Polyline":
+        _reportar_alertas(oids, columnas[-1])
+
+    # Una sola pasada de escritura, con el redondeo a 3 decimales
+    escribir_medidas(cobertura, CAMPOS_MEDIDA[tipo], oids, columnas)
 
     arcpy.AddMessage("✅ Alineación finalizada.")
 
 
+def reporte_alineacion(cobertura, route, tolerancia, salida, formato="parquet", xlsx=False):
+    """
+    Genera el reporte de calidad de una cobertura ya alineada.
+
+    La cobertura se lee en una sola pasada (coordenadas y medidas escritas) y
+    las distancias de ajuste se calculan en bloque con el índice del centerline.
+
+    Parámetros:
+        cobertura (str): Feature class de cobertura alineada.
+        route (str): Feature class de rutas.
+        tolerancia (str): Tolerancia usada en la alineación (metros).
+        salida (str): Prefijo de ruta de los archivos del reporte.
+        formato (str): "parquet" (CSV si no hay pyarrow) o "csv".
+        xlsx (bool): Genera además un XLSX en modo write-only (requiere openpyxl).
+
+    Retorna:
+        list[str]: Archivos generados.
+    """
+    desc = describir(cobertura)
+    tipo = desc.shapeType
+    geograficas = desc.spatialReference.type == "Geographic"
+    tolerancia = _tolerancia_numerica(tolerancia)
+
+    existentes = nombres_campos(cobertura)
+    campos = [c for c in CAMPOS_MEDIDA[tipo] if c in existentes]
+    datos = leer_cobertura(cobertura, tipo, campos)
+    indice = obtener_indice(route)
+
+    if tipo == "Polyline":
+        ids = np.concatenate([datos["ruta"], datos["ruta"]])
+        px = np.concatenate([datos["x_ini"], datos["x_fin"]])
+        py = np.concatenate([datos["y_ini"], datos["y_fin"]])
+    else:
+        ids, px, py = datos["ruta"], datos["x"], datos["y"]
+    _, distancias = alinear_puntos(ids, px, py, None, tolerancia, indice, geograficas)
+
+    campo_medida = "ENGFROMM" if tipo == "Polyline" else "ENGM"
+    filas = reporte.filas_reporte(
+        datos, tipo, {c: datos[c] for c in campos}, distancias,
+        posicion_rutas(indice, datos["ruta"]) >= 0
+    )
+    rutas = reporte.resumen_rutas(filas, campo_medida)
+
+    if formato == "parquet" and not reporte.PARQUET_DISPONIBLE:
+        arcpy.AddWarning("⚠️ pyarrow no está instalado: el reporte se escribe en CSV.")
+    if xlsx and not reporte.XLSX_DISPONIBLE:
+        arcpy.AddWarning("⚠️ openpyxl no está instalado: se omite el reporte XLSX.")
+    archivos = reporte.escribir_reporte(filas, rutas, salida, formato, xlsx)
+
+    nulas = filas["MOTIVO_NULO"].value_counts()
+    arcpy.AddMessage(
+        f"📊 Reporte de alineación: {int(filas['RUTA_ALINEADA'].notna().sum())}/{len(filas)} filas alineadas"
+        + "".join(f", {motivo}: {cuenta}" for motivo, cuenta in nulas.items())
+    )
+    for archivo in archivos:
+        arcpy.AddMessage(f"📄 {archivo}")
+    return archivos
+
+
 
 # def alineacion(cobertura, route, tolerancia):
 #     desc = arcpy.Describe(cobertura)
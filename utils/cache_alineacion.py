@@ -0,0 +1,140 @@
+# utils/cache_alineacion.py
+"""
+Caché de medidas de alineación entre ejecuciones.
+
+Cada fila se identifica con un hash de (ENGROUTEID, coordenadas, tolerancia,
+versión del centerline). Al volver a correr un libro con pocas filas
+corregidas solo se alinean las filas nuevas o modificadas; las demás reutilizan
+ENGM / ENGFROMM / ENGTOM guardados.
+
+Hay un archivo por tipo de geometría y versión del centerline. Se conservan
+las VERSIONES_CONSERVADAS usadas más recientemente de cada tipo (por ejemplo,
+al alternar entre el centerline de pruebas y el de producción); las demás se
+borran al guardar, de modo que las cachés viejas no se acumulan.
+"""
+import glob
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.indice_centerline import DIRECTORIO_CACHE
+
+# Versiones del centerline con caché conservada por tipo de geometría
+VERSIONES_CONSERVADAS = 3
+
+# Columnas de coordenadas que identifican cada fila según el tipo de geometría
+COLUMNAS_CLAVE = {
+    "Polyline": ["x_ini", "y_ini", "x_fin", "y_fin"],
+    "Point": ["x", "y", "z"],
+    "Multipoint": ["x", "y", "z"],
+}
+
+
+def claves_alineacion(datos, tipo, tolerancia, geograficas, version):
+    """
+    Hash de 64 bits por fila de (ENGROUTEID, coordenadas, tolerancia, versión).
+
+    Parámetros:
+        datos (dict): Arreglos leídos de la cobertura ("ruta" y coordenadas).
+        tipo (str): Tipo de geometría de la cobertura.
+        tolerancia (float): Tolerancia de alineación.
+        geograficas (bool): Si la tolerancia se aplicó en metros sobre grados.
+        version (str): Versión (clave) del centerline.
+
+    Retorna:
+        np.ndarray: Claves uint64 alineadas con las filas.
+    """
+    columnas = {"ruta": pd.Series(datos["ruta"], dtype=object).astype(str)}
+    for col in COLUMNAS_CLAVE[tipo]:
+        if col in datos:
+            columnas[col] = pd.Series(datos[col], dtype="float64")
+    filas = pd.util.hash_pandas_object(pd.DataFrame(columnas), index=False).to_numpy()
+
+    parametros = f"{tipo}|{float(tolerancia)!r}|{bool(geograficas)}|{version}"
+    semilla = int.from_bytes(hashlib.sha1(parametros.encode("utf-8")).digest()[:8], "little")
+    return filas ^ np.uint64(semilla)
+
+
+def ruta_cache(tipo, version):
+    """Archivo de caché para el tipo de geometría y la versión del centerline."""
+    sufijo = hashlib.sha1(str(version).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(DIRECTORIO_CACHE, f"alineacion_{tipo}_{sufijo}.npz")
+
+
+def abrir_cache(tipo, version):
+    """
+    Carga la caché guardada para la versión del centerline.
+
+    Retorna:
+        dict | None: Arreglos "claves" (ordenadas), "valores" y "alertas".
+    """
+    archivo = ruta_cache(tipo, version)
+    if not os.path.exists(archivo):
+        return None
+    # La fecha de modificación marca el último uso (ver _descartar_versiones_anteriores)
+    os.utime(archivo)
+    with np.load(archivo) as datos:
+        return {nombre: datos[nombre] for nombre in ("claves", "valores", "alertas")}
+
+
+def _descartar_versiones_anteriores(tipo, vigente, conservar=VERSIONES_CONSERVADAS):
+    """
+    Borra las cachés del tipo salvo el archivo vigente y las usadas más
+    recientemente, hasta `conservar` versiones en total.
+    """
+    vigente = os.path.normcase(vigente)
+    archivos = [
+        a for a in glob.glob(os.path.join(DIRECTORIO_CACHE, f"alineacion_{tipo}_{'?' * 16}.npz"))
+        if os.path.normcase(a) != vigente
+    ]
+    archivos.sort(key=os.path.getmtime, reverse=True)
+    for archivo in archivos[max(conservar - 1, 0):]:
+        try:
+            os.remove(archivo)
+        except FileNotFoundError:
+            pass
+
+
+def consultar_cache(cache, claves, n_valores):
+    """
+    Busca las claves en la caché.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray, np.ndarray): Máscara de aciertos, valores
+        (n, n_valores; NaN en los fallos) y alertas ("" en los fallos).
+    """
+    valores = np.full((claves.size, n_valores), np.nan)
+    alertas = np.full(claves.size, "", dtype=object)
+    if cache is None or cache["claves"].size == 0:
+        return np.zeros(claves.size, dtype=bool), valores, alertas
+
+    guardadas = cache["claves"]
+    pos = np.clip(np.searchsorted(guardadas, claves), 0, guardadas.size - 1)
+    aciertos = guardadas[pos] == claves
+    valores[aciertos] = cache["valores"][pos[aciertos]]
+    alertas[aciertos] = cache["alertas"][pos[aciertos]]
+    return aciertos, valores, alertas
+
+
+def actualizar_cache(tipo, version, cache, claves, valores, alertas):
+    """
+    Agrega (o reemplaza) las entradas calculadas, guarda la caché de la
+    versión y borra las de versiones del centerline usadas hace más tiempo
+    (ver VERSIONES_CONSERVADAS).
+    """
+    alertas = np.asarray(["" if a is None else str(a) for a in alertas], dtype=str)
+    if cache is not None and cache["claves"].size:
+        claves = np.concatenate([claves, cache["claves"]])
+        valores = np.concatenate([valores, cache["valores"]])
+        alertas = np.concatenate([alertas, cache["alertas"].astype(str)])
+
+    # np.unique conserva la primera aparición: las entradas nuevas ganan
+    claves, primera = np.unique(claves, return_index=True)
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    archivo = ruta_cache(tipo, version)
+    temporal = f"{archivo}.tmp{os.getpid()}.npz"
+    np.savez(temporal, claves=claves, valores=valores[primera], alertas=alertas[primera])
+    os.replace(temporal, archivo)
+    _descartar_versiones_anteriores(tipo, archivo)
@@ -1,13 +1,20 @@
 import arcpy
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
-from utils.espacializaciontematica import espacializacion
+from utils.espacializaciontematica import GDB_UPDM, cargar_en_sde, espacializacion
+from utils.identificadores import generar_guids
+from utils.escritura_tablas import columnas_constantes, escribir_df
+from utils.esquemas import ajustar_fechas, esquema_staging, obtener_esquema, preparar_tabla
+from utils.lectura_tablas import leer_tabla, leer_tabla_por_bloques, seleccionar_tabla
+from utils.metadatos import propiedades_conexion
 
 # Importar reglas por temática
-from utils.reglas.dcvg_reglas import aplicar_reglas_dcvg, reglas_dcvg_secundario
+from utils.reglas.motor_reglas import (
+    aplicar_plan, aplicar_plan_por_bloques, constantes_plan, contexto_reglas, plan_tabla
+)
 
 # -------------------------------------------------------------------
 # 🗂️ Geodatabase temporal de trabajo
@@ -15,125 +22,189 @@ from utils.reglas.dcvg_reglas import aplicar_reglas_dcvg, reglas_dcvg_secundario
 GDB_DESTINO = arcpy.env.scratchGDB
 print(f"⚙️  Geodatabase temporal establecida: {GDB_DESTINO}")
 
-def detectar_tipo_dato_arcgis(tipo_pandas):
+def cargar_df_a_tabla(df, gdb_destino, nombre_tabla, backend="arcpy", tipos_campo=None, esquema=None, crear=True,
+                      constantes=None):
     """
-    Convierte tipos de pandas a tipos de campo ArcGIS.
+    Crea una tabla en la geodatabase y carga los datos del DataFrame
+    en lotes de tuplas (ver utils.escritura_tablas).
+
+    Con `esquema` (ver utils.esquemas) los campos toman el tipo y la longitud
+    de la tabla destino, y la tabla se reutiliza vaciándola si no cambió.
+    Con `crear=False` las filas se agregan a la tabla ya creada (cargue por bloques).
+    `constantes` son campos con un mismo valor escalar para todas las filas.
     """
-    if pd.api.types.is_integer_dtype(tipo_pandas):
-        return "LONG"
-    elif pd.api.types.is_float_dtype(tipo_pandas):
-        return "DOUBLE"
-    elif pd.api.types.is_bool_dtype(tipo_pandas):
-        return "SHORT"
-    elif pd.api.types.is_datetime64_any_dtype(tipo_pandas):
-        return "DATE"
-    elif pd.api.types.is_object_dtype(tipo_pandas):
-        return "TEXT"
+    tabla_destino = os.path.join(gdb_destino, nombre_tabla)
+    campos = esquema_staging(esquema, columnas_constantes(df, constantes), tipos_campo) if esquema else None
+    if campos:
+        # Fechas que llegan como texto (fecha de cargue) → datetime, según el esquema
+        df, constantes = ajustar_fechas(df, constantes, campos)
+    if not crear:
+        escribir_df(df, tabla_destino, backend=backend, crear=False, constantes=constantes)
+        return
+    if campos and backend == "arcpy":
+        preparar_tabla(tabla_destino, campos)
+        escribir_df(df, tabla_destino, backend=backend, crear=False, constantes=constantes)
     else:
-        # Fallback: por seguridad, usar texto
-        return "TEXT"
+        escribir_df(df, tabla_destino, backend=backend, tipos_campo=tipos_campo, constantes=constantes)
+    print(f"✅ Tabla '{nombre_tabla}' creada y cargada correctamente.")
 
+# Valores por cláusula IN al consultar la tabla principal
+TAMANO_LOTE_IN = 500
 
-def cargar_df_a_tabla(df, gdb_destino, nombre_tabla):
-    """
-    Crea una tabla en la geodatabase y carga los datos del DataFrame.
+
+def _literal_sql(valor):
+    """Literal de texto SQL con las comillas simples escapadas."""
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def filtro_padres(cobdestino, inspection_type, fecha_cargue, rutas, gdb=GDB_UPDM):
     """
-    import arcpy
+    Cláusulas WHERE para leer solo los registros de la tabla principal del
+    lote actual: tipo de inspección, fecha de cargue (rango del día) y los
+    ENGROUTEID del lote, en grupos de TAMANO_LOTE_IN valores.
 
-    tabla_destino = os.path.join(gdb_destino, nombre_tabla)
+    `gdb` es la geodatabase (workspace) de `cobdestino`; define la sintaxis de
+    las fechas.
 
-    # ---------------------------------------------------------
-    # 🧹 Si existe la tabla, eliminarla (para sobreescritura)
-    # ---------------------------------------------------------
-    if arcpy.Exists(tabla_destino):
-        print(f"Sobreescribiendo la tabla existente: {tabla_destino}")
-        arcpy.Delete_management(tabla_destino)
-
-    # ---------------------------------------------------------
-    # 🏗️ Crear tabla vacía
-    # ---------------------------------------------------------
-    print(f"Creando la tabla '{nombre_tabla}' en {gdb_destino}...")
-    arcpy.CreateTable_management(gdb_destino, nombre_tabla)
-
-    # ---------------------------------------------------------
-    # 🧩 Crear campos según tipos detectados
-    # ---------------------------------------------------------
-    print("Agregando campos a la tabla...")
-    print("📊 Tipos de datos detectados en df:")
-    print(df.dtypes)
-
-    for col, tipo in df.dtypes.items():
-        # 🔒 Saltar campos reservados de ArcGIS
-        if col.upper() in ["OBJECTID", "SHAPE", "SHAPE_LENGTH", "SHAPE_AREA"]:
-            continue
-
-        tipo_dato = detectar_tipo_dato_arcgis(tipo)
-        try:
-            arcpy.AddField_management(tabla_destino, col, tipo_dato)
-        except Exception as e:
-            print(f"⚠️ Error al agregar el campo {col}: {e}")
-
-    # ---------------------------------------------------------
-    # 💾 Insertar filas del DataFrame en la tabla
-    # ---------------------------------------------------------
-    campos_insertar = [c for c in df.columns if c.upper() not in ["OBJECTID", "SHAPE", "SHAPE_LENGTH", "SHAPE_AREA"]]
-    print(f"📥 Insertando {len(df)} registros en {nombre_tabla}...")
-
-    with arcpy.da.InsertCursor(tabla_destino, campos_insertar) as cursor:
-        for _, row in df[campos_insertar].iterrows():
-            cursor.insertRow(row)
+    Retorna:
+        list[str]: Una cláusula por grupo de ENGROUTEID.
+    """
+    campo_tipo = arcpy.AddFieldDelimiters(cobdestino, "INSPECTIONTYPE")
+    campo_fecha = arcpy.AddFieldDelimiters(cobdestino, "CREATIONDATE")
+    campo_ruta = arcpy.AddFieldDelimiters(cobdestino, "ENGROUTEID")
+
+    # File geodatabase exige el prefijo date; las enterprise comparan con el texto
+    dia = datetime.strptime(fecha_cargue, "%Y-%m-%d")
+    siguiente = dia + timedelta(days=1)
+    prefijo = "date " if propiedades_conexion(gdb)["tipo"] == "LocalDatabase" else ""
+    comunes = (
+        f"UPPER({campo_tipo}) = {_literal_sql(inspection_type.strip().upper())} "
+        f"AND {campo_fecha} >= {prefijo}'{dia:%Y-%m-%d %H:%M:%S}' "
+        f"AND {campo_fecha} < {prefijo}'{siguiente:%Y-%m-%d %H:%M:%S}'"
+    )
+
+    rutas = sorted(set(rutas))
+    return [
+        f"{comunes} AND {campo_ruta} IN ({', '.join(_literal_sql(r) for r in rutas[i:i + TAMANO_LOTE_IN])})"
+        for i in range(0, len(rutas), TAMANO_LOTE_IN)
+    ]
+
+
+def indice_llaves(df, llaves):
+    """
+    MultiIndex de las columnas `llaves` como texto. Cada columna se codifica
+    como categórica, de modo que el texto se arma una vez por valor distinto
+    y el emparejamiento compara códigos enteros.
+    """
+    niveles = []
+    for columna in llaves:
+        categorica = df[columna].astype("category")
+        niveles.append(categorica.cat.rename_categories(categorica.cat.categories.astype(str)))
+    return pd.MultiIndex.from_arrays(niveles)
 
-    print(f"✅ Tabla '{nombre_tabla}' creada y cargada correctamente.")
 
 def asignar_globalid(df_secundario, cobdestino, inspection_type_json, fecha_cargue=None):
     """
     Asigna el GLOBALID desde el feature class principal a la tabla secundaria
     usando ENGROUTEID, CONTRACTNUMBER y la fecha de cargue.
+
+    Se usa cuando el registro principal ya existe en la base de datos (cargues
+    anteriores): solo se completan las filas sin INSPECTIONRANGE_GlobalID; las
+    del cargue actual se relacionan en memoria (ver asignar_globalid_principal).
+
+    El filtro (tipo, fecha y ENGROUTEID del lote) se resuelve en la base de
+    datos y las llaves leídas se indexan por hash, de modo que el costo depende
+    del tamaño del lote y no del histórico de la tabla principal.
     """
     if fecha_cargue is None:
         fecha_cargue = datetime.now().strftime("%Y-%m-%d")
 
-    fields = ["GLOBALID", "ENGROUTEID", "CONTRACTNUMBER", "CREATIONDATE", "INSPECTIONTYPE"]
+    if "INSPECTIONRANGE_GlobalID" not in df_secundario.columns:
+        df_secundario["INSPECTIONRANGE_GlobalID"] = None
+    pendientes = df_secundario["INSPECTIONRANGE_GlobalID"].isna().to_numpy()
+    if not pendientes.any():
+        return df_secundario
+
+    fields = ["GLOBALID", "ENGROUTEID", "CONTRACTNUMBER"]
+    llaves = ["ENGROUTEID", "CONTRACTNUMBER"]
+    if not all(c in df_secundario.columns for c in llaves):
+        print(f"⚠️ Llaves {llaves} no disponibles para buscar registros principales anteriores.")
+        return df_secundario
 
     print(f"📄 Asignando INSPECTIONRANGE_GlobalID desde {os.path.basename(cobdestino)}...")
 
-    try:
-        data_fc = [row for row in arcpy.da.SearchCursor(cobdestino, fields)]
-        df_fc = pd.DataFrame(data_fc, columns=fields)
+    # Índice hash (ENGROUTEID, CONTRACTNUMBER) → GLOBALID; ante duplicados gana el más reciente
+    globalids = {}
+    sin_padre = df_secundario.loc[pendientes, llaves]
+    rutas = sin_padre["ENGROUTEID"].dropna().unique()
+    for where in filtro_padres(cobdestino, inspection_type_json, fecha_cargue, rutas):
+        with arcpy.da.SearchCursor(cobdestino, fields, where, sql_clause=(None, "ORDER BY CREATIONDATE DESC")) as cursor:
+            for globalid, rguid, contrato in cursor:
+                globalids.setdefault((str(rguid), str(contrato)), globalid)
+
+    if globalids:
+        indice = pd.MultiIndex.from_tuples(list(globalids))
+        posiciones = indice.get_indexer(indice_llaves(sin_padre, llaves))
+        valores = np.asarray(list(globalids.values()) + [None], dtype=object)
+        df_secundario.loc[pendientes, "INSPECTIONRANGE_GlobalID"] = valores[posiciones]
+
+    missing = df_secundario["INSPECTIONRANGE_GlobalID"].isna().sum()
+    print(f"✅ INSPECTIONRANGE_GlobalID asignado ({len(globalids)} registros principales de cargues anteriores). "
+          f"Registros sin asignar: {missing}")
+    return df_secundario
 
-        df_fc = df_fc[
-            (df_fc["INSPECTIONTYPE"].str.upper() == inspection_type_json.strip().upper()) &
-            (df_fc["CREATIONDATE"].dt.strftime("%Y-%m-%d") == fecha_cargue)
-        ][["GLOBALID", "ENGROUTEID", "CONTRACTNUMBER"]]
 
-        df_fc = df_fc.rename(columns={"GLOBALID": "INSPECTIONRANGE_GlobalID"})
+def asignar_globalid_principal(df_secundario, df_principal, llaves):
+    """
+    Asigna INSPECTIONRANGE_GlobalID desde el GLOBALID generado en el cliente
+    para la tabla principal, emparejando por las llaves de agrupación de las
+    reglas (por ejemplo ENGROUTEID, CONTRACTNUMBER). No consulta la base de datos.
+    """
+    if not llaves or not all(c in df_principal.columns and c in df_secundario.columns for c in llaves):
+        print(f"⚠️ Llaves {llaves} no disponibles para relacionar la tabla secundaria.")
+        df_secundario["INSPECTIONRANGE_GlobalID"] = None
+        return df_secundario
 
-        for col in ["ENGROUTEID", "CONTRACTNUMBER"]:
-            df_fc[col] = df_fc[col].astype(str)
-            df_secundario[col] = df_secundario[col].astype(str)
+    posiciones = indice_llaves(df_principal, llaves).get_indexer(indice_llaves(df_secundario, llaves))
+    valores = np.append(df_principal["GLOBALID"].to_numpy(dtype=object), None)
+    df_secundario["INSPECTIONRANGE_GlobalID"] = valores[posiciones]
 
-        df_secundario = df_secundario.merge(df_fc, on=["ENGROUTEID", "CONTRACTNUMBER"], how="left")
+    missing = df_secundario["INSPECTIONRANGE_GlobalID"].isna().sum()
+    print(f"✅ INSPECTIONRANGE_GlobalID asignado en memoria. Registros sin asignar: {missing}")
+    return df_secundario
 
-        missing = df_secundario["INSPECTIONRANGE_GlobalID"].isna().sum()
-        print(f"✅ INSPECTIONRANGE_GlobalID asignado. Registros sin asignar: {missing}")
 
-    except Exception as e:
-        print(f"❌ Error al asignar GLOBALID: {e}")
+def tablas_mapeo(mapeo_tematica):
+    """
+    Tablas de salida definidas en el mapeo.
 
-    return df_secundario
+    Retorna:
+        list[dict]: Definición ({"nombre", "campos"}) de cada tabla. En las
+        temáticas complejas, toda clave "tabla_*" (principal, secundaria y
+        demás tablas hijas).
+    """
+    if mapeo_tematica.get("tipo", "sencillo") != "complejo":
+        return [{"nombre": mapeo_tematica.get("tabla", ""), "campos": mapeo_tematica.get("campos", {})}]
+    return [
+        definicion for clave, definicion in mapeo_tematica.items()
+        if clave.startswith("tabla_") and isinstance(definicion, dict)
+    ]
 
 
-# Diccionario para seleccionar la función de reglas según temática
-REGLAS_TEMATICA = {
-    "dcvg": aplicar_reglas_dcvg
-    # "otra_tematica": aplicar_reglas_otra,
-}
+def campos_lectura(mapeo_tematica, campos_reglas=()):
+    """Campos de origen de todas las tablas del mapeo más las entradas de reglas, sin repetir."""
+    campos = [c for tabla in tablas_mapeo(mapeo_tematica) for c in tabla.get("campos", {})]
+    return list(dict.fromkeys(campos + list(campos_reglas)))
 
 
-def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino):
+def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino, tamano_bloque=None):
     """
     Carga información desde un feature class a la tabla destino
     aplicando las reglas específicas según la temática.
+
+    Con `tamano_bloque` las lecturas se procesan por bloques de ese número de
+    filas (lectura → renombre → reglas → GLOBALID → inserción): en memoria
+    solo queda completa la tabla principal agregada.
     """
 
     print("🔎 Iniciando cargue a BD...")
@@ -146,6 +217,10 @@ def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino):
 
     tipo_tematica = mapeo_tematica.get("tipo", "sencillo")
 
+    CONEXION = propiedades_conexion(GDB_UPDM)
+    NOMBRE_DB = CONEXION["prefijo"]
+    CURRENT_USER = CONEXION["usuario"]
+
     # ================================================================
     # 1️⃣ PROCESO TABLA PRINCIPAL
     # ================================================================
@@ -154,43 +229,63 @@ def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino):
         nombre_tabla = tabla_principal.get("nombre", "")
         campos = tabla_principal.get("campos", {})
     else:
+        tabla_principal = mapeo_tematica
         nombre_tabla = mapeo_tematica.get("tabla", "")
         campos = mapeo_tematica.get("campos", {})
 
-    # Cargar Feature Class en DataFrame
+    # Reglas declaradas en el mapeo (motor de reglas); sin "reglas" las filas se cargan tal cual
+    plan = plan_tabla(tabla_principal)
+    campos_reglas, llaves = (plan["entradas"], plan["agrupacion"]) if plan else ([], [])
+    contexto = contexto_reglas(mapeo_tematica, CURRENT_USER)
+
+    # Las llaves (ENGROUTEID, contrato) se repiten en cada lectura: se leen como categóricas
+    categorias = [
+        origen for tabla in tablas_mapeo(mapeo_tematica)
+        for origen, destino in tabla.get("campos", {}).items() if destino in llaves
+    ]
     try:
-        campos_fc = [f.name for f in arcpy.ListFields(fc)]
-        data = [row for row in arcpy.da.SearchCursor(fc, campos_fc)]
-        df = pd.DataFrame(data, columns=campos_fc)
-        print(f"📊 Total de registros en el feature class: {len(df)}")
+        if tamano_bloque:
+            # Por bloques: con plan, cada bloque se agrega por su cuenta y solo quedan los parciales
+            df_base = None
+            bloques = (
+                seleccionar_tabla(b, campos, campos_reglas)
+                for b in leer_tabla_por_bloques(fc, campos_lectura({"campos": campos}, campos_reglas), tamano_bloque, categorias)
+            )
+            if plan:
+                df = aplicar_plan_por_bloques(bloques, plan, contexto)
+            else:
+                df = pd.concat(list(bloques), ignore_index=True)
+            print(f"📊 Registros para la tabla principal: {len(df)} (bloques de {tamano_bloque})")
+        else:
+            # Lectura única del feature class: campos de todas las tablas del mapeo y de las reglas
+            df_base = leer_tabla(fc, campos_lectura(mapeo_tematica, campos_reglas), categorias=categorias)
+            print(f"📊 Total de registros en el feature class: {len(df_base)}")
+            # Columnas de la tabla principal renombradas según mapeo
+            df = seleccionar_tabla(df_base, campos, campos_reglas)
     except Exception as e:
         arcpy.AddError(f"Error al cargar el feature class en DataFrame: {e}")
         return
 
-    # Renombrar columnas según mapeo
-    df.rename(columns=campos, inplace=True)
-
     # Aplicar reglas según temática
-    funcion_reglas = REGLAS_TEMATICA.get(tematica)
-    if funcion_reglas:
-        df = funcion_reglas(df)
+    if plan:
+        if not tamano_bloque:
+            df = aplicar_plan(df, plan, contexto)
     else:
-        print(f"⚠️ No se encontró función de reglas para la temática '{tematica}'")
+        print(f"⚠️ El mapeo de la temática '{tematica}' no define reglas")
+
+    # GLOBALID y EVENTID generados en el cliente: la tabla secundaria se relaciona en memoria
+    df["GLOBALID"] = generar_guids(len(df))
+    df["EVENTID"] = generar_guids(len(df))
 
-    # Cargar DataFrame a la tabla de destino
-    cargar_df_a_tabla(df, gdb_destino, nombre_tabla)
+    # Cargar DataFrame a la tabla de destino con el esquema registrado de la tabla UPDM
+    nombre_tabla_fc = 'P_InspectionRange_1'
+    cobdestino = os.path.join(GDB_UPDM, f"{NOMBRE_DB}P_Integrity", nombre_tabla_fc)
+    esquema = obtener_esquema(nombre_tabla_fc, cobdestino, tabla_principal)
+    cargar_df_a_tabla(df, gdb_destino, nombre_tabla, tipos_campo={"GLOBALID": "GUID"}, esquema=esquema)
 
     # ================================================================
     # 2️⃣ ESPACIALIZACIÓN DE TABLA PRINCIPAL
     # ================================================================
-    GDB_UPDM = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\sde\TGI_UPDM.sde"
-    DESC = arcpy.Describe(GDB_UPDM)
-    CP = DESC.connectionProperties
-    TIPO_DB = DESC.workspaceType
-    NOMBRE_DB = CP.database + ".DBO." if TIPO_DB == "RemoteDatabase" else ""
-    CURRENT_USER = CP.user
-
-    nombre_tabla_fc = 'P_InspectionRange_1'
     ft = os.path.join(gdb_destino, nombre_tabla_fc)
     campo_engrid = 'ENGROUTEID'
     out_fc = os.path.join(gdb_destino, f"{nombre_tabla_fc}_Espacializada")
@@ -198,9 +293,12 @@ def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino):
     campo_routeid = 'ENGROUTEID'
     tipo_dato = 'Linea Abscisado'
     sr = 'GEOGCS["GCS_MAGNA",DATUM["D_MAGNA",SPHEROID["GRS_1980",6378137.0,298.257222101]],PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]];-400 -400 1000000000;-100000 10000;-100000 1000;8.98315284119521E-09;0.001;0.002;IsHighPrecision'
-    cobdestino = os.path.join(GDB_UPDM, f"{NOMBRE_DB}P_Integrity", nombre_tabla_fc)
 
-    espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino)
+    # Las tablas se cargan juntas al final, en una sola sesión de edición
+    cargas = [(espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino, cargar=False), cobdestino)]
+    # Los GLOBALID de la principal se verifican después del Append (la secundaria los referencia)
+    globalids = {cobdestino: df["GLOBALID"].to_numpy()}
+    cobdestino_principal = cobdestino
 
     # ================================================================
     # 3️⃣ PROCESO TABLA SECUNDARIA (si existe en el JSON)
@@ -212,56 +310,62 @@ def cargue_bd(fc, tematica, mapeo_tematica, gdb_destino):
         nombre_tabla_sec = tabla_secundaria.get("nombre", "")
         campos_sec = tabla_secundaria.get("campos", {})
 
-        # Cargar nuevamente el feature class (puede ajustarse a otra fuente)
-        try:
-            campos_fc_sec = [f.name for f in arcpy.ListFields(fc)]
-            data_sec = [row for row in arcpy.da.SearchCursor(fc, campos_fc_sec)]
-            df_secundario = pd.DataFrame(data_sec, columns=campos_fc_sec)
-            print(f"📊 Total de registros para tabla secundaria: {len(df_secundario)}")
-        except Exception as e:
-            arcpy.AddError(f"Error al cargar el feature class secundario: {e}")
-            return
-
-        # Renombrar columnas según mapeo
-        df_secundario.rename(columns=campos_sec, inplace=True)
+        nombre_tabla_fc = 'P_DASurveyReadings_1'
+        cobdestino = os.path.join(GDB_UPDM, f"{NOMBRE_DB}P_Integrity", nombre_tabla_fc)
+        esquema_sec = obtener_esquema(nombre_tabla_fc, cobdestino, tabla_secundaria)
+
+        # 🔸 Campos de auditoría de la tabla secundaria: escalares hasta la escritura
+        plan_sec = plan_tabla(tabla_secundaria)
+        constantes = constantes_plan(plan_sec, contexto) if plan_sec else {}
+
+        # Columnas de la tabla secundaria tomadas de la misma lectura (o bloque a bloque) y renombradas según mapeo
+        if tamano_bloque:
+            bloques = leer_tabla_por_bloques(fc, campos_lectura({"campos": campos_sec}), tamano_bloque, categorias)
+        else:
+            bloques = [df_base]
+
+        total_secundario = 0
+        for i, bloque in enumerate(bloques):
+            df_secundario = seleccionar_tabla(bloque, campos_sec)
+
+            # Asignar GLOBALID desde la tabla principal (en memoria, por las llaves de agrupación)
+            df_secundario = asignar_globalid_principal(df_secundario, df, llaves)
+            # Filas cuyo registro principal se cargó en un cargue anterior: se buscan en la base de datos
+            df_secundario = asignar_globalid(
+                df_secundario, cobdestino_principal, mapeo_tematica.get("inspection_type", "DCVG"),
+                contexto["fecha_cargue"][:10]
+            )
+            df_secundario["GLOBALID"] = generar_guids(len(df_secundario))
+            df_secundario["EVENTID"] = generar_guids(len(df_secundario))
+
+            # Cargar la tabla secundaria en la GDB con el esquema registrado de la tabla UPDM
+            cargar_df_a_tabla(
+                df_secundario, gdb_destino, nombre_tabla_sec,
+                tipos_campo={"GLOBALID": "GUID", "INSPECTIONRANGE_GlobalID": "GUID"},
+                esquema=esquema_sec, crear=i == 0, constantes=constantes
+            )
+            total_secundario += len(df_secundario)
+
+        print(f"📊 Total de registros para tabla secundaria: {total_secundario}")
 
-        # 🔸 Aplicar reglas específicas de DCVG secundario
-        df_secundario = reglas_dcvg_secundario(df_secundario, CURRENT_USER, mapeo_tematica)
-
-        # Asignar GLOBALID desde tabla principal
-        inspection_type_json = mapeo_tematica.get("inspection_type", "DCVG")
-        df_secundario = asignar_globalid(df_secundario, cobdestino, inspection_type_json)
+        print(f"✅ Tabla secundaria '{nombre_tabla_sec}' cargada correctamente con referencia al GLOBALID.")
 
-        # Cargar la tabla secundaria en la GDB
-        cargar_df_a_tabla(df_secundario, gdb_destino, nombre_tabla_sec)
+        # ================================================================
+        # ESPACIALIZACIÓN DE TABLA SECUNDARIA
+        # ================================================================
+        ft = os.path.join(gdb_destino, nombre_tabla_fc)
+        out_fc = os.path.join(gdb_destino, f"{nombre_tabla_fc}_Espacializada")
+        tipo_dato = 'Coordenadas XYZ'
 
-        print(f"✅ Tabla secundaria '{nombre_tabla_sec}' cargada correctamente con referencia al GLOBALID.")
+        cargas.append((espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino, cargar=False), cobdestino))
 
     else:
         print("ℹ️ No se definió tabla secundaria en el JSON. Proceso finalizado.")
 
     # ================================================================
-    # ESPACIALIZACIÓN DE TABLA SECUNDARIA
+    # 4️⃣ CARGUE A SDE: principal y secundaria en una sola sesión de edición
     # ================================================================
-    GDB_UPDM = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\sde\TGI_UPDM.sde"
-    DESC = arcpy.Describe(GDB_UPDM)
-    CP = DESC.connectionProperties
-    TIPO_DB = DESC.workspaceType
-    NOMBRE_DB = CP.database + ".DBO." if TIPO_DB == "RemoteDatabase" else ""
-    CURRENT_USER = CP.user
-
-    nombre_tabla_fc = 'P_DASurveyReadings_1'
-    ft = os.path.join(gdb_destino, nombre_tabla_fc)
-    campo_engrid = 'ENGROUTEID'
-    out_fc = os.path.join(gdb_destino, f"{nombre_tabla_fc}_Espacializada")
-    centerline = os.path.join(gdb_destino, "P_centerline")
-    campo_routeid = 'ENGROUTEID'
-    tipo_dato = 'Coordenadas XYZ'
-    sr = 'GEOGCS["GCS_MAGNA",DATUM["D_MAGNA",SPHEROID["GRS_1980",6378137.0,298.257222101]],PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]];-400 -400 1000000000;-100000 10000;-100000 1000;8.98315284119521E-09;0.001;0.002;IsHighPrecision'
-    cobdestino = os.path.join(GDB_UPDM, f"{NOMBRE_DB}P_Integrity", nombre_tabla_fc)
-
-    espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino)
-
+    cargar_en_sde(GDB_UPDM, cargas, preservar_globalids=True, globalids=globalids)
 
     print("🏁 Cargue completo.")
 
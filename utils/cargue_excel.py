@@ -1,6 +1,8 @@
 import arcpy
 import os
 
+from utils.metadatos import invalidar, nombres_campos
+
 def cargar_excel_a_gdb(ruta_excel, nombre_hoja, outLocation, cobertura_fc, inputGeom):
     """
     Carga un Excel como tabla en la GDB y lo convierte en feature class (puntos o líneas).
@@ -25,6 +27,8 @@ def cargar_excel_a_gdb(ruta_excel, nombre_hoja, outLocation, cobertura_fc, input
     if arcpy.Exists(cobertura_fc):
         arcpy.Delete_management(cobertura_fc)
         print(f"🧹 Cobertura previa borrada: {cobertura_fc}")
+    invalidar(outTable)
+    invalidar(cobertura_fc)
 
     # 2. Excel → Tabla GDB
     print("📥 Convirtiendo Excel a tabla GDB...")
@@ -32,8 +36,9 @@ def cargar_excel_a_gdb(ruta_excel, nombre_hoja, outLocation, cobertura_fc, input
     print("✅ Tabla creada correctamente.")
 
     # 3. Campo ID_ALINEAR (si no existe, crear; siempre recalcular)
-    if "ID_ALINEAR" not in [f.name for f in arcpy.ListFields(outTable)]:
+    if "ID_ALINEAR" not in nombres_campos(outTable):
         arcpy.AddField_management(outTable, "ID_ALINEAR", "LONG")
+        invalidar(outTable)
         print("🆕 Campo ID_ALINEAR creado.")
     arcpy.CalculateField_management(outTable, "ID_ALINEAR", "!OBJECTID!", "PYTHON3")
     print("🔢 Campo ID_ALINEAR calculado.")
@@ -0,0 +1,223 @@
+# utils/escritura_tablas.py
+"""
+Escritura masiva de DataFrames en tablas.
+
+Los valores se preparan por columna en un solo paso vectorizado (NaN / NaT /
+None → NULL, fechas → datetime, enteros y flotantes → tipos de Python) y se
+entregan al destino en lotes de tuplas planas, sin construir una Series por fila.
+Las columnas constantes (auditoría, tipo de inspección, ...) se pasan como
+escalares y solo se repiten al armar cada tupla.
+
+El destino se elige con un backend:
+    "arcpy"   tabla de geodatabase (arcpy.da.InsertCursor)
+    "sqlite"  archivo SQLite / GeoPackage, para pruebas locales sin ArcGIS
+"""
+import os
+import sqlite3
+from itertools import islice, repeat
+
+import numpy as np
+import pandas as pd
+
+from utils.metadatos import invalidar
+
+# Filas por lote de tuplas
+TAMANO_LOTE = 50_000
+
+# Campos reservados de ArcGIS que no se crean ni se insertan
+CAMPOS_RESERVADOS = ["OBJECTID", "SHAPE", "SHAPE_LENGTH", "SHAPE_AREA"]
+
+# Tipo de campo ArcGIS → tipo de columna SQLite
+TIPOS_SQLITE = {"LONG": "INTEGER", "SHORT": "INTEGER", "DOUBLE": "REAL", "DATE": "TEXT", "TEXT": "TEXT", "GUID": "TEXT"}
+
+
+def detectar_tipo_dato_arcgis(tipo_pandas):
+    """
+    Convierte tipos de pandas a tipos de campo ArcGIS.
+    """
+    if pd.api.types.is_integer_dtype(tipo_pandas):
+        return "LONG"
+    elif pd.api.types.is_float_dtype(tipo_pandas):
+        return "DOUBLE"
+    elif pd.api.types.is_bool_dtype(tipo_pandas):
+        return "SHORT"
+    elif pd.api.types.is_datetime64_any_dtype(tipo_pandas):
+        return "DATE"
+    elif pd.api.types.is_object_dtype(tipo_pandas):
+        return "TEXT"
+    else:
+        # Fallback: por seguridad, usar texto
+        return "TEXT"
+
+
+def campos_insertables(df):
+    """Columnas del DataFrame que se escriben (sin campos reservados)."""
+    return [c for c in df.columns if c.upper() not in CAMPOS_RESERVADOS]
+
+
+# -------------------------------------------------------------------
+# 🧮 Preparación vectorizada
+# -------------------------------------------------------------------
+def columna_para_escritura(serie, fechas_iso=False):
+    """
+    Valores de una columna listos para el cursor: arreglo object con tipos de
+    Python y None en los nulos (NaN, NaT, None, pd.NA).
+
+    Parámetros:
+        serie (pd.Series): Columna del DataFrame.
+        fechas_iso (bool): Entrega las fechas como texto ISO 8601 (SQLite).
+    """
+    nulos = serie.isna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        if fechas_iso:
+            valores = serie.dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy(dtype=object)
+        else:
+            valores = np.asarray(serie.dt.to_pydatetime(), dtype=object)
+    else:
+        valores = serie.to_numpy(dtype=object)
+
+    if nulos.any():
+        valores = valores.copy()
+        valores[nulos] = None
+    return valores
+
+
+def lotes_de_tuplas(df, campos, tamano_lote=TAMANO_LOTE, fechas_iso=False, constantes=None):
+    """
+    Genera lotes de tuplas planas a partir de las columnas preparadas.
+
+    Parámetros:
+        constantes (dict): Valor escalar por campo; va al final de cada tupla,
+            después de `campos`, sin materializar la columna.
+
+    Retorna:
+        generator[list[tuple]]: Un lote de hasta `tamano_lote` filas por iteración.
+    """
+    columnas = [columna_para_escritura(df[c], fechas_iso) for c in campos]
+    fijos = list((constantes or {}).values())
+    for inicio in range(0, len(df), tamano_lote):
+        # islice limita el zip aunque solo haya constantes (repeat no termina)
+        n = min(tamano_lote, len(df) - inicio)
+        yield list(islice(zip(*(col[inicio:inicio + n] for col in columnas), *(repeat(v) for v in fijos)), n))
+
+
+# -------------------------------------------------------------------
+# 🔌 Backends
+# -------------------------------------------------------------------
+def _crear_tabla_arcpy(tabla_destino, df, tipos_campo):
+    import arcpy
+
+    gdb_destino, nombre_tabla = os.path.split(tabla_destino)
+    if arcpy.Exists(tabla_destino):
+        print(f"Sobreescribiendo la tabla existente: {tabla_destino}")
+        arcpy.Delete_management(tabla_destino)
+        invalidar(tabla_destino)
+
+    print(f"Creando la tabla '{nombre_tabla}' en {gdb_destino}...")
+    arcpy.CreateTable_management(gdb_destino, nombre_tabla)
+
+    print("Agregando campos a la tabla...")
+    print("📊 Tipos de datos detectados en df:")
+    print(df.dtypes)
+    for col in campos_insertables(df):
+        tipo_dato = tipos_campo.get(col) or detectar_tipo_dato_arcgis(df[col].dtype)
+        try:
+            arcpy.AddField_management(tabla_destino, col, tipo_dato)
+        except Exception as e:
+            print(f"⚠️ Error al agregar el campo {col}: {e}")
+    invalidar(tabla_destino)
+
+
+def _insertar_arcpy(tabla_destino, df, campos, tamano_lote, constantes):
+    import arcpy
+
+    with arcpy.da.InsertCursor(tabla_destino, campos + list(constantes)) as cursor:
+        for lote in lotes_de_tuplas(df, campos, tamano_lote, constantes=constantes):
+            for fila in lote:
+                cursor.insertRow(fila)
+
+
+def _conexion_sqlite(tabla_destino):
+    """Conexión al archivo SQLite / GeoPackage de `tabla_destino` (<archivo>/<tabla>)."""
+    archivo, nombre_tabla = os.path.split(tabla_destino)
+    return sqlite3.connect(archivo), nombre_tabla
+
+
+def _crear_tabla_sqlite(tabla_destino, df, tipos_campo):
+    conexion, nombre_tabla = _conexion_sqlite(tabla_destino)
+    with conexion:
+        conexion.execute(f'DROP TABLE IF EXISTS "{nombre_tabla}"')
+        columnas = ", ".join(
+            f'"{col}" {TIPOS_SQLITE[tipos_campo.get(col) or detectar_tipo_dato_arcgis(df[col].dtype)]}'
+            for col in campos_insertables(df)
+        )
+        conexion.execute(f'CREATE TABLE "{nombre_tabla}" (OBJECTID INTEGER PRIMARY KEY AUTOINCREMENT, {columnas})')
+
+        # GeoPackage: registrar la tabla como tabla de atributos
+        gpkg = conexion.execute("SELECT name FROM sqlite_master WHERE name = 'gpkg_contents'").fetchone()
+        if gpkg:
+            conexion.execute("DELETE FROM gpkg_contents WHERE table_name = ?", (nombre_tabla,))
+            conexion.execute(
+                "INSERT INTO gpkg_contents (table_name, data_type, identifier) VALUES (?, 'attributes', ?)",
+                (nombre_tabla, nombre_tabla),
+            )
+    conexion.close()
+
+
+def _insertar_sqlite(tabla_destino, df, campos, tamano_lote, constantes):
+    conexion, nombre_tabla = _conexion_sqlite(tabla_destino)
+    todos = campos + list(constantes)
+    columnas = ", ".join(f'"{c}"' for c in todos)
+    marcadores = ", ".join("?" * len(todos))
+    sql = f'INSERT INTO "{nombre_tabla}" ({columnas}) VALUES ({marcadores})'
+    with conexion:
+        for lote in lotes_de_tuplas(df, campos, tamano_lote, fechas_iso=True, constantes=constantes):
+            conexion.executemany(sql, lote)
+    conexion.close()
+
+
+BACKENDS = {
+    "arcpy": {"crear": _crear_tabla_arcpy, "insertar": _insertar_arcpy},
+    "sqlite": {"crear": _crear_tabla_sqlite, "insertar": _insertar_sqlite},
+}
+
+
+def columnas_constantes(df, constantes):
+    """
+    DataFrame vacío con las columnas de `df` más las constantes; define los
+    campos (y sus tipos) al crear la tabla sin repetir las constantes por fila.
+    """
+    return df.head(0).assign(**(constantes or {}))
+
+
+def escribir_df(df, tabla_destino, backend="arcpy", crear=True, tamano_lote=TAMANO_LOTE, tipos_campo=None,
+                constantes=None):
+    """
+    Escribe el DataFrame en la tabla destino en lotes de tuplas.
+
+    Parámetros:
+        df (pd.DataFrame): Datos a escribir.
+        tabla_destino (str): Ruta de la tabla (<gdb>/<tabla> o <archivo.sqlite|.gpkg>/<tabla>).
+        backend (str): "arcpy" o "sqlite".
+        crear (bool): (Re)crea la tabla con los campos del DataFrame antes de insertar.
+        tamano_lote (int): Filas por lote.
+        tipos_campo (dict): Tipo ArcGIS explícito por columna (por ejemplo
+            {"GLOBALID": "GUID"}); las demás se detectan del dtype.
+        constantes (dict): Campos con el mismo valor en todas las filas
+            (escalares, se repiten solo al escribir).
+
+    Retorna:
+        int: Número de filas escritas.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"❌ Backend de escritura no soportado: {backend}")
+
+    constantes = {c: v for c, v in (constantes or {}).items() if c.upper() not in CAMPOS_RESERVADOS}
+    funciones = BACKENDS[backend]
+    if crear:
+        funciones["crear"](tabla_destino, columnas_constantes(df, constantes) if constantes else df, tipos_campo or {})
+
+    campos = [c for c in campos_insertables(df) if c not in constantes]
+    print(f"📥 Insertando {len(df)} registros en {os.path.basename(tabla_destino)}...")
+    funciones["insertar"](tabla_destino, df, campos, tamano_lote, constantes)
+    return len(df)
@@ -1,9 +1,401 @@
 import arcpy
 import os
 import datetime
+from contextlib import contextmanager
 
+import numpy as np
 
-def espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino):
+from utils.esquemas import capturar_esquema
+from utils.identificadores import guids_por_demanda
+from utils.indice_centerline import clave_centerline
+from utils.metadatos import describir, invalidar, listar_campos
+from utils.segmentacion_dinamica import (
+    EN_RUTA, MOTIVOS, extraer_tramos, resumen_estados, ubicar_puntos, validar_coordenadas
+)
+from utils.snapshot_centerline import nombres_ruta, obtener_snapshot
+
+
+# Conexión a la geodatabase UPDM de destino
+GDB_UPDM = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\sde\TGI_UPDM.sde"
+
+# ENGROUTEID → ENGROUTENAME por versión del centerline (ver nombres_centerline)
+_NOMBRES_RUTA = {}
+
+
+# Valores por cláusula IN al verificar los GLOBALID cargados
+TAMANO_LOTE_IN = 500
+
+
+@contextmanager
+def preservando_globalids(activo=True):
+    """
+    Activa el entorno preserveGlobalIds mientras dura el bloque y restaura el
+    valor anterior al salir (también ante errores).
+    """
+    previo = arcpy.env.preserveGlobalIds
+    arcpy.env.preserveGlobalIds = activo
+    try:
+        yield
+    finally:
+        arcpy.env.preserveGlobalIds = previo
+
+
+def verificar_globalids(cobdestino, esperados):
+    """
+    Comprueba que los GLOBALID generados en el cliente quedaron escritos tal
+    cual en `cobdestino`. Si el Append los regeneró, las tablas relacionadas
+    apuntarían a padres inexistentes.
+
+    Lanza:
+    - RuntimeError: Si falta alguno de los GLOBALID esperados.
+    """
+    esperados = {str(g).upper() for g in esperados if g is not None}
+    campo = arcpy.AddFieldDelimiters(cobdestino, "GLOBALID")
+    pendientes = sorted(esperados)
+    encontrados = set()
+    for i in range(0, len(pendientes), TAMANO_LOTE_IN):
+        lote = ", ".join(f"'{g}'" for g in pendientes[i:i + TAMANO_LOTE_IN])
+        with arcpy.da.SearchCursor(cobdestino, ["GLOBALID"], f"{campo} IN ({lote})") as cursor:
+            encontrados.update(str(g).upper() for g, in cursor)
+
+    faltantes = esperados - encontrados
+    if faltantes:
+        raise RuntimeError(
+            f"❌ {len(faltantes)} de {len(esperados)} GLOBALID generados no se conservaron en "
+            f"{os.path.basename(cobdestino)} (¿preserveGlobalIds no aplicó?): {sorted(faltantes)[:5]}"
+        )
+    arcpy.AddMessage(f"  {len(esperados)} GLOBALID verificados en {os.path.basename(cobdestino)}")
+
+
+def cargar_en_sde(gdb_destino, cargas, preservar_globalids=True, globalids=None):
+    """
+    Carga varias coberturas en la base de datos en una sola sesión de edición.
+
+    Parámetros:
+    - gdb_destino: Conexión .sde de la geodatabase de destino.
+    - cargas: Lista de pares (cobertura espacializada, tabla de destino), en el
+      orden en que se deben cargar (tabla principal antes que las relacionadas).
+    - preservar_globalids: Conserva los GLOBALID generados en el cliente
+      (entorno preserveGlobalIds), de modo que las tablas relacionadas
+      referencian al padre sin releerlo.
+    - globalids: Diccionario tabla de destino → GLOBALID generados. Después
+      del Append se verifica que quedaron escritos; si no, se revierte la
+      sesión de edición y se lanza el error.
+    """
+    arcpy.AddMessage(f"Iniciando sesión de edición en {gdb_destino}... {datetime.datetime.now()}")
+
+    with preservando_globalids(preservar_globalids):
+        edit = arcpy.da.Editor(gdb_destino)
+        edit.startEditing(False, True)  # False = no autoguardado, True = versionado
+        try:
+            edit.startOperation()  # Iniciar operación de edición
+
+            for out_fc, cobdestino in cargas:
+                arcpy.AddMessage(f"Cargando FeatureClass {cobdestino} en base de datos... {datetime.datetime.now()}")
+                arcpy.Append_management(out_fc, cobdestino, "NO_TEST")
+
+            # Las relaciones dependen de que los GLOBALID del cliente sobrevivan al Append
+            for cobdestino, esperados in (globalids or {}).items():
+                verificar_globalids(cobdestino, esperados)
+
+            # Confirmar cambios
+            edit.stopOperation()
+            edit.stopEditing(True)  # Guardar cambios
+            arcpy.AddMessage(f"Datos cargados exitosamente en {gdb_destino}... {datetime.datetime.now()}")
+
+        except Exception as e:
+            edit.stopEditing(False)  # Revertir cambios en caso de error
+            arcpy.AddError(f"Error al cargar los datos en {gdb_destino}: {e}")
+            raise
+
+
+def nombres_centerline(centerline, campo_routeid="ENGROUTEID", campo_nombre="ENGROUTENAME"):
+    """
+    Diccionario ENGROUTEID → ENGROUTENAME del centerline, tomado del snapshot
+    (ver utils.snapshot_centerline) y memorizado por versión del centerline.
+    """
+    clave = clave_centerline(centerline, campo_routeid, campo_nombre) or os.path.abspath(centerline)
+    if clave not in _NOMBRES_RUTA:
+        _NOMBRES_RUTA[clave] = nombres_ruta(obtener_snapshot(centerline, campo_routeid, campo_nombre))
+    return _NOMBRES_RUTA[clave]
+
+
+def normalizar_nulos(tabla, campo_id=None, nombres=None, campo_ruta="ENGROUTEID", campo_nombre="ENGROUTENAME"):
+    """
+    Reemplaza por NULL los textos vacíos o solo con espacios de todos los
+    campos de texto editables, en una sola pasada de UpdateCursor. Los campos
+    que no son de texto no se leen.
+
+    Parámetros:
+    - tabla: Tabla a normalizar.
+    - campo_id: Campo de texto (por ejemplo EVENTID) que, en la misma pasada,
+      recibe un GUID en las filas donde queda vacío. Los GUID se generan por
+      bloques solo a medida que aparecen filas vacías (ver
+      utils.identificadores); quien necesite conocerlos antes del Append los
+      asigna en la tabla de entrada y aquí se conservan.
+    - nombres: Diccionario ENGROUTEID → ENGROUTENAME (ver nombres_centerline);
+      en la misma pasada llena `campo_nombre` desde `campo_ruta`. Si algún
+      ENGROUTEID no está en el centerline se genera ValueError al terminar
+      la pasada, de modo que el cargue se detiene antes del Append.
+
+    Retorna:
+    - dict: Valores cambiados por campo (solo campos con cambios).
+    """
+    # La tabla pudo cambiar de esquema (AddField de EVENTID / ENGROUTENAME): se relee
+    invalidar(tabla)
+    campos = [f.name for f in listar_campos(tabla) if f.type == "String" and f.editable]
+    if not campos:
+        return {}
+    cambios = dict.fromkeys(campos, 0)
+
+    posicion_id = campos.index(campo_id) if campo_id in campos else None
+    guids = guids_por_demanda()
+
+    # Nombre de ruta: el ENGROUTEID (GUID) se lee como campo extra al final de la fila
+    posicion_nombre = campos.index(campo_nombre) if nombres is not None and campo_nombre in campos else None
+    cursor_campos = campos + [campo_ruta] if posicion_nombre is not None else campos
+    desconocidas = set()
+
+    arcpy.AddMessage(f"Normalizando textos vacíos en {len(campos)} campos... {datetime.datetime.now()}")
+    with arcpy.da.UpdateCursor(tabla, cursor_campos) as cursor:
+        for fila in cursor:
+            cambiada = False
+            if posicion_nombre is not None:
+                rguid = fila[-1]
+                nombre = nombres.get(rguid)
+                if nombre is None and rguid is not None:
+                    desconocidas.add(rguid)
+                if nombre != fila[posicion_nombre]:
+                    fila[posicion_nombre] = nombre
+                    cambios[campo_nombre] += 1
+                    cambiada = True
+
+            for i, valor in enumerate(fila[:len(campos)]):
+                if valor is not None and valor.strip():
+                    continue
+                if i == posicion_id:
+                    fila[i] = next(guids)
+                elif valor is not None:
+                    fila[i] = None
+                else:
+                    continue
+                cambios[campos[i]] += 1
+                cambiada = True
+            if cambiada:
+                cursor.updateRow(fila)
+
+    cambios = {campo: n for campo, n in cambios.items() if n}
+    for campo, n in cambios.items():
+        if campo == campo_id:
+            arcpy.AddMessage(f"  {campo}: {n} identificadores generados")
+        elif campo == campo_nombre and posicion_nombre is not None:
+            arcpy.AddMessage(f"  {campo}: {n} nombres de ruta asignados")
+        else:
+            arcpy.AddMessage(f"  {campo}: {n} valores vacíos → NULL")
+
+    if desconocidas:
+        muestra = sorted(desconocidas)[:20]
+        mensaje = f"{len(desconocidas)} {campo_ruta} no existen en el centerline: {muestra}"
+        arcpy.AddError(f"❌ {mensaje}")
+        raise ValueError(mensaje)
+    return cambios
+
+
+def crear_cobertura(tabla, out_fc, tipo_geometria, sr, has_m=False, has_z=True):
+    """
+    Crea `out_fc` vacía con la geometría pedida y los campos editables de `tabla`
+    (una sola llamada a AddFields). El GlobalID, que no es editable, se
+    recrea con AddGlobalIDs.
+
+    Retorna:
+    - list: Nombres de los campos copiados, en el orden de `tabla`.
+    """
+    invalidar(tabla)
+    globalid = [f.name for f in listar_campos(tabla) if f.type == "GlobalID"]
+    editables = {f.name for f in listar_campos(tabla) if f.editable} | set(globalid)
+    campos = [c for c in capturar_esquema(tabla) if c["nombre"] in editables and c["nombre"].upper() != "OBJECTID"]
+    ruta, nombre = os.path.split(out_fc)
+    if arcpy.Exists(out_fc):
+        arcpy.Delete_management(out_fc)
+    arcpy.CreateFeatureclass_management(
+        ruta or arcpy.env.workspace, nombre, tipo_geometria,
+        has_m="ENABLED" if has_m else "DISABLED", has_z="ENABLED" if has_z else "DISABLED",
+        spatial_reference=sr
+    )
+    arcpy.management.AddFields(
+        out_fc,
+        [[c["nombre"], c["tipo"], c.get("alias") or c["nombre"], c.get("longitud") or ""]
+         for c in campos if c["nombre"] not in globalid]
+    )
+    if globalid:
+        # GlobalID real (no GUID) para que el Append con preserveGlobalIds conserve los valores
+        arcpy.AddGlobalIDs_management(out_fc)
+    invalidar(out_fc)
+    return [c["nombre"] for c in campos]
+
+
+def _punto(x, y, z, m):
+    return arcpy.Point(x, y, None if np.isnan(z) else z, None if np.isnan(m) else m)
+
+
+def _geometrias_puntos(buf, sr):
+    for x, y, z, m in zip(buf["x"], buf["y"], buf["z"], buf["m"]):
+        yield None if np.isnan(x) else arcpy.PointGeometry(_punto(x, y, z, m), sr, True, True)
+
+
+def _geometrias_tramos(buf, sr):
+    offsets = buf["offsets"]
+    for i in range(len(offsets) - 1):
+        ini, fin = offsets[i], offsets[i + 1]
+        if ini == fin:
+            yield None
+            continue
+        partes = arcpy.Array()
+        parte = arcpy.Array()
+        for k in range(ini, fin):
+            if k > ini and buf["parte"][k] != buf["parte"][k - 1]:
+                partes.add(parte)
+                parte = arcpy.Array()
+            parte.add(_punto(buf["x"][k], buf["y"][k], buf["z"][k], buf["m"][k]))
+        partes.add(parte)
+        yield arcpy.Polyline(partes, sr, True, True)
+
+
+def _reportar_no_ubicados(estado, filas, posicion_id, cobertura):
+    """Reporta los eventos que no se pudieron ubicar, por motivo y con una muestra de identificadores."""
+    resumen = resumen_estados(estado)
+    if not resumen:
+        return
+    arcpy.AddError(f"❌ {int((estado != EN_RUTA).sum())} eventos sin geometría en {cobertura}: {resumen}")
+    for codigo, motivo in MOTIVOS.items():
+        indices = np.flatnonzero(estado == codigo)[:20]
+        if indices.size:
+            muestra = [filas[i][posicion_id] if posicion_id is not None else int(i) for i in indices]
+            arcpy.AddError(f"  {motivo}: {muestra}")
+
+
+def eventos_ruta(out_tb, out_fc, centerline, campo_routeid, campo_engrid, tipo_dato):
+    """
+    Genera la cobertura de eventos de ruta ('Punto Abscisado' o 'Linea
+    Abscisado') con segmentación dinámica en memoria (ver
+    utils.segmentacion_dinamica) en lugar de MakeRouteEventLayer + Select.
+
+    Las geometrías se calculan en bloque desde el snapshot del centerline y se
+    insertan junto con los atributos en un solo InsertCursor. Los eventos con
+    ruta inexistente o medidas fuera del rango M de la ruta no se insertan y
+    se reportan como error.
+
+    Parámetros:
+    - out_tb: Tabla de eventos (ENGM o ENGFROMM / ENGTOM).
+    - out_fc: Feature class de salida.
+    - centerline, campo_routeid: Rutas de referencia y su campo identificador.
+    - campo_engrid: Campo de la ruta en la tabla de eventos.
+    - tipo_dato: 'Punto Abscisado' o 'Linea Abscisado'.
+
+    Retorna:
+    - int: Número de eventos insertados.
+    """
+    puntual = tipo_dato == "Punto Abscisado"
+    sr = describir(centerline).spatialReference
+    campos = crear_cobertura(out_tb, out_fc, "POINT" if puntual else "POLYLINE", sr, has_m=True)
+    filas, columna = _leer_eventos(out_tb, campos)
+    arcpy.AddMessage(f"Segmentación dinámica de {len(filas)} eventos... {datetime.datetime.now()}")
+    snapshot = obtener_snapshot(centerline, campo_routeid)
+    ids_ruta = columna(campo_engrid, object)
+    if puntual:
+        buf = ubicar_puntos(snapshot, ids_ruta, columna("ENGM", "float64"))
+        geometrias = _geometrias_puntos(buf, sr)
+    else:
+        buf = extraer_tramos(snapshot, ids_ruta, columna("ENGFROMM", "float64"), columna("ENGTOM", "float64"))
+        geometrias = _geometrias_tramos(buf, sr)
+
+    return _insertar_eventos(out_fc, campos, filas, geometrias, buf["estado"])
+
+
+def _leer_eventos(tabla, campos):
+    """Filas de `tabla` y una función columna(campo, tipo) que arma el arreglo de un campo."""
+    with arcpy.da.SearchCursor(tabla, campos) as cursor:
+        filas = list(cursor)
+
+    def columna(campo, tipo=None):
+        i = campos.index(campo)
+        return np.array([f[i] for f in filas], dtype=tipo)
+
+    return filas, columna
+
+
+def _insertar_eventos(out_fc, campos, filas, geometrias, estado):
+    """Inserta en un solo InsertCursor atributos + SHAPE@ de las filas ubicadas y reporta las demás."""
+    insertados = 0
+    with arcpy.da.InsertCursor(out_fc, campos + ["SHAPE@"]) as cursor:
+        for fila, geometria, codigo in zip(filas, geometrias, estado):
+            if codigo == EN_RUTA:
+                cursor.insertRow(fila + (geometria,))
+                insertados += 1
+
+    _reportar_no_ubicados(estado, filas, campos.index("EVENTID") if "EVENTID" in campos else None, out_fc)
+    arcpy.AddMessage(f"  {insertados} eventos ubicados en {os.path.basename(out_fc)}")
+    return insertados
+
+
+# Rango válido de longitud / latitud en sistemas geográficos (el dominio XY de
+# un GCS, por ejemplo -400 … 1e9, no sirve para detectar coordenadas erradas)
+RANGO_GEOGRAFICO = (-180.0, -90.0, 180.0, 90.0)
+
+
+def referencia_espacial(sr):
+    """
+    arcpy.SpatialReference a partir de un objeto SpatialReference, un código
+    WKID o una cadena WKT / exportToString (con dominios y tolerancias).
+    """
+    if isinstance(sr, arcpy.SpatialReference):
+        return sr
+    if isinstance(sr, int) or (isinstance(sr, str) and sr.strip().isdigit()):
+        return arcpy.SpatialReference(int(sr))
+    referencia = arcpy.SpatialReference()
+    referencia.loadFromString(sr)
+    return referencia
+
+
+def _rango_xy(sr):
+    """
+    (xmin, ymin, xmax, ymax) de las coordenadas válidas: longitud / latitud en
+    sistemas geográficos y el dominio XY en los proyectados.
+    """
+    if sr.type == "Geographic":
+        return RANGO_GEOGRAFICO
+    return tuple(float(v) for v in sr.domain.split()[:4])
+
+
+def eventos_xyz(out_tb, out_fc, sr):
+    """
+    Genera la cobertura de puntos 'Coordenadas XYZ' directamente desde
+    GPSX / GPSY / GPSZ, en lugar de MakeXYEventLayer + Select.
+
+    Las coordenadas se validan en bloque (nulas, o fuera de [-180, 180] /
+    [-90, 90] en un `sr` geográfico o de su dominio XY en uno proyectado); las
+    filas inválidas no se insertan y se reportan como error. Los puntos se
+    insertan junto con los atributos en un solo InsertCursor.
+
+    Parámetros:
+    - sr: arcpy.SpatialReference (ver referencia_espacial).
+
+    Retorna:
+    - int: Número de puntos insertados.
+    """
+    campos = crear_cobertura(out_tb, out_fc, "POINT", sr)
+    filas, columna = _leer_eventos(out_tb, campos)
+
+    arcpy.AddMessage(f"Construyendo {len(filas)} puntos XYZ... {datetime.datetime.now()}")
+    buf = validar_coordenadas(
+        columna("GPSX", "float64"), columna("GPSY", "float64"),
+        columna("GPSZ", "float64") if "GPSZ" in campos else None,
+        dominio=_rango_xy(sr)
+    )
+    return _insertar_eventos(out_fc, campos, filas, _geometrias_puntos(buf, sr), buf["estado"])
+
+
+def espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_dato, sr, cobdestino, cargar=True):
     """
     Procesa los datos de entrada para generar una cobertura geográfica o una tabla en ArcGIS.
 
@@ -14,126 +406,84 @@ def espacializacion(ft, campo_engrid, out_fc, centerline, campo_routeid, tipo_da
     - centerline: Feature class con la geometría de referencia.
     - campo_routeid: Campo de identificación de la ruta en la geometría de referencia.
     - tipo_dato: Tipo de procesamiento ('Coordenadas XYZ', 'Punto Abscisado', 'Linea Abscisado' o tabla).
-    - sr: Sistema de referencia espacial.
+    - sr: Sistema de referencia espacial (SpatialReference, WKID o WKT).
     - cobdestino: Tabla de destino para procesamiento.
+    - cargar: Si es False, solo genera `out_fc` y no la carga en la base de
+      datos (ver cargar_en_sde para cargar varias tablas en una sesión).
+
+    Retorna:
+    - out_fc
     """
 
-    # Configuración de entorno
-    arcpy.env.workspace = "in_memory"
-    arcpy.env.overwriteOutput = True
+    # La referencia puede llegar como WKT (cargue_bd): se construye una sola vez
+    sr = referencia_espacial(sr)
 
-    # Selección de plantilla en blanco
-    out_tb = os.path.join("in_memory", "tabla_procesada")
-    #out_tb = r"C:\Users\TICE21\AppData\Local\Temp\scratch.gdb\tabla_procesada"
-    arcpy.AddMessage(f"Seleccionando plantilla en blanco... {datetime.datetime.now()}")
+    # GLOBALID generados en el cliente (ver utils.identificadores); el entorno
+    # se restaura al terminar
+    with preservando_globalids():
+        # Configuración de entorno
+        arcpy.env.workspace = "in_memory"
+        arcpy.env.overwriteOutput = True
 
-    arcpy.TableSelect_analysis(cobdestino, out_tb, "OBJECTID = 0")
-    arcpy.DeleteField_management(out_tb, ["ENGROUTENAME"])
-    arcpy.Append_management(ft, out_tb, "NO_TEST")
+        # Selección de plantilla en blanco
+        out_tb = os.path.join("in_memory", "tabla_procesada")
+        #out_tb = r"C:\Users\TICE21\AppData\Local\Temp\scratch.gdb\tabla_procesada"
+        arcpy.AddMessage(f"Seleccionando plantilla en blanco... {datetime.datetime.now()}")
 
-    # Agregar campo EVENTID si no existe
-    try:
-        arcpy.AddField_management(out_tb, "EVENTID", "TEXT", field_length=38)
-    except Exception as e:
-        arcpy.AddWarning(f"Error al agregar EVENTID: {e}")
-
-    arcpy.AddMessage(f"Calculando EventID... {datetime.datetime.now()}")
-
-    arcpy.CalculateField_management(
-        out_tb,
-        "EVENTID",
-        expression="ID()",
-        expression_type="PYTHON_9.3",
-        code_block="import uuid\ndef ID(): return str(uuid.uuid4())"
-    )
+        arcpy.TableSelect_analysis(cobdestino, out_tb, "OBJECTID = 0")
+        arcpy.Append_management(ft, out_tb, "NO_TEST")
 
-    # Reemplazar valores vacíos con None en todas las columnas
-    for field in arcpy.ListFields(out_tb):
-        try:
-            arcpy.CalculateField_management(
-                out_tb,
-                field.name,
-                expression=f"NULOS(!{field.name}!)",
-                expression_type="PYTHON_9.3",
-                code_block="""
-    def NULOS(A):
-        if A is None or (isinstance(A, str) and A.strip() == ""):
-            return None
-        return A
-                """
-            )
-        except:
-            pass  # Si el campo no se puede actualizar, ignorarlo
-
-    # Procesamiento basado en el tipo de dato
-    if tipo_dato in ["Coordenadas XYZ", "Punto Abscisado", "Linea Abscisado"]:
-        arcpy.AddMessage(f"Creando cobertura geográfica... {datetime.datetime.now()}")
-        arcpy.JoinField_management(out_tb, campo_engrid, centerline, campo_routeid, ["ENGROUTENAME"])
-
-        if tipo_dato == "Coordenadas XYZ":
-            try:
-                arcpy.MakeXYEventLayer_management(out_tb, "GPSX", "GPSY", "XY_LAYER", sr, "GPSZ")
-                arcpy.Select_analysis("XY_LAYER", out_fc)
-            except Exception as e:
-                arcpy.AddWarning(f"Error en coordenadas XYZ: {e}")
-        else:
-            route_properties = "ENGROUTEID POINT ENGM" if tipo_dato == "Punto Abscisado" else "ENGROUTEID LINE ENGFROMM ENGTOM"
-            try:
-                arcpy.MakeRouteEventLayer_lr(centerline, campo_routeid, out_tb, route_properties, "ROUTE_LAYER")
-                arcpy.Select_analysis("ROUTE_LAYER", out_fc)
-            except Exception as e:
-                arcpy.AddWarning(f"Error en eventos de ruta: {e}")
-
-        # Validación y reparación de geometría
-        outchk = f"{out_fc}_chk"
-        arcpy.CheckGeometry_management(out_fc, outchk)
-        count = int(arcpy.GetCount_management(outchk).getOutput(0))
-
-        if count > 0:
-            arcpy.JoinField_management(outchk, "FEATURE_ID", out_fc, "OBJECTID")
-            arcpy.AddWarning(f"Se presentaron errores de geometría, revise: {outchk}")
-
-        arcpy.RepairGeometry_management(out_fc)
-        arcpy.Delete_management(out_tb)
-
-        # Verificación de datos generados
-        if int(arcpy.GetCount_management(out_fc).getOutput(0)) == 0:
-            arcpy.AddWarning("Se generó cobertura vacía")
-    else:
-        arcpy.AddMessage(f"Creando tabla... {datetime.datetime.now()}")
+        # Agregar campo EVENTID si no existe
         try:
-            arcpy.JoinField_management(out_tb, campo_engrid, centerline, campo_routeid, ["ENGROUTENAME"])
+            arcpy.AddField_management(out_tb, "EVENTID", "TEXT", field_length=38)
         except Exception as e:
-            arcpy.AddWarning(f"Error al unir tabla: {e}")
+            arcpy.AddWarning(f"Error al agregar EVENTID: {e}")
 
-        arcpy.TableSelect_analysis(out_tb, out_fc)
+        # Agregar campo ENGROUTENAME si la plantilla no lo trae
+        if "ENGROUTENAME" not in [f.name.upper() for f in arcpy.ListFields(out_tb)]:
+            arcpy.AddField_management(out_tb, "ENGROUTENAME", "TEXT", field_length=255)
 
+        # En una sola pasada: textos vacíos → None, EVENTID faltantes y ENGROUTENAME desde el centerline
+        arcpy.AddMessage(f"Asignando ENGROUTENAME desde el centerline... {datetime.datetime.now()}")
+        normalizar_nulos(
+            out_tb, campo_id="EVENTID",
+            nombres=nombres_centerline(centerline, campo_routeid), campo_ruta=campo_engrid
+        )
 
-    gdb_destino = r"D:\Requerimientos\TGI\AUTOMATIZACION_CARGUE_UPDM\sde\TGI_UPDM.sde"
-    arcpy.AddMessage(f"Verificando acceso a SDE: {gdb_destino}... {datetime.datetime.now()}")
+        # Procesamiento basado en el tipo de dato
+        if tipo_dato in ["Coordenadas XYZ", "Punto Abscisado", "Linea Abscisado"]:
+            arcpy.AddMessage(f"Creando cobertura geográfica... {datetime.datetime.now()}")
 
+            if tipo_dato == "Coordenadas XYZ":
+                try:
+                    eventos_xyz(out_tb, out_fc, sr)
+                except Exception as e:
+                    arcpy.AddWarning(f"Error en coordenadas XYZ: {e}")
+            else:
+                try:
+                    eventos_ruta(out_tb, out_fc, centerline, campo_routeid, campo_engrid, tipo_dato)
+                except Exception as e:
+                    arcpy.AddWarning(f"Error en eventos de ruta: {e}")
 
-    try:
-        # Iniciar sesión de edición en la versión correcta
-        #gdb_destino = os.path.join(os.path.dirname(__file__), 'sde', 'UPDM_TGI.sde')
-        #gdb_destino = os.path.join(os.path.dirname(__file__), 'sde', 'TGI_UPDM.sde')
-        arcpy.AddMessage(f"Iniciando sesión de edición en {gdb_destino}... {datetime.datetime.now()}")
+            # Validación y reparación de geometría
+            outchk = f"{out_fc}_chk"
+            arcpy.CheckGeometry_management(out_fc, outchk)
+            count = int(arcpy.GetCount_management(outchk).getOutput(0))
 
-        edit = arcpy.da.Editor(gdb_destino)
-        edit.startEditing(False, True)  # False = no autoguardado, True = versionado
+            if count > 0:
+                arcpy.JoinField_management(outchk, "FEATURE_ID", out_fc, "OBJECTID")
+                arcpy.AddWarning(f"Se presentaron errores de geometría, revise: {outchk}")
 
-        edit.startOperation()  # Iniciar operación de edición
+            arcpy.RepairGeometry_management(out_fc)
+            arcpy.Delete_management(out_tb)
 
-        # Cargar datos con Append
-        arcpy.AddMessage(f"Cargando FeatureClass {cobdestino} en base de datos... {datetime.datetime.now()}")
-        arcpy.Append_management(out_fc, cobdestino, "NO_TEST")
-
-        # Confirmar cambios
-        edit.stopOperation()
-        edit.stopEditing(True)  # Guardar cambios
-
-        arcpy.AddMessage(f"Datos cargados exitosamente en {cobdestino}... {datetime.datetime.now()}")
+            # Verificación de datos generados
+            if int(arcpy.GetCount_management(out_fc).getOutput(0)) == 0:
+                arcpy.AddWarning("Se generó cobertura vacía")
+        else:
+            arcpy.AddMessage(f"Creando tabla... {datetime.datetime.now()}")
+            arcpy.TableSelect_analysis(out_tb, out_fc)
 
-    except Exception as e:
-        edit.stopEditing(False)  # Revertir cambios en caso de error
-        arcpy.AddError(f"Error al cargar los datos en {cobdestino}: {e}")
\ No newline at end of file
+    if cargar:
+        cargar_en_sde(GDB_UPDM, [(out_fc, cobdestino)])
+    return out_fc
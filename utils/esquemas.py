@@ -0,0 +1,179 @@
+# utils/esquemas.py
+"""
+Registro de esquemas de las tablas destino (UPDM).
+
+El esquema de cada tabla (nombre, tipo, longitud y alias de sus campos) se
+captura una sola vez desde la plantilla en la SDE, o se toma de la clave
+"esquema" del mapeo JSON, y se guarda en cache/esquemas.json. Las tablas de
+staging se crean desde ese esquema con una sola llamada a AddFields, o se
+vacían con TruncateTable y se reutilizan cuando su esquema no cambió.
+"""
+import json
+import os
+
+import pandas as pd
+
+from utils.escritura_tablas import campos_insertables, detectar_tipo_dato_arcgis
+from utils.indice_centerline import DIRECTORIO_CACHE
+from utils.metadatos import invalidar, listar_campos
+
+ARCHIVO_ESQUEMAS = os.path.join(DIRECTORIO_CACHE, "esquemas.json")
+
+# Longitud con la que AddField crea un campo TEXT sin longitud explícita
+LONGITUD_TEXTO = 255
+
+# Tipo de arcpy.Field → tipo de AddField
+TIPOS_ADDFIELD = {
+    "String": "TEXT",
+    "SmallInteger": "SHORT",
+    "Integer": "LONG",
+    "BigInteger": "BIGINTEGER",
+    "Single": "FLOAT",
+    "Double": "DOUBLE",
+    "Date": "DATE",
+    "GUID": "GUID",
+    "GlobalID": "GUID",
+}
+
+
+def _cargar_registro():
+    if not os.path.exists(ARCHIVO_ESQUEMAS):
+        return {}
+    with open(ARCHIVO_ESQUEMAS, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+
+def _guardar_registro(registro):
+    os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+    temporal = f"{ARCHIVO_ESQUEMAS}.tmp{os.getpid()}"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(registro, archivo, indent=2, ensure_ascii=False)
+    os.replace(temporal, ARCHIVO_ESQUEMAS)
+
+
+def capturar_esquema(tabla):
+    """
+    Lee los campos editables de una tabla o feature class.
+
+    Retorna:
+        list[dict]: {"nombre", "tipo", "longitud", "alias"} por campo (sin
+        OBJECTID, geometría ni campos de tipo no soportado por AddField).
+    """
+    return [
+        {
+            "nombre": f.name,
+            "tipo": TIPOS_ADDFIELD[f.type],
+            "longitud": f.length if f.type == "String" else None,
+            "alias": f.aliasName,
+        }
+        for f in listar_campos(tabla)
+        if f.type in TIPOS_ADDFIELD
+    ]
+
+
+def obtener_esquema(nombre_tabla, plantilla=None, definicion_mapeo=None, refrescar=False):
+    """
+    Esquema registrado de una tabla destino.
+
+    Orden de búsqueda: clave "esquema" del mapeo JSON, registro local
+    (cache/esquemas.json) y, si no está registrado (o `refrescar`), captura
+    desde la plantilla en la SDE.
+
+    Parámetros:
+        nombre_tabla (str): Nombre de la tabla (llave del registro).
+        plantilla (str): Tabla de la SDE de la que se captura el esquema.
+        definicion_mapeo (dict): Definición de la tabla en el mapeo JSON.
+        refrescar (bool): Vuelve a capturar el esquema desde la plantilla.
+
+    Retorna:
+        list[dict] | None: Campos del esquema, o None si no hay fuente.
+    """
+    if definicion_mapeo and definicion_mapeo.get("esquema"):
+        return definicion_mapeo["esquema"]
+
+    registro = _cargar_registro()
+    if nombre_tabla in registro and not refrescar:
+        return registro[nombre_tabla]["campos"]
+    if plantilla is None:
+        return None
+
+    print(f"🗂️ Capturando esquema de {nombre_tabla} desde {plantilla}...")
+    campos = capturar_esquema(plantilla)
+    registro[nombre_tabla] = {"origen": plantilla, "campos": campos}
+    _guardar_registro(registro)
+    return campos
+
+
+def esquema_staging(esquema, df, tipos_campo=None):
+    """
+    Campos de la tabla de staging: los del esquema destino presentes en el
+    DataFrame, con su tipo y longitud, más las columnas que no están en el
+    esquema (tipo explícito o detectado del dtype).
+    """
+    tipos_campo = tipos_campo or {}
+    por_nombre = {c["nombre"].upper(): c for c in esquema}
+    campos = []
+    for col in campos_insertables(df):
+        campo = por_nombre.get(col.upper())
+        if campo is None:
+            tipo = tipos_campo.get(col) or detectar_tipo_dato_arcgis(df[col].dtype)
+            campo = {"nombre": col, "tipo": tipo, "longitud": LONGITUD_TEXTO if tipo == "TEXT" else None, "alias": col}
+        else:
+            campo = dict(campo, nombre=col)
+        campos.append(campo)
+    return campos
+
+
+def _firma(campos):
+    # Un TEXT sin longitud se crea (y se vuelve a leer) con LONGITUD_TEXTO
+    return [
+        (c["nombre"].upper(), c["tipo"], c.get("longitud") or (LONGITUD_TEXTO if c["tipo"] == "TEXT" else None))
+        for c in campos
+    ]
+
+
+def ajustar_fechas(df, constantes, campos):
+    """
+    Convierte a fecha las columnas y constantes que el esquema de staging
+    declara DATE pero llegan como texto (por ejemplo CREATIONDATE con la
+    fecha de cargue "%Y-%m-%d %H:%M").
+
+    Retorna:
+        tuple(pd.DataFrame, dict): DataFrame y constantes ajustados.
+    """
+    fechas = {c["nombre"] for c in campos if c["tipo"] == "DATE"}
+    convertir = [c for c in fechas if c in df.columns and not pd.api.types.is_datetime64_any_dtype(df[c])]
+    if convertir:
+        df = df.assign(**{c: pd.to_datetime(df[c]) for c in convertir})
+    constantes = {
+        c: pd.Timestamp(v).to_pydatetime() if c in fechas and isinstance(v, str) else v
+        for c, v in (constantes or {}).items()
+    }
+    return df, constantes
+
+
+def preparar_tabla(tabla_destino, campos):
+    """
+    Deja la tabla de staging vacía y con el esquema pedido: la vacía con
+    TruncateTable si ya tiene exactamente esos campos; si no, la recrea con
+    CreateTable + una sola llamada a AddFields.
+    """
+    import arcpy
+
+    gdb_destino, nombre_tabla = os.path.split(tabla_destino)
+    if arcpy.Exists(tabla_destino):
+        if _firma(capturar_esquema(tabla_destino)) == _firma(campos):
+            print(f"♻️ Reutilizando la tabla {nombre_tabla} (esquema sin cambios)")
+            arcpy.TruncateTable_management(tabla_destino)
+            return
+        print(f"Sobreescribiendo la tabla existente: {tabla_destino}")
+        arcpy.Delete_management(tabla_destino)
+        invalidar(tabla_destino)
+
+    print(f"Creando la tabla '{nombre_tabla}' en {gdb_destino} desde el esquema registrado...")
+    arcpy.CreateTable_management(gdb_destino, nombre_tabla)
+    arcpy.management.AddFields(
+        tabla_destino,
+        [[c["nombre"], c["tipo"], c.get("alias") or c["nombre"], c.get("longitud") or ""] for c in campos],
+    )
+    invalidar(tabla_destino)
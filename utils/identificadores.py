@@ -0,0 +1,50 @@
+# utils/identificadores.py
+"""
+Generación masiva de GUID (UUID versión 4) en el formato de ArcGIS:
+"{XXXXXXXX-XXXX-4XXX-YXXX-XXXXXXXXXXXX}" en mayúsculas.
+
+Los 16 bytes aleatorios de todos los GUID se toman en una sola lectura de
+os.urandom y se formatean con NumPy, sin un uuid.uuid4() por fila.
+"""
+import os
+from itertools import chain, count
+
+import numpy as np
+
+_HEX = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+# Posición de cada byte (dos dígitos hexadecimales) dentro del texto de 38 caracteres
+_POSICIONES = np.array([1, 3, 5, 7, 10, 12, 15, 17, 20, 22, 25, 27, 29, 31, 33, 35])
+
+
+def generar_guids(n):
+    """
+    Genera `n` GUID aleatorios.
+
+    Retorna:
+        np.ndarray: Arreglo object de textos "{...}" de 38 caracteres.
+    """
+    if n <= 0:
+        return np.empty(0, dtype=object)
+
+    crudo = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    crudo[:, 6] = (crudo[:, 6] & 0x0F) | 0x40  # versión 4
+    crudo[:, 8] = (crudo[:, 8] & 0x3F) | 0x80  # variante RFC 4122
+
+    texto = np.empty((n, 38), dtype=np.uint8)
+    texto[:, 0] = ord("{")
+    texto[:, [9, 14, 19, 24]] = ord("-")
+    texto[:, 37] = ord("}")
+    texto[:, _POSICIONES] = _HEX[crudo >> 4]
+    texto[:, _POSICIONES + 1] = _HEX[crudo & 0x0F]
+
+    return texto.view("S38").ravel().astype("U38").astype(object)
+
+
+def guids_por_demanda(tamano_bloque=1024):
+    """
+    Iterador infinito de GUID generados por bloques de `tamano_bloque` a
+    medida que se consumen: útil cuando no se sabe de antemano cuántas filas
+    los necesitan (por ejemplo, solo las que tienen el campo vacío).
+    """
+    return chain.from_iterable(generar_guids(tamano_bloque) for _ in count())
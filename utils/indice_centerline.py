@@ -0,0 +1,277 @@
+# utils/indice_centerline.py
+"""
+Índice espacial persistente de segmentos del P_centerline.
+
+Los segmentos de todas las rutas se guardan en una malla uniforme ordenada por
+(ruta, celda). Cada consulta "segmentos cerca de este punto en la ruta X" es
+una búsqueda binaria sobre ese orden, O(log n).
+
+El índice se guarda en disco como arreglos .npy independientes y se abre con
+mmap, de modo que varios procesos comparten las mismas páginas en memoria.
+La clave de caché combina la ruta del centerline y su sello de modificación.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+
+# Bits por eje de la llave de celda: (ruta << 42) | (ix << 21) | iy
+_BITS_EJE = 21
+_MAX_EJE = (1 << _BITS_EJE) - 1
+
+# Máximo de celdas vecinas a revisar por punto antes de recorrer la ruta completa
+MAX_CELDAS_CONSULTA = 81
+
+_ARREGLOS = ("rutas", "offsets", "segmentos", "celdas", "celda_seg")
+
+
+# -------------------------------------------------------------------
+# 🔑 Clave de caché
+# -------------------------------------------------------------------
+def sello_centerline(route):
+    """
+    Sello de modificación del centerline: fecha de modificación más reciente
+    de la geodatabase (o del archivo) que lo contiene.
+
+    Retorna None si la fuente no está en disco (por ejemplo, una conexión .sde).
+    """
+    ruta = os.path.abspath(route)
+    contenedor = ruta
+    while contenedor and not os.path.exists(contenedor):
+        padre = os.path.dirname(contenedor)
+        if padre == contenedor:
+            return None
+        contenedor = padre
+
+    if contenedor.lower().endswith(".sde"):
+        return None
+    if os.path.isfile(contenedor):
+        return os.path.getmtime(contenedor)
+    return max((e.stat().st_mtime for e in os.scandir(contenedor) if e.is_file()), default=os.path.getmtime(contenedor))
+
+
+def clave_centerline(route, *extra):
+    """
+    Clave de caché: ruta absoluta + sello de modificación (+ parámetros extra).
+
+    Retorna None cuando el centerline no tiene sello (no se cachea).
+    """
+    sello = sello_centerline(route)
+    if sello is None:
+        return None
+    texto = "|".join([os.path.normcase(os.path.abspath(route)), repr(sello)] + [repr(e) for e in extra])
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------------------
+# 🏗️ Construcción
+# -------------------------------------------------------------------
+def segmentos_de_vertices(vx, vy, vm):
+    """Segmentos (x0, y0, x1, y1, m0, m1) válidos de una polilínea con partes separadas por NaN."""
+    vx = np.asarray(vx, dtype="float64")
+    vy = np.asarray(vy, dtype="float64")
+    vm = np.asarray(vm, dtype="float64")
+    if vx.size < 2:
+        return np.empty((0, 6))
+    seg = np.column_stack([vx[:-1], vy[:-1], vx[1:], vy[1:], vm[:-1], vm[1:]])
+    validos = np.isfinite(seg[:, :4]).all(axis=1)
+    return seg[validos]
+
+
+def construir_indice(rutas, tamano_celda=None):
+    """
+    Construye el índice de segmentos a partir de los vértices de las rutas.
+
+    Parámetros:
+        rutas (dict): {ENGROUTEID: (vx, vy, vm)}.
+        tamano_celda (float): Lado de la celda de la malla. Por defecto, el
+            doble de la mediana de la extensión de los segmentos.
+
+    Retorna:
+        dict: Arreglos del índice y parámetros de la malla.
+    """
+    ids = np.asarray(sorted(str(r) for r in rutas), dtype=str)
+    bloques = [segmentos_de_vertices(*rutas[r]) for r in ids]
+    conteo = np.array([len(b) for b in bloques], dtype="int64")
+    offsets = np.concatenate([[0], np.cumsum(conteo)]).astype("int64")
+    segmentos = np.concatenate(bloques) if bloques else np.empty((0, 6))
+    seg_ruta = np.repeat(np.arange(ids.size, dtype="int64"), conteo)
+
+    xmin = np.minimum(segmentos[:, 0], segmentos[:, 2])
+    xmax = np.maximum(segmentos[:, 0], segmentos[:, 2])
+    ymin = np.minimum(segmentos[:, 1], segmentos[:, 3])
+    ymax = np.maximum(segmentos[:, 1], segmentos[:, 3])
+
+    if len(segmentos):
+        origen = (float(xmin.min()), float(ymin.min()))
+        if tamano_celda is None:
+            extension = np.maximum(xmax - xmin, ymax - ymin)
+            tamano_celda = 2.0 * float(np.median(extension[extension > 0])) if (extension > 0).any() else 1.0
+    else:
+        origen = (0.0, 0.0)
+        tamano_celda = tamano_celda or 1.0
+
+    # Cada segmento se registra en todas las celdas que cubre su envolvente
+    ix0 = _celda(xmin, origen[0], tamano_celda)
+    ix1 = _celda(xmax, origen[0], tamano_celda)
+    iy0 = _celda(ymin, origen[1], tamano_celda)
+    iy1 = _celda(ymax, origen[1], tamano_celda)
+    nx = ix1 - ix0 + 1
+    ny = iy1 - iy0 + 1
+    por_segmento = nx * ny
+
+    celda_seg = np.repeat(np.arange(len(segmentos), dtype="int64"), por_segmento)
+    inicio = np.repeat(np.cumsum(por_segmento) - por_segmento, por_segmento)
+    pos = np.arange(celda_seg.size, dtype="int64") - inicio
+    ny_rep = ny[celda_seg]
+    ix = ix0[celda_seg] + pos // ny_rep
+    iy = iy0[celda_seg] + pos % ny_rep
+    celdas = _llave(seg_ruta[celda_seg], ix, iy)
+
+    orden = np.argsort(celdas, kind="stable")
+    return {
+        "rutas": ids,
+        "offsets": offsets,
+        "segmentos": segmentos,
+        "celdas": celdas[orden],
+        "celda_seg": celda_seg[orden],
+        "tamano_celda": float(tamano_celda),
+        "origen": origen,
+    }
+
+
+def _celda(valor, origen, tamano_celda):
+    return np.clip(np.floor((valor - origen) / tamano_celda), 0, _MAX_EJE).astype("int64")
+
+
+def _llave(ruta, ix, iy):
+    return (ruta << (2 * _BITS_EJE)) | (ix << _BITS_EJE) | iy
+
+
+# -------------------------------------------------------------------
+# 💾 Persistencia
+# -------------------------------------------------------------------
+def directorio_indice(clave):
+    """Directorio de caché del índice para una clave dada."""
+    return os.path.join(DIRECTORIO_CACHE, f"indice_{clave}")
+
+
+def guardar_arreglos(directorio, arreglos, meta):
+    """
+    Guarda un conjunto de arreglos .npy y su meta.json en `directorio`
+    (se escribe en un directorio temporal y luego se reemplaza).
+    """
+    temporal = f"{directorio}.tmp{os.getpid()}"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    for nombre, arreglo in arreglos.items():
+        np.save(os.path.join(temporal, f"{nombre}.npy"), arreglo)
+    with open(os.path.join(temporal, "meta.json"), "w", encoding="utf-8") as archivo:
+        json.dump(meta, archivo)
+
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+
+
+def abrir_arreglos(directorio, nombres):
+    """
+    Abre con memoria mapeada los arreglos guardados por guardar_arreglos.
+
+    Retorna:
+        tuple(dict, dict) | None: Arreglos y meta, o None si no existen en disco.
+    """
+    meta_path = os.path.join(directorio, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as archivo:
+        meta = json.load(archivo)
+    arreglos = {nombre: np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode="r") for nombre in nombres}
+    return arreglos, meta
+
+
+def guardar_indice(indice, directorio):
+    """Guarda el índice en disco."""
+    guardar_arreglos(
+        directorio,
+        {nombre: indice[nombre] for nombre in _ARREGLOS},
+        {"tamano_celda": indice["tamano_celda"], "origen": list(indice["origen"])},
+    )
+
+
+def abrir_indice(directorio):
+    """
+    Abre un índice guardado con memoria mapeada.
+
+    Retorna:
+        dict | None: El índice, o None si no existe en disco.
+    """
+    guardado = abrir_arreglos(directorio, _ARREGLOS)
+    if guardado is None:
+        return None
+    indice, meta = guardado
+    indice["tamano_celda"] = meta["tamano_celda"]
+    indice["origen"] = tuple(meta["origen"])
+    return indice
+
+
+# -------------------------------------------------------------------
+# 🔍 Consultas
+# -------------------------------------------------------------------
+def posicion_rutas(indice, ids_ruta):
+    """Posición de cada ENGROUTEID dentro del índice (-1 si no existe)."""
+    rutas = indice["rutas"]
+    ids = np.asarray(ids_ruta, dtype=object).astype(str)
+    if rutas.size == 0:
+        return np.full(ids.size, -1, dtype="int64")
+    pos = np.clip(np.searchsorted(rutas, ids), 0, rutas.size - 1)
+    return np.where(rutas[pos] == ids, pos, -1).astype("int64")
+
+
+def candidatos(indice, ridx, px, py, radio):
+    """
+    Pares (punto, segmento) candidatos dentro de `radio` para cada punto en su ruta.
+
+    Parámetros:
+        indice (dict): Índice de segmentos.
+        ridx (array): Posición de la ruta de cada punto (ver posicion_rutas).
+        px, py (array): Coordenadas de los puntos.
+        radio (float): Radio de búsqueda.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray) | None: Posición del punto y del segmento
+        de cada par, o None si el radio cubre demasiadas celdas (el llamador
+        debe recorrer la ruta completa).
+    """
+    tamano = indice["tamano_celda"]
+    anillos = int(np.ceil(radio / tamano))
+    if (2 * anillos + 1) ** 2 > MAX_CELDAS_CONSULTA:
+        return None
+
+    px = np.asarray(px, dtype="float64")
+    py = np.asarray(py, dtype="float64")
+    validos = (ridx >= 0) & np.isfinite(px) & np.isfinite(py)
+    puntos = np.flatnonzero(validos)
+    ix = _celda(px[puntos], indice["origen"][0], tamano)
+    iy = _celda(py[puntos], indice["origen"][1], tamano)
+
+    desp = np.arange(-anillos, anillos + 1)
+    dix, diy = (a.ravel() for a in np.meshgrid(desp, desp))
+    vx = np.clip(ix[:, None] + dix, 0, _MAX_EJE)
+    vy = np.clip(iy[:, None] + diy, 0, _MAX_EJE)
+    llaves = _llave(ridx[puntos][:, None], vx, vy).ravel()
+
+    celdas = indice["celdas"]
+    lo = np.searchsorted(celdas, llaves, side="left")
+    hi = np.searchsorted(celdas, llaves, side="right")
+    cuenta = hi - lo
+
+    punto = np.repeat(np.repeat(puntos, dix.size), cuenta)
+    inicio = np.repeat(lo, cuenta)
+    pos = np.arange(punto.size, dtype="int64") - np.repeat(np.cumsum(cuenta) - cuenta, cuenta)
+    segmento = np.asarray(indice["celda_seg"][inicio + pos])
+    return punto, segmento
+
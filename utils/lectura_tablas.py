@@ -0,0 +1,182 @@
+# utils/lectura_tablas.py
+"""
+Lectura columnar de tablas y feature classes.
+
+Solo se leen los campos pedidos (sin SHAPE ni el resto de columnas del Excel)
+con arcpy.da.TableToNumPyArray, que entrega un arreglo estructurado con el
+tipo de cada campo; el DataFrame se arma columna por columna, sin pasar por
+una lista de tuplas de Python. Los textos muy repetidos (ENGROUTEID, número de
+contrato, ...) se pueden leer como categóricos: un código entero por fila y
+cada valor distinto una sola vez.
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.metadatos import describir, listar_campos
+
+# Filas por trozo al codificar una columna categórica
+TAMANO_TROZO_CATEGORIAS = 100_000
+
+# Valor centinela para los nulos de cada tipo de campo (TableToNumPyArray no
+# admite nulos en enteros, textos ni fechas); se reemplaza al armar el DataFrame
+NULOS_POR_TIPO = {
+    "SmallInteger": -32768,
+    "Integer": -2147483648,
+    "BigInteger": -9223372036854775808,
+    "Double": np.nan,
+    "Single": np.nan,
+    "String": "\x00",
+    "GUID": "\x00",
+    "GlobalID": "\x00",
+    "Date": datetime(1, 1, 1),
+}
+
+
+def resolver_campos(fc, campos):
+    """
+    Empareja los nombres pedidos con los campos del feature class (sin
+    distinguir mayúsculas). Los encabezados de Excel con espacios o tildes se
+    buscan también con el nombre que les asigna ArcGIS (ValidateFieldName).
+
+    Retorna:
+        tuple(list[tuple(str, arcpy.Field)], list[str]): Pares (nombre pedido,
+        campo) en el orden pedido y sin repetir, y nombres que no existen en `fc`.
+    """
+    import arcpy
+
+    por_nombre = {f.name.upper(): f for f in listar_campos(fc)}
+    encontrados, faltantes, vistos = [], [], set()
+    for campo in campos:
+        clave = campo.upper()
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        validado = arcpy.ValidateFieldName(campo, os.path.dirname(fc)).upper()
+        if clave in por_nombre or validado in por_nombre:
+            encontrados.append((campo, por_nombre.get(clave) or por_nombre[validado]))
+        else:
+            faltantes.append(campo)
+    return encontrados, faltantes
+
+
+def _categorica(valores, centinela):
+    """
+    Columna de texto del arreglo estructurado como categórica. Se codifica por
+    trozos, de modo que nunca hay un str de Python por cada fila de la columna.
+    """
+    trozos = [
+        pd.Categorical(valores[i:i + TAMANO_TROZO_CATEGORIAS].astype(object))
+        for i in range(0, valores.size, TAMANO_TROZO_CATEGORIAS)
+    ]
+    categorica = union_categoricals(trozos) if trozos else pd.Categorical([])
+
+    # NumPy descarta los "\x00" finales: el centinela de texto llega como ""
+    nulo = centinela.rstrip("\x00")
+    if nulo in categorica.categories:
+        categorica = categorica.remove_categories(nulo)
+    return categorica
+
+
+def _columna(valores, tipo, categorica=False):
+    """Convierte una columna del arreglo estructurado, devolviendo los centinelas a nulo."""
+    centinela = NULOS_POR_TIPO.get(tipo)
+    if categorica and valores.dtype.kind == "U":
+        return _categorica(valores, centinela)
+    if tipo in ("SmallInteger", "Integer", "BigInteger"):
+        return pd.arrays.IntegerArray(valores.astype("int64"), valores == centinela)
+    if tipo == "Date":
+        fechas = valores.astype("datetime64[us]")
+        fechas[fechas == np.datetime64(centinela, "us")] = np.datetime64("NaT")
+        return fechas
+    if valores.dtype.kind == "U":
+        objetos = valores.astype(object)
+        objetos[valores == centinela] = None
+        return objetos
+    return valores
+
+
+def leer_tabla(fc, campos, where_clause=None, categorias=()):
+    """
+    Lee solo `campos` de `fc` en un DataFrame de columnas NumPy.
+
+    Parámetros:
+        fc (str): Tabla o feature class.
+        campos (list): Nombres de campo a leer. Los que no existen se omiten
+            con una advertencia.
+        where_clause (str): Filtro SQL opcional.
+        categorias (iterable): Campos de texto que se leen como categóricos.
+
+    Retorna:
+        pd.DataFrame: Una columna por campo encontrado, con el nombre pedido.
+    """
+    import arcpy
+
+    encontrados, faltantes = resolver_campos(fc, campos)
+    if faltantes:
+        print(f"⚠️ Campos no encontrados en {fc}: {faltantes}")
+
+    if not encontrados:
+        return pd.DataFrame()
+
+    nombres = [f.name for _, f in encontrados]
+    nulos = {f.name: NULOS_POR_TIPO[f.type] for _, f in encontrados if f.type in NULOS_POR_TIPO}
+    arreglo = arcpy.da.TableToNumPyArray(fc, nombres, where_clause, skip_nulls=False, null_value=nulos)
+
+    # Las columnas conservan el nombre pedido (el que usa el mapeo para renombrar)
+    categorias = {c.upper() for c in categorias}
+    return pd.DataFrame({
+        pedido: _columna(arreglo[f.name], f.type, pedido.upper() in categorias) for pedido, f in encontrados
+    })
+
+
+def leer_tabla_por_bloques(fc, campos, tamano_bloque, categorias=()):
+    """
+    Lee `campos` de `fc` en bloques de hasta `tamano_bloque` filas, por rangos
+    de OBJECTID resueltos en la base de datos. Solo los OID se leen completos
+    (8 bytes por fila); la memoria de cada bloque queda acotada por su tamaño.
+
+    Retorna:
+        generator[pd.DataFrame]: Un DataFrame por bloque (ver leer_tabla).
+    """
+    import arcpy
+
+    oids = np.sort(arcpy.da.TableToNumPyArray(fc, ["OID@"])["OID@"])
+    if oids.size == 0:
+        yield leer_tabla(fc, campos, categorias=categorias)
+        return
+
+    campo_oid = arcpy.AddFieldDelimiters(fc, describir(fc).OIDFieldName)
+    for inicio in range(0, oids.size, tamano_bloque):
+        desde = oids[inicio]
+        hasta = oids[min(inicio + tamano_bloque, oids.size) - 1]
+        yield leer_tabla(fc, campos, f"{campo_oid} >= {desde} AND {campo_oid} <= {hasta}", categorias)
+
+
+def copy_on_write_activo():
+    """Si pandas trabaja con Copy-on-Write (siempre en pandas >= 3; opcional en 2.x)."""
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def seleccionar_tabla(df_base, campos, extra=()):
+    """
+    Columnas de una tabla de salida tomadas de la lectura base y renombradas
+    según su mapeo. Con Copy-on-Write (pandas >= 3, o activado por el
+    programa principal en pandas 2.x; ver main.py) la selección comparte
+    memoria con `df_base` hasta que la tabla modifica una columna; sin él se
+    copia, de modo que las reglas de una tabla nunca modifican la lectura
+    base que usan las demás.
+
+    Parámetros:
+        df_base (pd.DataFrame): Lectura única de la cobertura.
+        campos (dict): Mapeo {campo origen: campo destino} de la tabla.
+        extra (iterable): Columnas adicionales sin renombrar (entradas de reglas).
+    """
+    columnas = [c for c in dict.fromkeys(list(campos) + list(extra)) if c in df_base.columns]
+    tabla = df_base[columnas].rename(columns=campos)
+    return tabla if copy_on_write_activo() else tabla.copy(deep=True)
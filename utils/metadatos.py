@@ -0,0 +1,80 @@
+# utils/metadatos.py
+"""
+Caché de metadatos de tablas, feature classes y conexiones.
+
+Describe, ListFields y las propiedades de conexión se consultan una sola vez
+por ruta durante la ejecución; las siguientes consultas se responden desde
+memoria sin volver a la base de datos. Después de cambiar el esquema de una
+tabla (AddField, Delete, CreateTable, ...) se debe llamar a invalidar(ruta).
+"""
+import os
+
+_DESCRIBE = {}
+_CAMPOS = {}
+_CONEXIONES = {}
+
+
+def _clave(ruta):
+    return os.path.normcase(os.path.normpath(ruta))
+
+
+def describir(ruta):
+    """Resultado de arcpy.Describe(ruta), memorizado por ruta."""
+    import arcpy
+
+    clave = _clave(ruta)
+    if clave not in _DESCRIBE:
+        _DESCRIBE[clave] = arcpy.Describe(ruta)
+    return _DESCRIBE[clave]
+
+
+def listar_campos(ruta):
+    """Resultado de arcpy.ListFields(ruta), memorizado por ruta."""
+    import arcpy
+
+    clave = _clave(ruta)
+    if clave not in _CAMPOS:
+        _CAMPOS[clave] = arcpy.ListFields(ruta)
+    return _CAMPOS[clave]
+
+
+def nombres_campos(ruta):
+    """Nombres de los campos de `ruta` en mayúsculas."""
+    return {f.name.upper() for f in listar_campos(ruta)}
+
+
+def propiedades_conexion(gdb):
+    """
+    Propiedades de la conexión a una geodatabase.
+
+    Retorna:
+        dict: {"tipo": workspaceType, "base": database, "usuario": user,
+        "prefijo": "<base>.DBO." en geodatabases enterprise, "" en las demás}.
+    """
+    clave = _clave(gdb)
+    if clave not in _CONEXIONES:
+        desc = describir(gdb)
+        cp = desc.connectionProperties
+        remota = desc.workspaceType == "RemoteDatabase"
+        _CONEXIONES[clave] = {
+            "tipo": desc.workspaceType,
+            "base": getattr(cp, "database", ""),
+            "usuario": getattr(cp, "user", ""),
+            "prefijo": cp.database + ".DBO." if remota else "",
+        }
+    return _CONEXIONES[clave]
+
+
+def invalidar(ruta=None):
+    """
+    Descarta los metadatos memorizados de `ruta` (o todos, sin ruta). Se usa
+    después de un cambio de esquema.
+    """
+    if ruta is None:
+        _DESCRIBE.clear()
+        _CAMPOS.clear()
+        _CONEXIONES.clear()
+        return
+    clave = _clave(ruta)
+    for cache in (_DESCRIBE, _CAMPOS, _CONEXIONES):
+        cache.pop(clave, None)
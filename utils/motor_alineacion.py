@@ -0,0 +1,442 @@
+# utils/motor_alineacion.py
+"""
+Motor de referenciación lineal en memoria (NumPy).
+
+Reemplaza la secuencia Select / LocateFeaturesAlongRoutes / AddJoin /
+CalculateField por ruta: los vértices M de cada ruta se cargan una sola vez
+en arreglos y todos los puntos de la ruta se proyectan sobre sus segmentos en
+una pasada vectorizada.
+
+El módulo no depende de arcpy: recibe arreglos de coordenadas planos, por lo
+que puede probarse con datos sintéticos.
+
+Convención de rutas:
+    rutas = {ENGROUTEID: (vx, vy, vm)}
+    Las rutas multiparte (o varias entidades con el mismo ENGROUTEID) se
+    concatenan separando cada parte con un vértice NaN; los segmentos que
+    tocan un NaN se descartan.
+"""
+import numpy as np
+
+from utils.indice_centerline import abrir_indice, segmentos_de_vertices, candidatos, posicion_rutas
+
+# Tamaño máximo de la matriz puntos × segmentos evaluada en cada bloque
+MAX_CELDAS_BLOQUE = 4_000_000
+
+# Elipsoide GRS 1980 (MAGNA-SIRGAS, EPSG:4686)
+SEMIEJE_MAYOR = 6378137.0
+EXCENTRICIDAD2 = (1 / 298.257222101) * (2 - 1 / 298.257222101)
+
+
+# -------------------------------------------------------------------
+# 📏 Marco métrico local
+# -------------------------------------------------------------------
+def _ecef(lon, lat):
+    """Coordenadas geocéntricas (m) de puntos sobre el elipsoide (altura 0)."""
+    lon = np.radians(lon)
+    lat = np.radians(lat)
+    sen_lat = np.sin(lat)
+    n = SEMIEJE_MAYOR / np.sqrt(1 - EXCENTRICIDAD2 * sen_lat * sen_lat)
+    return n * np.cos(lat) * np.cos(lon), n * np.cos(lat) * np.sin(lon), n * (1 - EXCENTRICIDAD2) * sen_lat
+
+
+def a_plano_local(lon, lat, lon0, lat0):
+    """
+    Convierte coordenadas geográficas (grados) al plano tangente local (Este,
+    Norte en metros) con origen en (lon0, lat0). Los orígenes pueden ser
+    escalares o arreglos (un origen por elemento).
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Coordenadas Este y Norte.
+    """
+    x, y, z = _ecef(lon, lat)
+    x0, y0, z0 = _ecef(lon0, lat0)
+    dx, dy, dz = x - x0, y - y0, z - z0
+    rl, rf = np.radians(lon0), np.radians(lat0)
+    este = -np.sin(rl) * dx + np.cos(rl) * dy
+    norte = -np.sin(rf) * np.cos(rl) * dx - np.sin(rf) * np.sin(rl) * dy + np.cos(rf) * dz
+    return este, norte
+
+
+def radio_en_grados(tolerancia, lat):
+    """
+    Radio de búsqueda en grados que cubre `tolerancia` metros en la latitud
+    más alejada del ecuador de `lat` (para consultar el índice en grados).
+    """
+    lat = np.asarray(lat, dtype="float64")
+    lat_max = np.nanmax(np.abs(lat)) if np.isfinite(lat).any() else 0.0
+    fi = np.radians(min(lat_max, 89.0))
+    w2 = 1 - EXCENTRICIDAD2 * np.sin(fi) ** 2
+    # Radios de curvatura meridiano (latitud) y del paralelo (longitud, N·cos φ)
+    meridiano = SEMIEJE_MAYOR * (1 - EXCENTRICIDAD2) / w2 ** 1.5
+    paralelo = SEMIEJE_MAYOR / np.sqrt(w2) * np.cos(fi)
+    metros_por_grado = np.radians(1.0) * min(meridiano, paralelo)
+    return float(tolerancia) / metros_por_grado
+
+
+def _segmentos_a_plano(px, py, seg, lon0, lat0):
+    """Puntos y segmentos (x0, y0, x1, y1, m0, m1) llevados al plano local de (lon0, lat0)."""
+    ex, ny = a_plano_local(px, py, lon0, lat0)
+    e0, n0 = a_plano_local(seg[..., 0], seg[..., 1], lon0, lat0)
+    e1, n1 = a_plano_local(seg[..., 2], seg[..., 3], lon0, lat0)
+    return ex, ny, np.stack([e0, n0, e1, n1, seg[..., 4], seg[..., 5]], axis=-1)
+
+
+def proyectar_en_ruta(px, py, vx, vy, vm, tolerancia, max_celdas=MAX_CELDAS_BLOQUE, geograficas=False):
+    """
+    Proyecta puntos sobre la polilínea M de una ruta y calcula su medida.
+
+    Parámetros:
+        px, py (array): Coordenadas de los puntos.
+        vx, vy, vm (array): Vértices de la ruta (X, Y, M), partes separadas por NaN.
+        tolerancia (float): Distancia máxima de búsqueda (unidades de las coordenadas).
+        max_celdas (int): Límite de la matriz puntos × segmentos por bloque.
+        geograficas (bool): Coordenadas en grados; distancia, tolerancia e
+            interpolación se calculan en metros sobre el plano local de la ruta.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Medidas (NaN fuera de tolerancia) y
+        distancia de cada punto al segmento más cercano.
+    """
+    return proyectar_en_segmentos(px, py, segmentos_de_vertices(vx, vy, vm), tolerancia, max_celdas, geograficas)
+
+
+def _geometria_pares(bx, by, seg):
+    """Parámetro t y distancia² de cada punto a cada segmento (con broadcasting)."""
+    x0, y0, x1, y1 = seg[..., 0], seg[..., 1], seg[..., 2], seg[..., 3]
+    dx = x1 - x0
+    dy = y1 - y0
+    largo2 = dx * dx + dy * dy
+    degenerado = largo2 == 0
+    t = ((bx - x0) * dx + (by - y0) * dy) / np.where(degenerado, 1.0, largo2)
+    t = np.where(degenerado, 0.0, np.clip(t, 0.0, 1.0))
+    ex = bx - (x0 + t * dx)
+    ey = by - (y0 + t * dy)
+    return t, ex * ex + ey * ey
+
+
+def proyectar_en_segmentos(px, py, seg, tolerancia, max_celdas=MAX_CELDAS_BLOQUE, geograficas=False):
+    """
+    Proyecta puntos sobre un conjunto de segmentos (x0, y0, x1, y1, m0, m1)
+    evaluando todos los pares por bloques. Con `geograficas` los puntos y
+    segmentos se llevan en una sola transformación al plano tangente local
+    centrado en el conjunto de segmentos.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Medidas y distancias.
+    """
+    px = np.asarray(px, dtype="float64")
+    py = np.asarray(py, dtype="float64")
+    seg = np.asarray(seg, dtype="float64")
+
+    n = px.size
+    medidas = np.full(n, np.nan)
+    distancias = np.full(n, np.nan)
+    if n == 0 or len(seg) == 0:
+        return medidas, distancias
+
+    if geograficas:
+        lon0 = float(np.mean(seg[:, [0, 2]]))
+        lat0 = float(np.mean(seg[:, [1, 3]]))
+        px, py, seg = _segmentos_a_plano(px, py, seg, lon0, lat0)
+
+    m0 = seg[:, 4]
+    dm = seg[:, 5] - seg[:, 4]
+    paso = max(1, max_celdas // len(seg))
+    for inicio in range(0, n, paso):
+        fin = min(inicio + paso, n)
+        bx = px[inicio:fin, None]
+        by = py[inicio:fin, None]
+        t, d2 = _geometria_pares(bx, by, seg)
+
+        # Puntos sin coordenadas: se dejan en NaN
+        finitos = np.isfinite(bx[:, 0]) & np.isfinite(by[:, 0])
+        j = np.argmin(np.where(np.isfinite(d2), d2, np.inf), axis=1)
+        filas = np.arange(fin - inicio)
+
+        d = np.sqrt(d2[filas, j])
+        m = m0[j] + t[filas, j] * dm[j]
+        dentro = finitos & (d <= tolerancia)
+
+        medidas[inicio:fin] = np.where(dentro, m, np.nan)
+        distancias[inicio:fin] = np.where(finitos, d, np.nan)
+
+    return medidas, distancias
+
+
+def proyectar_en_pares(px, py, seg, punto, segmento, tolerancia, geograficas=False):
+    """
+    Proyecta cada punto sobre sus segmentos candidatos (pares punto-segmento
+    entregados por el índice) y conserva el más cercano. Con `geograficas`
+    cada par se evalúa en metros sobre el plano local del inicio del segmento.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Medidas y distancias (NaN sin candidatos).
+    """
+    px = np.asarray(px, dtype="float64")
+    py = np.asarray(py, dtype="float64")
+    medidas = np.full(px.size, np.nan)
+    distancias = np.full(px.size, np.nan)
+    if punto.size == 0:
+        return medidas, distancias
+
+    s = np.asarray(seg[segmento], dtype="float64")
+    bx, by = px[punto], py[punto]
+    if geograficas:
+        bx, by, s = _segmentos_a_plano(bx, by, s, s[:, 0], s[:, 1])
+    t, d2 = _geometria_pares(bx, by, s)
+
+    # Par más cercano por punto: ordenar por (punto, d²) y tomar el primero
+    orden = np.lexsort((d2, punto))
+    primero = np.ones(orden.size, dtype=bool)
+    primero[1:] = punto[orden][1:] != punto[orden][:-1]
+    mejor = orden[primero]
+
+    d = np.sqrt(d2[mejor])
+    m = s[mejor, 4] + t[mejor] * (s[mejor, 5] - s[mejor, 4])
+    destino = punto[mejor]
+    medidas[destino] = np.where(d <= tolerancia, m, np.nan)
+    distancias[destino] = d
+    return medidas, distancias
+
+
+def agrupar_por_ruta(ids_ruta):
+    """
+    Agrupa posiciones por ENGROUTEID.
+
+    Retorna:
+        dict: {ENGROUTEID: np.ndarray de posiciones}, en orden de aparición.
+    """
+    claves = np.asarray(ids_ruta, dtype=object).astype(str)
+    if claves.size == 0:
+        return {}
+    unicos, primera, inverso = np.unique(claves, return_index=True, return_inverse=True)
+    orden = np.argsort(inverso, kind="stable")
+    cortes = np.cumsum(np.bincount(inverso, minlength=unicos.size))[:-1]
+    grupos = np.split(orden, cortes)
+    return {str(unicos[i]): grupos[i] for i in np.argsort(primera)}
+
+
+def alinear_puntos(ids_ruta, px, py, rutas, tolerancia, indice=None, geograficas=False):
+    """
+    Calcula ENGM para un conjunto de puntos contra sus rutas.
+
+    Parámetros:
+        ids_ruta (array): ENGROUTEID de cada punto.
+        px, py (array): Coordenadas de los puntos.
+        rutas (dict): {ENGROUTEID: (vx, vy, vm)}. Se ignora si se entrega `indice`.
+        tolerancia (float): Distancia máxima de búsqueda.
+        indice (dict): Índice de segmentos (utils.indice_centerline), opcional.
+        geograficas (bool): Coordenadas en grados (EPSG:4686); la tolerancia y
+            las distancias se expresan en metros.
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Medidas y distancias alineadas con la entrada.
+    """
+    px = np.asarray(px, dtype="float64")
+    py = np.asarray(py, dtype="float64")
+    if indice is not None:
+        return _alinear_con_indice(ids_ruta, px, py, indice, tolerancia, geograficas)
+
+    medidas = np.full(px.size, np.nan)
+    distancias = np.full(px.size, np.nan)
+
+    for rguid, posiciones in agrupar_por_ruta(ids_ruta).items():
+        ruta = rutas.get(rguid)
+        if ruta is None:
+            continue
+        vx, vy, vm = ruta
+        m, d = proyectar_en_ruta(px[posiciones], py[posiciones], vx, vy, vm, tolerancia, geograficas=geograficas)
+        medidas[posiciones] = m
+        distancias[posiciones] = d
+
+    return medidas, distancias
+
+
+def _alinear_con_indice(ids_ruta, px, py, indice, tolerancia, geograficas=False):
+    """Alinea usando los candidatos del índice; recorre la ruta completa si el radio es muy grande."""
+    return _alinear_posiciones(posicion_rutas(indice, ids_ruta), px, py, indice, tolerancia, geograficas)
+
+
+def _alinear_posiciones(ridx, px, py, indice, tolerancia, geograficas=False):
+    """Como _alinear_con_indice, recibiendo la posición de la ruta en el índice."""
+    radio = radio_en_grados(tolerancia, py) if geograficas else tolerancia
+    pares = candidatos(indice, ridx, px, py, radio)
+    if pares is not None:
+        return proyectar_en_pares(px, py, indice["segmentos"], pares[0], pares[1], tolerancia, geograficas)
+
+    medidas = np.full(px.size, np.nan)
+    distancias = np.full(px.size, np.nan)
+    offsets = indice["offsets"]
+    for pos in np.unique(ridx[ridx >= 0]):
+        posiciones = np.flatnonzero(ridx == pos)
+        seg = indice["segmentos"][offsets[pos]:offsets[pos + 1]]
+        m, d = proyectar_en_segmentos(px[posiciones], py[posiciones], seg, tolerancia, geograficas=geograficas)
+        medidas[posiciones] = m
+        distancias[posiciones] = d
+    return medidas, distancias
+
+
+def ruta_mas_cercana(indice, px, py, tolerancia, max_celdas=MAX_CELDAS_BLOQUE, geograficas=False):
+    """
+    ENGROUTEID de la ruta más cercana a cada punto, sin restringir por la
+    ruta declarada (None si ninguna ruta queda dentro de `tolerancia`).
+    """
+    px = np.asarray(px, dtype="float64")
+    py = np.asarray(py, dtype="float64")
+    resultado = np.full(px.size, None, dtype=object)
+    offsets = np.asarray(indice["offsets"])
+    con_segmentos = np.flatnonzero(np.diff(offsets) > 0)
+    if px.size == 0 or con_segmentos.size == 0:
+        return resultado
+
+    # Envolvente de cada ruta para preseleccionar pares punto-ruta
+    radio = radio_en_grados(tolerancia, py) if geograficas else tolerancia
+    seg = indice["segmentos"]
+    inicios = offsets[con_segmentos]
+    xmin = np.minimum.reduceat(np.minimum(seg[:, 0], seg[:, 2]), inicios) - radio
+    xmax = np.maximum.reduceat(np.maximum(seg[:, 0], seg[:, 2]), inicios) + radio
+    ymin = np.minimum.reduceat(np.minimum(seg[:, 1], seg[:, 3]), inicios) - radio
+    ymax = np.maximum.reduceat(np.maximum(seg[:, 1], seg[:, 3]), inicios) + radio
+
+    paso = max(1, max_celdas // con_segmentos.size)
+    for inicio in range(0, px.size, paso):
+        bx = px[inicio:inicio + paso, None]
+        by = py[inicio:inicio + paso, None]
+        punto, ruta = np.nonzero((bx >= xmin) & (bx <= xmax) & (by >= ymin) & (by <= ymax))
+        if punto.size == 0:
+            continue
+        ridx = con_segmentos[ruta]
+        _, d = _alinear_posiciones(ridx, bx[punto, 0], by[punto, 0], indice, tolerancia, geograficas)
+
+        valido = np.isfinite(d) & (d <= tolerancia)
+        punto, ridx, d = punto[valido], ridx[valido], d[valido]
+        orden = np.lexsort((d, punto))
+        primero = np.ones(orden.size, dtype=bool)
+        primero[1:] = punto[orden][1:] != punto[orden][:-1]
+        mejor = orden[primero]
+        resultado[inicio + punto[mejor]] = np.asarray(indice["rutas"])[ridx[mejor]].astype(object)
+    return resultado
+
+
+def banderas_lineas(desde, hasta, ruta_ini=None, ruta_fin=None):
+    """
+    Marca las líneas con medidas invertidas (ENGFROMM > ENGTOM) o cuyos
+    extremos caen sobre rutas distintas.
+
+    Retorna:
+        np.ndarray: Texto de alerta por línea (None si no hay alerta).
+    """
+    desde = np.asarray(desde, dtype="float64")
+    hasta = np.asarray(hasta, dtype="float64")
+    alertas = np.full(desde.size, None, dtype=object)
+
+    with np.errstate(invalid="ignore"):
+        invertida = desde > hasta
+    alertas[invertida] = "MEDIDAS_INVERTIDAS"
+
+    if ruta_ini is not None and ruta_fin is not None:
+        ruta_ini = np.asarray(ruta_ini, dtype=object)
+        ruta_fin = np.asarray(ruta_fin, dtype=object)
+        distintas = (ruta_ini != None) & (ruta_fin != None) & (ruta_ini != ruta_fin)
+        alertas[distintas & ~invertida] = "RUTAS_DISTINTAS"
+        alertas[distintas & invertida] = "MEDIDAS_INVERTIDAS;RUTAS_DISTINTAS"
+    return alertas
+
+
+def alinear_lineas(ids_ruta, x_ini, y_ini, x_fin, y_fin, rutas, tolerancia, indice=None, geograficas=False):
+    """
+    Calcula ENGFROMM / ENGTOM localizando los dos extremos de cada línea en
+    una sola pasada, y marca las líneas con medidas invertidas o extremos
+    sobre rutas distintas (esto último solo con `indice`).
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray, np.ndarray): Medidas de inicio, de fin y alertas.
+    """
+    n = np.asarray(x_ini).size
+    ids = np.asarray(ids_ruta, dtype=object)
+    px = np.concatenate([np.asarray(x_ini, dtype="float64"), np.asarray(x_fin, dtype="float64")])
+    py = np.concatenate([np.asarray(y_ini, dtype="float64"), np.asarray(y_fin, dtype="float64")])
+
+    medidas, _ = alinear_puntos(np.concatenate([ids, ids]), px, py, rutas, tolerancia, indice, geograficas)
+    desde, hasta = medidas[:n], medidas[n:]
+
+    if indice is None:
+        return desde, hasta, banderas_lineas(desde, hasta)
+    cercanas = ruta_mas_cercana(indice, px, py, tolerancia, geograficas=geograficas)
+    return desde, hasta, banderas_lineas(desde, hasta, cercanas[:n], cercanas[n:])
+
+
+def repartir_por_ruta(ids_ruta, partes):
+    """
+    Reparte las posiciones en `partes` bloques balanceados sin dividir rutas
+    (asignación greedy: la ruta más grande va al bloque con menos filas).
+
+    Retorna:
+        list[list[str]]: ENGROUTEID de cada bloque (bloques vacíos omitidos).
+    """
+    grupos = agrupar_por_ruta(ids_ruta)
+    cargas = np.zeros(max(1, int(partes)), dtype="int64")
+    bloques = [[] for _ in range(cargas.size)]
+    for rguid in sorted(grupos, key=lambda r: (-grupos[r].size, r)):
+        destino = int(np.argmin(cargas))
+        bloques[destino].append(rguid)
+        cargas[destino] += grupos[rguid].size
+    return [b for b in bloques if b]
+
+
+# -------------------------------------------------------------------
+# ⚙️ Procesos de trabajo
+# -------------------------------------------------------------------
+def medidas_cobertura(datos, tipo, tolerancia, indice, geograficas=False):
+    """
+    Calcula las medidas de `datos` (ver utils.alineacion.leer_cobertura).
+    Con `geograficas` la tolerancia y las distancias se manejan en metros.
+
+    Retorna:
+        list[np.ndarray]: [ENGM] para puntos o [ENGFROMM, ENGTOM, alertas] para líneas.
+    """
+    if tipo == "Polyline":
+        desde, hasta, alertas = alinear_lineas(
+            datos["ruta"], datos["x_ini"], datos["y_ini"], datos["x_fin"], datos["y_fin"],
+            None, tolerancia, indice, geograficas
+        )
+        return [desde, hasta, alertas]
+    medidas, _ = alinear_puntos(datos["ruta"], datos["x"], datos["y"], None, tolerancia, indice, geograficas)
+    return [medidas]
+
+
+def alinear_bloque(tarea):
+    """
+    Alinea un bloque de rutas en un proceso de trabajo.
+
+    Es el punto de entrada del pool de procesos de utils.alineacion para este
+    motor: vive aquí, sin arcpy, para que los procesos no importen arcpy (ni
+    tomen una licencia) solo para alinear con NumPy. El índice se abre con
+    mmap desde el directorio `tarea["indice"]`.
+
+    Retorna:
+        tuple(np.ndarray, list[np.ndarray]): Posición de cada fila en el
+        bloque original y medidas del bloque.
+    """
+    indice = abrir_indice(tarea["indice"])
+    medidas = medidas_cobertura(tarea["datos"], tarea["tipo"], tarea["tolerancia"], indice, tarea["geograficas"])
+    return tarea["posiciones"], medidas
+
+
+def unir_bloques(resultados, n_medidas):
+    """
+    Une los resultados de los bloques (identificador de cada fila y medidas)
+    ordenados por identificador, de modo que la unión no depende del orden
+    en que terminan los procesos.
+
+    Retorna:
+        tuple(np.ndarray, list[np.ndarray]): Identificadores y medidas ordenados.
+    """
+    ids = np.concatenate([r[0] for r in resultados]) if resultados else np.empty(0, dtype="int64")
+    medidas = [
+        np.concatenate([r[1][i] for r in resultados]) if resultados else np.empty(0)
+        for i in range(n_medidas)
+    ]
+    orden = np.argsort(ids, kind="stable")
+    return ids[orden], [m[orden] for m in medidas]
@@ -1,104 +1,35 @@
+import json
+import os
+from functools import lru_cache
+
 import pandas as pd
-import numpy as np
-from datetime import datetime
 
-def aplicar_reglas_dcvg(df):
-    """
-    Aplica las reglas específicas de la temática DCVG al DataFrame.
-    Convierte, agrega y duplica columnas según la lógica original de DCVG.
-    """
-    if df.empty:
-        return df
-
-    # -------------------------------------------------
-    # Campos de agrupación (fijos para DCVG)
-    campos_agrupacion = ["ENGROUTEID", "CONTRACTNUMBER"]
-
-    # -------------------------------------------------
-    # Reglas de conversión fijas para DCVG
-    reglas_conversion = {
-        "ENGM": {
-            "min": "ENGFROMM",
-            "max": "ENGTOM"
-        },
-        "Fecha_de_Inspección": {
-            "min": "INSPECTIONSTARTDATE",
-            "max": ["INSPECTIONENDDATE", "FROMDATE"]
-        }
-    }
+from utils.reglas.motor_reglas import aplicar_plan, contexto_reglas, plan_tabla
 
-    # -------------------------------------------------
-    # Preparación de las reglas para pandas
-    reglas_agg = {}
-    duplicados = {}
-    for columna, operaciones in reglas_conversion.items():
-        if columna not in df.columns:
-            print(f"⚠️ Columna '{columna}' no encontrada en DF. Se omite.")
-            continue
+# Mapeo de la temática: única fuente de las reglas de DCVG (clave "reglas")
+ARCHIVO_MAPEO_DCVG = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mapeos", "dcvg.json")
 
-        for operacion, nombres_salida in operaciones.items():
-            if not isinstance(nombres_salida, list):
-                nombres_salida = [nombres_salida]
 
-            nombre_principal = nombres_salida[0]
-            reglas_agg.setdefault(columna, {})[operacion] = nombre_principal
+@lru_cache(maxsize=None)
+def _mapeo_dcvg():
+    with open(ARCHIVO_MAPEO_DCVG, "r", encoding="utf-8") as archivo:
+        return json.load(archivo)
 
-            if len(nombres_salida) > 1:
-                duplicados[nombre_principal] = nombres_salida[1:]
 
-    if not reglas_agg:
-        print("⚠️ No se construyeron reglas de conversión válidas.")
-        return df
+def aplicar_reglas_dcvg(df, mapeo_tematica=None):
+    """
+    Aplica las reglas específicas de la temática DCVG al DataFrame.
+    Convierte, agrega y duplica columnas según la lógica original de DCVG.
+
+    Las reglas se toman de la tabla principal del mapeo (utils/mapeos/dcvg.json
+    si no se pasa `mapeo_tematica`) y se ejecutan con el motor de reglas
+    (ver utils.reglas.motor_reglas).
+    """
+    mapeo_tematica = mapeo_tematica or _mapeo_dcvg()
+    plan = plan_tabla(mapeo_tematica["tabla_principal"])
+    return aplicar_plan(df, plan, contexto_reglas(mapeo_tematica))
 
-    # Formato para pandas agg()
-    reglas_pandas = {col: list(ops.keys()) for col, ops in reglas_agg.items()}
 
-    # -------------------------------------------------
-    # Aplicar agregación
-    if all(c in df.columns for c in campos_agrupacion):
-        df_agg = df.groupby(campos_agrupacion).agg(reglas_pandas).reset_index()
-    else:
-        df_agg = df.agg(reglas_pandas).to_frame().T
-
-    # Aplanar MultiIndex si existe
-    df_agg.columns = ['_'.join(col).strip('_') if isinstance(col, tuple) else col for col in df_agg.columns]
-
-    # Renombrar columnas según reglas
-    renombres = {f"{col}_{op}": nuevo for col, ops in reglas_agg.items() for op, nuevo in ops.items()}
-    df_agg = df_agg.rename(columns=renombres)
-
-    # Duplicar columnas si aplica
-    for col_origen, nuevas in duplicados.items():
-        if col_origen in df_agg.columns:
-            for nueva in nuevas:
-                df_agg[nueva] = df_agg[col_origen]
-
-    # -------------------------------------------------
-    # Columnas adicionales de fecha y control
-    from datetime import datetime
-    fecha_cargue = datetime.now().strftime("%Y-%m-%d %H:%M")
-    df_agg['FECHA_CARGUE'] = fecha_cargue
-    df_agg['CREATIONDATE'] = fecha_cargue
-    df_agg['LASTUPDATE'] = fecha_cargue
-    df_agg['CREATOR'] = 'usuario_pruebas'
-    df_agg['UPDATEDBY'] = 'usuario_pruebas'
-    df_agg['INSPECTIONTYPE'] = "DCVG"
-    df_agg['DATYPE'] = "Direct Current Voltage Gradient"
-
-    return df_agg
-
-def reglas_dcvg_secundario(df_secundario, CURRENT_USER, mapeo_tematica):
-    """Aplica las reglas específicas para la tabla secundaria de DCVG."""
-    fecha_cargue = datetime.now().strftime("%Y-%m-%d %H:%M")
-
-    df_secundario['FECHA_CARGUE'] = fecha_cargue
-    df_secundario['CREATIONDATE'] = fecha_cargue
-    df_secundario['LASTUPDATE'] = fecha_cargue
-    df_secundario['CREATOR'] = CURRENT_USER
-    df_secundario['UPDATEDBY'] = CURRENT_USER
-    df_secundario['DATYPE'] = mapeo_tematica.get("datype", "")
-
-    return df_secundario
 def aplicar_reglas_conversiones(df):
     """Aplica conversiones específicas para DCVG."""
     # Conversión de ENGM → ENGFROMM / ENGTOM
@@ -0,0 +1,185 @@
+# utils/reglas/motor_reglas.py
+"""
+Motor de reglas de agregación declarativas.
+
+Las reglas de cada tabla se definen en el mapeo JSON de la temática, en la
+clave "reglas" de la tabla:
+
+    "reglas": {
+        "agrupacion": ["ENGROUTEID", "CONTRACTNUMBER"],
+        "conversiones": {
+            "ENGM": {"min": "ENGFROMM", "max": "ENGTOM"},
+            "Fecha_de_Inspección": {"min": "INSPECTIONSTARTDATE", "max": ["INSPECTIONENDDATE", "FROMDATE"]}
+        },
+        "constantes": {"INSPECTIONTYPE": "{inspection_type}", "CREATIONDATE": "{fecha_cargue}"}
+    }
+
+Cada conversión es columna → {operación: campo de salida}; con una lista de
+salidas, la primera se calcula y las demás son copias. Las constantes admiten
+los marcadores {fecha_cargue}, {usuario} y las claves de texto del mapeo.
+
+Las reglas se compilan una sola vez en un plan (un único groupby con
+agregaciones con nombre) que se reutiliza en cada cargue y en cada bloque.
+"""
+import json
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Operaciones soportadas → cómo se combinan los resultados parciales de varios bloques
+OPERACIONES = {
+    "min": "min",
+    "max": "max",
+    "first": "first",
+    "last": "last",
+    "count": "sum",
+    "sum": "sum",
+}
+
+
+@lru_cache(maxsize=None)
+def _compilar(texto_reglas):
+    reglas = json.loads(texto_reglas)
+    agregaciones = {}
+    duplicados = {}
+    for columna, operaciones in reglas.get("conversiones", {}).items():
+        for operacion, nombres_salida in operaciones.items():
+            if operacion not in OPERACIONES:
+                raise ValueError(f"❌ Operación de agregación no soportada: {operacion} ({columna})")
+            if not isinstance(nombres_salida, list):
+                nombres_salida = [nombres_salida]
+            agregaciones[nombres_salida[0]] = (columna, operacion)
+            if len(nombres_salida) > 1:
+                duplicados[nombres_salida[0]] = nombres_salida[1:]
+
+    return {
+        "agrupacion": list(reglas.get("agrupacion", [])),
+        "agregaciones": agregaciones,
+        "duplicados": duplicados,
+        "constantes": dict(reglas.get("constantes", {})),
+        "entradas": list(dict.fromkeys(c for c, _ in agregaciones.values())),
+    }
+
+
+def compilar_reglas(reglas):
+    """
+    Compila las reglas de una tabla en un plan de agregación (memorizado).
+
+    Parámetros:
+        reglas (dict): Clave "reglas" de la tabla en el mapeo JSON.
+
+    Retorna:
+        dict: Plan con "agrupacion", "agregaciones" ({salida: (columna,
+        operación)}), "duplicados", "constantes" y "entradas" (columnas de la
+        cobertura que lee el plan).
+    """
+    return _compilar(json.dumps(reglas, ensure_ascii=False))
+
+
+def plan_tabla(definicion_tabla):
+    """Plan de la tabla del mapeo, o None si la tabla no declara "reglas"."""
+    reglas = (definicion_tabla or {}).get("reglas")
+    return compilar_reglas(reglas) if reglas else None
+
+
+def contexto_reglas(mapeo_tematica, usuario=None, fecha_cargue=None):
+    """Valores de los marcadores de las constantes: claves de texto del mapeo, usuario y fecha de cargue."""
+    contexto = {clave: valor for clave, valor in mapeo_tematica.items() if isinstance(valor, str)}
+    contexto["usuario"] = usuario or ""
+    contexto["fecha_cargue"] = fecha_cargue or datetime.now().strftime("%Y-%m-%d %H:%M")
+    return contexto
+
+
+def constantes_plan(plan, contexto):
+    """Constantes del plan con los marcadores resueltos."""
+    return {
+        campo: valor.format_map(contexto) if isinstance(valor, str) else valor
+        for campo, valor in plan["constantes"].items()
+    }
+
+
+def _agregar(df, plan, agregaciones):
+    agrupacion = plan["agrupacion"]
+    if agrupacion and all(c in df.columns for c in agrupacion):
+        return df.groupby(agrupacion, observed=True).agg(**agregaciones).reset_index()
+    # Sin llaves de agrupación: un solo grupo con todas las filas
+    return df.groupby(np.zeros(len(df), dtype="int8")).agg(**agregaciones).reset_index(drop=True)
+
+
+def _agregaciones_validas(df, plan):
+    agregaciones = {}
+    for salida, (columna, operacion) in plan["agregaciones"].items():
+        if columna in df.columns:
+            agregaciones[salida] = (columna, operacion)
+        else:
+            print(f"⚠️ Columna '{columna}' no encontrada en DF. Se omite.")
+    return agregaciones
+
+
+def resultado_vacio(plan, contexto):
+    """Resultado sin filas con las columnas de salida del plan (llaves, agregaciones, copias y constantes)."""
+    columnas = list(plan["agrupacion"]) + list(plan["agregaciones"])
+    return finalizar_plan(pd.DataFrame(columns=columnas), plan, contexto)
+
+
+def finalizar_plan(df_agg, plan, contexto):
+    """Copias de las salidas duplicadas y columnas constantes."""
+    for origen, copias in plan["duplicados"].items():
+        if origen in df_agg.columns:
+            for copia in copias:
+                df_agg[copia] = df_agg[origen]
+    for campo, valor in constantes_plan(plan, contexto).items():
+        df_agg[campo] = valor
+    return df_agg
+
+
+def aplicar_plan(df, plan, contexto):
+    """
+    Aplica el plan al DataFrame completo en un solo groupby.
+
+    Parámetros:
+        df (pd.DataFrame): Lecturas con las llaves y las columnas de entrada.
+        plan (dict): Plan de compilar_reglas.
+        contexto (dict): Marcadores de las constantes (ver contexto_reglas).
+
+    Retorna:
+        pd.DataFrame: Una fila por grupo; sin filas (ver resultado_vacio) si
+        no hay lecturas o ninguna agregación es válida.
+    """
+    if df.empty:
+        return resultado_vacio(plan, contexto)
+
+    agregaciones = _agregaciones_validas(df, plan)
+    if not agregaciones:
+        print("⚠️ No se construyeron reglas de conversión válidas.")
+        return resultado_vacio(plan, contexto)
+    return finalizar_plan(_agregar(df, plan, agregaciones), plan, contexto)
+
+
+def aplicar_plan_por_bloques(bloques, plan, contexto):
+    """
+    Aplica el plan a una secuencia de bloques: cada bloque se agrega por su
+    cuenta y los parciales se combinan (mín. de mínimos, suma de conteos, ...).
+    Solo los parciales quedan en memoria; el resultado es el mismo que el de
+    aplicar_plan sobre todas las lecturas.
+    """
+    parciales = []
+    agregaciones = None
+    for bloque in bloques:
+        if bloque.empty:
+            continue
+        if agregaciones is None:
+            agregaciones = _agregaciones_validas(bloque, plan)
+            if not agregaciones:
+                print("⚠️ No se construyeron reglas de conversión válidas.")
+                return resultado_vacio(plan, contexto)
+        parciales.append(_agregar(bloque, plan, agregaciones))
+
+    if not parciales:
+        return resultado_vacio(plan, contexto)
+
+    combinacion = {salida: (salida, OPERACIONES[operacion]) for salida, (_, operacion) in agregaciones.items()}
+    df_agg = _agregar(pd.concat(parciales, ignore_index=True), plan, combinacion)
+    return finalizar_plan(df_agg, plan, contexto)
@@ -0,0 +1,208 @@
+# utils/reporte_alineacion.py
+"""
+Reporte de calidad de la alineación.
+
+Se arma en bloque (pandas / NumPy) a partir de los arreglos leídos de la
+cobertura alineada:
+    - filas: distancia de ajuste, ruta alineada, motivo de medida nula y si la
+      medida es monótona en el orden de levantamiento (OID).
+    - rutas: estadísticas por ENGROUTEID.
+
+Se escribe en Parquet (si pyarrow está disponible) o CSV y, opcionalmente, en
+XLSX con openpyxl en modo write-only (fila a fila, sin cargar el libro en memoria).
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+try:
+    from openpyxl import Workbook
+    XLSX_DISPONIBLE = True
+except ImportError:
+    XLSX_DISPONIBLE = False
+
+# Motivos de medida nula
+RUTA_INEXISTENTE = "RUTA_INEXISTENTE"
+SIN_COORDENADAS = "SIN_COORDENADAS"
+FUERA_DE_TOLERANCIA = "FUERA_DE_TOLERANCIA"
+
+# Límite de filas por hoja de Excel (incluye el encabezado)
+MAX_FILAS_XLSX = 1_048_575
+
+
+def motivo_nulo(medida, ruta_existe, x, y):
+    """
+    Motivo por el que cada medida quedó nula (None si hay medida).
+
+    Retorna:
+        np.ndarray: RUTA_INEXISTENTE, SIN_COORDENADAS, FUERA_DE_TOLERANCIA o None.
+    """
+    medida = np.asarray(medida, dtype="float64")
+    motivos = np.full(medida.size, None, dtype=object)
+    nula = ~np.isfinite(medida)
+    sin_coordenadas = ~(np.isfinite(x) & np.isfinite(y))
+
+    motivos[nula] = FUERA_DE_TOLERANCIA
+    motivos[nula & sin_coordenadas] = SIN_COORDENADAS
+    motivos[nula & ~np.asarray(ruta_existe, dtype=bool)] = RUTA_INEXISTENTE
+    return motivos
+
+
+def monotonia(ruta, orden, medida):
+    """
+    Indica si cada medida sigue el sentido predominante de su ruta en el orden
+    de levantamiento: se compara con la medida anterior no nula de la misma ruta.
+
+    Retorna:
+        pd.Series: Booleano nullable (NA en las medidas nulas).
+    """
+    df = pd.DataFrame({
+        "ruta": pd.Series(ruta, dtype=object).astype(str).to_numpy(),
+        "orden": np.asarray(orden),
+        "medida": np.asarray(medida, dtype="float64"),
+    })
+    resultado = pd.Series(pd.NA, index=df.index, dtype="boolean")
+    validas = df[np.isfinite(df["medida"])].sort_values(["ruta", "orden"], kind="stable")
+    if validas.empty:
+        return resultado
+
+    delta = validas.groupby("ruta", sort=False)["medida"].diff()
+    sentido = np.sign(delta.groupby(validas["ruta"], sort=False).transform("sum"))
+    sentido = sentido.replace(0, 1)
+    resultado.loc[validas.index] = (delta.isna() | (delta * sentido >= 0)).to_numpy()
+    return resultado
+
+
+def filas_reporte(datos, tipo, medidas, distancias, ruta_existe):
+    """
+    Tabla de calidad por fila.
+
+    Parámetros:
+        datos (dict): Arreglos de leer_cobertura ("oid", "ruta" y coordenadas).
+        tipo (str): Tipo de geometría de la cobertura.
+        medidas (dict): {campo: arreglo} con las medidas escritas en la cobertura.
+        distancias (np.ndarray): Distancia de ajuste por punto; en líneas,
+            inicio y fin concatenados.
+        ruta_existe (np.ndarray): Si el ENGROUTEID de cada fila existe en el centerline.
+
+    Retorna:
+        pd.DataFrame: Una fila por registro de la cobertura.
+    """
+    n = datos["oid"].size
+    filas = {"OID": datos["oid"], "ENGROUTEID": datos["ruta"]}
+    filas.update(medidas)
+
+    if tipo == "Polyline":
+        d_ini, d_fin = distancias[:n], distancias[n:]
+        filas["DIST_INICIO"] = d_ini
+        filas["DIST_FIN"] = d_fin
+        filas["DISTANCIA"] = np.fmax(d_ini, d_fin)
+        m_ini, m_fin = medidas["ENGFROMM"], medidas["ENGTOM"]
+        motivo_ini = motivo_nulo(m_ini, ruta_existe, datos["x_ini"], datos["y_ini"])
+        motivo_fin = motivo_nulo(m_fin, ruta_existe, datos["x_fin"], datos["y_fin"])
+        motivo = np.where(motivo_ini == None, motivo_fin, motivo_ini)
+        alineada = np.isfinite(m_ini) & np.isfinite(m_fin)
+        monotona = monotonia(datos["ruta"], datos["oid"], m_ini)
+    else:
+        filas["DISTANCIA"] = distancias
+        medida = medidas["ENGM"]
+        motivo = motivo_nulo(medida, ruta_existe, datos["x"], datos["y"])
+        alineada = np.isfinite(medida)
+        monotona = monotonia(datos["ruta"], datos["oid"], medida)
+
+    filas["RUTA_ALINEADA"] = np.where(alineada, datos["ruta"], None)
+    filas["MOTIVO_NULO"] = motivo
+    filas["MONOTONA"] = monotona.to_numpy()
+    return pd.DataFrame(filas)
+
+
+def resumen_rutas(filas, campo_medida):
+    """
+    Estadísticas por ENGROUTEID a partir de la tabla de filas.
+
+    Retorna:
+        pd.DataFrame: Filas, alineadas, nulas por motivo, distancias de ajuste,
+        rango de medidas y medidas no monótonas por ruta.
+    """
+    df = filas.assign(
+        _ALINEADA=filas["RUTA_ALINEADA"].notna(),
+        _FUERA=filas["MOTIVO_NULO"] == FUERA_DE_TOLERANCIA,
+        _INEXISTENTE=filas["MOTIVO_NULO"] == RUTA_INEXISTENTE,
+        _NO_MONOTONA=filas["MONOTONA"] == False,
+        ENGROUTEID=filas["ENGROUTEID"].astype(object).where(filas["ENGROUTEID"].notna(), "(nulo)"),
+    )
+    resumen = df.groupby("ENGROUTEID", sort=True).agg(
+        FILAS=("OID", "size"),
+        ALINEADAS=("_ALINEADA", "sum"),
+        FUERA_DE_TOLERANCIA=("_FUERA", "sum"),
+        RUTA_INEXISTENTE=("_INEXISTENTE", "sum"),
+        NO_MONOTONAS=("_NO_MONOTONA", "sum"),
+        DIST_MEDIA=("DISTANCIA", "mean"),
+        DIST_P95=("DISTANCIA", lambda d: d.quantile(0.95)),
+        DIST_MAX=("DISTANCIA", "max"),
+        MEDIDA_MIN=(campo_medida, "min"),
+        MEDIDA_MAX=(campo_medida, "max"),
+    )
+    resumen.insert(2, "PCT_ALINEADAS", (100.0 * resumen["ALINEADAS"] / resumen["FILAS"]).round(2))
+    return resumen.reset_index()
+
+
+def _escribir_xlsx(tablas, archivo):
+    """Escribe las tablas en un libro XLSX en modo write-only, una hoja por tabla."""
+    libro = Workbook(write_only=True)
+    for nombre, tabla in tablas.items():
+        valores = tabla.astype(object).where(tabla.notna(), None)
+        hoja, escritas, parte = None, MAX_FILAS_XLSX, 0
+        for fila in valores.itertuples(index=False, name=None):
+            if escritas >= MAX_FILAS_XLSX:
+                parte += 1
+                hoja = libro.create_sheet(nombre if parte == 1 else f"{nombre}_{parte}")
+                hoja.append(list(tabla.columns))
+                escritas = 0
+            hoja.append(list(fila))
+            escritas += 1
+        if hoja is None:
+            libro.create_sheet(nombre).append(list(tabla.columns))
+    libro.save(archivo)
+
+
+def escribir_reporte(filas, rutas, salida, formato="parquet", xlsx=False):
+    """
+    Escribe el reporte junto a `salida` (prefijo de los archivos).
+
+    Parámetros:
+        filas (pd.DataFrame): Tabla por fila (filas_reporte).
+        rutas (pd.DataFrame): Resumen por ruta (resumen_rutas).
+        salida (str): Prefijo de ruta de los archivos generados.
+        formato (str): "parquet" o "csv". Sin pyarrow se usa CSV.
+        xlsx (bool): Genera además un libro XLSX (requiere openpyxl).
+
+    Retorna:
+        list[str]: Archivos generados.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(salida)), exist_ok=True)
+    tablas = {"Filas": filas, "Rutas": rutas}
+    archivos = []
+
+    parquet = formato == "parquet" and PARQUET_DISPONIBLE
+    for nombre, tabla in tablas.items():
+        if parquet:
+            archivo = f"{salida}_{nombre.lower()}.parquet"
+            tabla.to_parquet(archivo, index=False)
+        else:
+            archivo = f"{salida}_{nombre.lower()}.csv"
+            tabla.to_csv(archivo, index=False, encoding="utf-8-sig")
+        archivos.append(archivo)
+
+    if xlsx and XLSX_DISPONIBLE:
+        archivo = f"{salida}.xlsx"
+        _escribir_xlsx(tablas, archivo)
+        archivos.append(archivo)
+    return archivos
@@ -0,0 +1,293 @@
+# utils/segmentacion_dinamica.py
+"""
+Segmentación dinámica en memoria (NumPy) sobre el snapshot del centerline.
+
+Reemplaza MakeRouteEventLayer + Select para los eventos de ruta: los puntos
+(ENGM) se interpolan y los tramos (ENGFROMM / ENGTOM) se extraen como
+sub-polilíneas directamente de los vértices M del snapshot (ver
+utils.snapshot_centerline), ruta por ruta y con búsquedas vectorizadas.
+
+El resultado es un búfer de geometría plano, listo para una inserción masiva:
+    puntos  x, y, z, m por evento
+    tramos  offsets (n + 1) sobre los arreglos de vértices x, y, z, m y
+            parte (número de parte de cada vértice dentro de su evento)
+
+Cada evento trae un estado; los que no se pueden ubicar (ruta inexistente,
+medida fuera del rango M de la ruta, ...) no generan geometría y se reportan.
+Los puntos por coordenadas (GPSX / GPSY / GPSZ) se validan con los mismos estados.
+
+El módulo no depende de arcpy.
+"""
+import numpy as np
+
+from utils.indice_centerline import posicion_rutas
+
+# Estado de cada evento
+EN_RUTA = 0
+RUTA_INEXISTENTE = 1
+SIN_MEDIDA = 2
+FUERA_DE_RANGO = 3
+EN_HUECO = 4
+MEDIDAS_NO_MONOTONAS = 5
+LONGITUD_NULA = 6
+SIN_COORDENADAS = 7
+FUERA_DE_DOMINIO = 8
+
+MOTIVOS = {
+    RUTA_INEXISTENTE: "RUTA_INEXISTENTE",
+    SIN_MEDIDA: "SIN_MEDIDA",
+    FUERA_DE_RANGO: "FUERA_DE_RANGO_M",
+    EN_HUECO: "ENTRE_PARTES_DE_LA_RUTA",
+    MEDIDAS_NO_MONOTONAS: "MEDIDAS_NO_MONOTONAS",
+    LONGITUD_NULA: "LONGITUD_NULA",
+    SIN_COORDENADAS: "SIN_COORDENADAS",
+    FUERA_DE_DOMINIO: "FUERA_DE_RANGO_XY",
+}
+
+
+# -------------------------------------------------------------------
+# 🧭 Vértices válidos del snapshot
+# -------------------------------------------------------------------
+def vertices_validos(snapshot):
+    """
+    Vértices con coordenadas y M (sin los separadores NaN de las partes).
+
+    Retorna:
+        tuple(np.ndarray, np.ndarray): Índice de cada vértice válido en los
+        arreglos del snapshot y offsets de cada ruta sobre ese índice (n_rutas + 1).
+    """
+    validos = np.flatnonzero(np.isfinite(snapshot["x"]) & np.isfinite(snapshot["y"]) & np.isfinite(snapshot["m"]))
+    return validos, np.searchsorted(validos, snapshot["offsets"])
+
+
+def _grupos(pos):
+    """Eventos agrupados por posición de ruta (solo rutas existentes)."""
+    orden = np.argsort(pos, kind="stable")
+    orden = orden[pos[orden] >= 0]
+    if orden.size == 0:
+        return
+    cortes = np.flatnonzero(np.diff(pos[orden])) + 1
+    for filas in np.split(orden, cortes):
+        yield pos[filas[0]], filas
+
+
+def _localizar(validos, mc, inicio, medidas):
+    """
+    Segmento de la ruta que contiene cada medida.
+
+    Retorna:
+        tuple: Posiciones a y b (sobre `validos`, con el desplazamiento `inicio`),
+        fracción t dentro del segmento y máscara de medidas en un hueco entre partes.
+    """
+    j = np.clip(np.searchsorted(mc, medidas, side="right"), 1, mc.size - 1)
+    a, b = j - 1, j
+    dm = mc[b] - mc[a]
+    t = np.where(dm > 0, (medidas - mc[a]) / np.where(dm > 0, dm, 1.0), 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    a, b = a + inicio, b + inicio
+    hueco = (validos[b] - validos[a] > 1) & (t > 0) & (t < 1)
+    return a, b, t, hueco
+
+
+def _interpolar(snapshot, validos, a, b, t):
+    va, vb = validos[a], validos[b]
+    return tuple(snapshot[eje][va] + t * (snapshot[eje][vb] - snapshot[eje][va]) for eje in ("x", "y", "z", "m"))
+
+
+def _rango_ruta(snapshot, validos, rango, p):
+    """Medidas válidas de la ruta `p`, o None si no son crecientes o no forman un segmento."""
+    inicio, fin = rango[p], rango[p + 1]
+    mc = snapshot["m"][validos[inicio:fin]]
+    if mc.size < 2 or np.any(np.diff(mc) < 0):
+        return inicio, None
+    return inicio, mc
+
+
+# -------------------------------------------------------------------
+# 📍 Puntos
+# -------------------------------------------------------------------
+def ubicar_puntos(snapshot, ids_ruta, medidas, validos=None):
+    """
+    Interpola la posición de eventos puntuales (ENGM) sobre sus rutas.
+
+    Parámetros:
+        snapshot (dict): Snapshot del centerline.
+        ids_ruta (array-like): ENGROUTEID de cada evento.
+        medidas (array-like): Medida M de cada evento.
+        validos (tuple): Resultado de vertices_validos (se calcula si no se da).
+
+    Retorna:
+        dict: "x", "y", "z", "m" (NaN en los eventos sin ubicar) y "estado".
+    """
+    medidas = np.asarray(medidas, dtype="float64")
+    n = medidas.size
+    salida = {eje: np.full(n, np.nan) for eje in ("x", "y", "z", "m")}
+    pos = posicion_rutas(snapshot, ids_ruta)
+    estado = np.where(pos < 0, RUTA_INEXISTENTE, np.where(np.isfinite(medidas), EN_RUTA, SIN_MEDIDA)).astype("int8")
+
+    validos, rango = validos or vertices_validos(snapshot)
+    for p, filas in _grupos(np.where(estado == EN_RUTA, pos, -1)):
+        inicio, mc = _rango_ruta(snapshot, validos, rango, p)
+        if mc is None:
+            estado[filas] = MEDIDAS_NO_MONOTONAS
+            continue
+
+        mv = medidas[filas]
+        fuera = (mv < mc[0]) | (mv > mc[-1])
+        estado[filas[fuera]] = FUERA_DE_RANGO
+        filas, mv = filas[~fuera], mv[~fuera]
+
+        a, b, t, hueco = _localizar(validos, mc, inicio, mv)
+        estado[filas[hueco]] = EN_HUECO
+        for eje, valores in zip(("x", "y", "z", "m"), _interpolar(snapshot, validos, a, b, t)):
+            salida[eje][filas[~hueco]] = valores[~hueco]
+
+    salida["estado"] = estado
+    return salida
+
+
+# -------------------------------------------------------------------
+# 〰️ Tramos
+# -------------------------------------------------------------------
+def extraer_tramos(snapshot, ids_ruta, desde, hasta, validos=None):
+    """
+    Extrae la sub-polilínea de cada evento lineal (ENGFROMM / ENGTOM): punto
+    interpolado en la medida inicial, vértices de la ruta entre ambas medidas
+    y punto interpolado en la medida final. Las medidas invertidas se ordenan.
+
+    Retorna:
+        dict: "offsets" (n + 1) sobre los vértices "x", "y", "z", "m" y
+        "parte" (número de parte de cada vértice en su evento), y "estado".
+        Los eventos sin ubicar no tienen vértices.
+    """
+    desde = np.asarray(desde, dtype="float64")
+    hasta = np.asarray(hasta, dtype="float64")
+    n = desde.size
+    m0, m1 = np.fmin(desde, hasta), np.fmax(desde, hasta)
+    pos = posicion_rutas(snapshot, ids_ruta)
+    medidas_ok = np.isfinite(desde) & np.isfinite(hasta)
+    estado = np.where(pos < 0, RUTA_INEXISTENTE, np.where(medidas_ok, EN_RUTA, SIN_MEDIDA)).astype("int8")
+    estado[(estado == EN_RUTA) & (m0 == m1)] = LONGITUD_NULA
+
+    # Por evento: extremos interpolados, posición "continua" de cada extremo sobre
+    # los vértices del snapshot y rango de vértices interiores (sobre `validos`)
+    validos, rango = validos or vertices_validos(snapshot)
+    extremos = np.full((2, 4, n), np.nan)
+    lugar = np.zeros((2, n))
+    interior = np.zeros((2, n), dtype="int64")
+    for p, filas in _grupos(np.where(estado == EN_RUTA, pos, -1)):
+        inicio, mc = _rango_ruta(snapshot, validos, rango, p)
+        if mc is None:
+            estado[filas] = MEDIDAS_NO_MONOTONAS
+            continue
+
+        fuera = (m0[filas] < mc[0]) | (m1[filas] > mc[-1])
+        estado[filas[fuera]] = FUERA_DE_RANGO
+        filas = filas[~fuera]
+
+        huecos = np.zeros(filas.size, dtype=bool)
+        for k, medidas in enumerate((m0[filas], m1[filas])):
+            a, b, t, hueco = _localizar(validos, mc, inicio, medidas)
+            huecos |= hueco
+            extremos[k][:, filas] = _interpolar(snapshot, validos, a, b, t)
+            lugar[k, filas] = validos[a] + t * (validos[b] - validos[a])
+        estado[filas[huecos]] = EN_HUECO
+
+        interior[0, filas] = inicio + np.searchsorted(mc, m0[filas], side="right")
+        interior[1, filas] = inicio + np.searchsorted(mc, m1[filas], side="left")
+
+    ok = estado == EN_RUTA
+    n_interior = np.where(ok, np.maximum(interior[1] - interior[0], 0), 0)
+    conteo = np.where(ok, 2 + n_interior, 0)
+    offsets = np.concatenate([[0], np.cumsum(conteo)]).astype("int64")
+    total = int(offsets[-1])
+
+    vertices = {eje: np.empty(total) for eje in ("x", "y", "z", "m")}
+    posicion = np.empty(total)
+    eventos = np.flatnonzero(ok)
+    primero, ultimo = offsets[eventos], offsets[eventos + 1] - 1
+    for k, destino in enumerate((primero, ultimo)):
+        for i, eje in enumerate(("x", "y", "z", "m")):
+            vertices[eje][destino] = extremos[k, i, eventos]
+        posicion[destino] = lugar[k, eventos]
+
+    # Vértices interiores: índices consecutivos sobre `validos` desde interior[0]
+    cuantos = n_interior[eventos]
+    if cuantos.sum():
+        desplazamiento = np.arange(cuantos.sum()) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+        origen = validos[np.repeat(interior[0, eventos], cuantos) + desplazamiento]
+        destino = np.repeat(primero + 1, cuantos) + desplazamiento
+        for eje in ("x", "y", "z", "m"):
+            vertices[eje][destino] = snapshot[eje][origen]
+        posicion[destino] = origen
+
+    # Nueva parte cuando dos vértices seguidos del evento no son contiguos en la ruta
+    # (o cuando empieza otro evento)
+    corte = np.zeros(total, dtype=bool)
+    corte[1:] = np.diff(posicion) > 1
+    corte[offsets[:-1][conteo > 0]] = True
+    parte = np.cumsum(corte) - 1
+
+    # Partes de un solo vértice (medidas justo en el fin / inicio de una parte
+    # de la ruta) son degeneradas: se descartan
+    evento = np.repeat(np.arange(n), conteo)
+    conservar = np.bincount(parte, minlength=parte.size)[parte] >= 2 if total else np.zeros(0, dtype=bool)
+    if not conservar.all():
+        evento, parte = evento[conservar], parte[conservar]
+        vertices = {eje: valores[conservar] for eje, valores in vertices.items()}
+        conteo = np.bincount(evento, minlength=n)
+        offsets = np.concatenate([[0], np.cumsum(conteo)]).astype("int64")
+        estado[ok & (conteo == 0)] = EN_HUECO
+
+    # Número de parte dentro de cada evento, desde 0
+    nueva = np.ones(parte.size, dtype=bool)
+    nueva[1:] = (parte[1:] != parte[:-1]) | (evento[1:] != evento[:-1])
+    numero = np.cumsum(nueva)
+    vertices["parte"] = numero - numero[offsets[:-1][conteo > 0]].repeat(conteo[conteo > 0])
+
+    vertices["offsets"] = offsets
+    vertices["estado"] = estado
+    return vertices
+
+
+# -------------------------------------------------------------------
+# 🛰️ Coordenadas
+# -------------------------------------------------------------------
+def validar_coordenadas(x, y, z=None, dominio=None):
+    """
+    Búfer de puntos a partir de columnas de coordenadas, validado en bloque.
+
+    Parámetros:
+        x, y, z (array-like): Coordenadas de cada fila (z opcional; un Z nulo
+            no invalida el punto).
+        dominio (tuple): (xmin, ymin, xmax, ymax) válidos, por ejemplo
+            (-180, -90, 180, 90) en un sistema geográfico.
+
+    Retorna:
+        dict: "x", "y", "z", "m" (NaN en las filas inválidas) y "estado"
+        (SIN_COORDENADAS o FUERA_DE_DOMINIO en las filas sin punto).
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    z = np.full(x.size, np.nan) if z is None else np.asarray(z, dtype="float64")
+    estado = np.where(np.isfinite(x) & np.isfinite(y), EN_RUTA, SIN_COORDENADAS).astype("int8")
+    if dominio is not None:
+        xmin, ymin, xmax, ymax = dominio
+        with np.errstate(invalid="ignore"):
+            fuera = (x < xmin) | (x > xmax) | (y < ymin) | (y > ymax)
+        estado[(estado == EN_RUTA) & fuera] = FUERA_DE_DOMINIO
+
+    ok = estado == EN_RUTA
+    return {
+        "x": np.where(ok, x, np.nan),
+        "y": np.where(ok, y, np.nan),
+        "z": np.where(ok, z, np.nan),
+        "m": np.full(x.size, np.nan),
+        "estado": estado,
+    }
+
+
+def resumen_estados(estado):
+    """Eventos sin ubicar por motivo: {motivo: cantidad}."""
+    valores, conteos = np.unique(estado[estado != EN_RUTA], return_counts=True)
+    return {MOTIVOS[int(v)]: int(c) for v, c in zip(valores, conteos)}
@@ -0,0 +1,176 @@
+# utils/snapshot_centerline.py
+"""
+Snapshot columnar del P_centerline.
+
+El centerline se exporta una sola vez a arreglos planos:
+    rutas.npy    ENGROUTEID de cada ruta (ordenados)
+    nombres.npy  ENGROUTENAME de cada ruta
+    offsets.npy  inicio de cada ruta en los arreglos de vértices (n_rutas + 1)
+    x/y/z/m.npy  vértices float64; las partes se separan con un vértice NaN
+    cajas.npy    envolvente de cada ruta (xmin, ymin, xmax, ymax)
+
+Alineación y espacialización abren el snapshot con mmap en lugar de leer la
+geodatabase, y varios procesos de cargue comparten una sola copia en memoria.
+
+Uso:
+    python -m utils.snapshot_centerline <ruta P_centerline>
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from utils.indice_centerline import DIRECTORIO_CACHE, abrir_arreglos, clave_centerline, guardar_arreglos
+
+_ARREGLOS = ("rutas", "nombres", "offsets", "x", "y", "z", "m", "cajas")
+
+
+def exportar_snapshot(route, directorio, campo_routeid="ENGROUTEID", campo_nombre="ENGROUTENAME"):
+    """
+    Exporta el centerline a un snapshot columnar en `directorio`.
+
+    Parámetros:
+        route (str): Feature class de rutas (M-aware).
+        directorio (str): Carpeta de salida del snapshot.
+        campo_routeid (str): Campo identificador de la ruta.
+        campo_nombre (str): Campo con el nombre de la ruta.
+    """
+    import arcpy
+
+    vertices = {}
+    nombres = {}
+    with arcpy.da.SearchCursor(route, [campo_routeid, campo_nombre, "SHAPE@"]) as cursor:
+        for rguid, nombre, shape in cursor:
+            if rguid is None:
+                continue
+            rguid = str(rguid)
+            nombres.setdefault(rguid, nombre)
+            if shape is None:
+                continue
+            xyzm = vertices.setdefault(rguid, [])
+            for parte in shape:
+                if xyzm:
+                    xyzm.append((np.nan, np.nan, np.nan, np.nan))
+                for pnt in parte:
+                    if pnt is None:
+                        xyzm.append((np.nan, np.nan, np.nan, np.nan))
+                        continue
+                    z = pnt.Z if pnt.Z is not None else np.nan
+                    m = pnt.M if pnt.M is not None else np.nan
+                    xyzm.append((pnt.X, pnt.Y, z, m))
+
+    ids = sorted(nombres)
+    bloques = [np.asarray(vertices.get(r, []), dtype="float64").reshape(-1, 4) for r in ids]
+    conteo = np.array([len(b) for b in bloques], dtype="int64")
+    planos = np.concatenate(bloques) if bloques else np.empty((0, 4))
+
+    cajas = np.full((len(ids), 4), np.nan)
+    for i, b in enumerate(bloques):
+        if len(b) and np.isfinite(b[:, 0]).any():
+            cajas[i] = (np.nanmin(b[:, 0]), np.nanmin(b[:, 1]), np.nanmax(b[:, 0]), np.nanmax(b[:, 1]))
+
+    guardar_arreglos(
+        directorio,
+        {
+            "rutas": np.asarray(ids, dtype=str),
+            "nombres": np.asarray(["" if nombres[r] is None else str(nombres[r]) for r in ids], dtype=str),
+            "offsets": np.concatenate([[0], np.cumsum(conteo)]).astype("int64"),
+            "x": planos[:, 0], "y": planos[:, 1], "z": planos[:, 2], "m": planos[:, 3],
+            "cajas": cajas,
+        },
+        {"route": os.path.abspath(route), "campo_routeid": campo_routeid, "campo_nombre": campo_nombre},
+    )
+
+
+def abrir_snapshot(directorio):
+    """
+    Abre un snapshot con memoria mapeada.
+
+    Retorna:
+        dict | None: Arreglos del snapshot, o None si no existe.
+    """
+    guardado = abrir_arreglos(directorio, _ARREGLOS)
+    return None if guardado is None else guardado[0]
+
+
+def obtener_snapshot(route, campo_routeid="ENGROUTEID", campo_nombre="ENGROUTENAME"):
+    """
+    Devuelve el snapshot del centerline, exportándolo solo si el centerline
+    cambió desde la última exportación (clave: ruta + sello de modificación).
+    Las fuentes sin sello (.sde) se exportan a un directorio temporal, se
+    cargan en memoria y el directorio se borra.
+
+    Retorna:
+        dict: Snapshot abierto con memoria mapeada (en memoria para .sde).
+    """
+    clave = clave_centerline(route, campo_routeid, campo_nombre)
+    if clave is None:
+        temporal = tempfile.mkdtemp(prefix="snapshot_")
+        try:
+            directorio = os.path.join(temporal, "snapshot")
+            exportar_snapshot(route, directorio, campo_routeid, campo_nombre)
+            return {nombre: np.array(arreglo) for nombre, arreglo in abrir_snapshot(directorio).items()}
+        finally:
+            shutil.rmtree(temporal, ignore_errors=True)
+
+    directorio = os.path.join(DIRECTORIO_CACHE, f"snapshot_{clave}")
+    snapshot = abrir_snapshot(directorio)
+    if snapshot is None:
+        exportar_snapshot(route, directorio, campo_routeid, campo_nombre)
+        snapshot = abrir_snapshot(directorio)
+    return snapshot
+
+
+def _posicion(snapshot, rguid):
+    rutas = snapshot["rutas"]
+    pos = int(np.searchsorted(rutas, str(rguid)))
+    if pos < rutas.size and rutas[pos] == str(rguid):
+        return pos
+    return -1
+
+
+def vertices_ruta(snapshot, rguid):
+    """
+    Vértices (x, y, z, m) de una ruta como vistas sobre el snapshot (sin copia).
+
+    Retorna:
+        tuple | None: Arreglos x, y, z, m o None si la ruta no existe.
+    """
+    pos = _posicion(snapshot, rguid)
+    if pos < 0:
+        return None
+    ini, fin = snapshot["offsets"][pos], snapshot["offsets"][pos + 1]
+    return tuple(snapshot[eje][ini:fin] for eje in ("x", "y", "z", "m"))
+
+
+def rutas_desde_snapshot(snapshot, ids_ruta=None):
+    """
+    Rutas en el formato del motor de alineación: {ENGROUTEID: (vx, vy, vm)}.
+
+    Parámetros:
+        snapshot (dict): Snapshot abierto.
+        ids_ruta (iterable): ENGROUTEID a incluir (None = todas).
+    """
+    ids = snapshot["rutas"].tolist() if ids_ruta is None else ids_ruta
+    rutas = {}
+    for rguid in ids:
+        vertices = vertices_ruta(snapshot, rguid)
+        if vertices is not None:
+            x, y, _, m = vertices
+            rutas[str(rguid)] = (x, y, m)
+    return rutas
+
+
+def nombres_ruta(snapshot):
+    """Diccionario ENGROUTEID → ENGROUTENAME."""
+    return dict(zip(snapshot["rutas"].tolist(), snapshot["nombres"].tolist()))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.snapshot_centerline <ruta P_centerline>")
+        sys.exit(1)
+    obtener_snapshot(sys.argv[1])
+    print(f"✅ Snapshot del centerline disponible en {DIRECTORIO_CACHE}")